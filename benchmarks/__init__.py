@@ -0,0 +1 @@
+"""Offline benchmarks of the hot paths of the SDK and the strategy layer, run by benchmarks/run_benchmarks.py."""
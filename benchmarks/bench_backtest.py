@@ -0,0 +1,51 @@
+"""Time BacktestTrader.feed with many open limit orders.
+
+Usage: python benchmarks/bench_backtest.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import measure, seed
+from huobi.constant import OrderType
+from trader import BacktestTrader
+import utils
+
+
+def make_trader(num_orders):
+    """Trader at 3000 usdt/eth with half of the orders buying below 2000 and half selling above 4000."""
+    trader = BacktestTrader({'usdt': 1e9, 'eth': 1e6}, {'ethusdt': 3000})
+    num_buys = num_orders // 2
+    trader.submit_orders('ethusdt', np.linspace(1000, 2000, num_buys).tolist(), [0.01] * num_buys,
+                         OrderType.BUY_LIMIT)
+    trader.submit_orders('ethusdt', np.linspace(4000, 5000, num_orders - num_buys).tolist(),
+                         [0.01] * (num_orders - num_buys), OrderType.SELL_LIMIT)
+    return trader
+
+
+def run(quick=False):
+    """Return the seconds per feed of prices reaching none of the open orders, so that every feed scans them all."""
+    seed()
+    num_feeds = 200
+    prices = utils.brownian_motion(3000, num_feeds, 0.1, sigma=5).tolist()
+    results = {}
+    for num_orders in (100, 1000) if quick else (100, 1000, 10000):
+        def make_run():
+            trader = make_trader(num_orders)
+            return lambda: [trader.feed({'ethusdt': price}) for price in prices]
+
+        results[f'backtest.feed.{num_orders}_orders'] = measure(make_run, num_feeds)
+    return results
+
+
+def main():
+    print('============ BacktestTrader =============')
+    for name, seconds in run().items():
+        print(f'{name:<36}{seconds * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Compare the JSON decoders and the frame decoding paths on websocket market payloads.
+
+Usage: python benchmarks/bench_json.py [recording_dir ...]
+
+Payloads are read from recordings of huobi.connection.impl.websocket_recorder if given, or else generated kline and
+depth frames are used. Each decoder parses the decompressed bytes directly, while the baseline is the former path
+decoding them to str and parsing with the stdlib. The frame paths time the whole decoding of the gzipped frames.
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure, seed
+from huobi.connection.impl.frame_decoder import GzipFrameDecoder
+from huobi.utils.json_backend import JSON_BACKENDS, select_json_backend
+
+
+def make_kline_frames(n):
+    frames = []
+    for i in range(n):
+        price = 3000 + random.random() * 10
+        frames.append({'ch': 'market.ethusdt.kline.1min', 'ts': 1630000000000 + i * 100,
+                       'tick': {'id': 1630000000 + i // 600 * 60, 'open': price, 'close': price + 1,
+                                'low': price - 2, 'high': price + 3, 'amount': random.random() * 100,
+                                'vol': random.random() * 300000, 'count': random.randint(1, 1000)}})
+    return frames
+
+
+def make_depth_frames(n, levels=20):
+    frames = []
+    for i in range(n):
+        price = 3000 + random.random() * 10
+        frames.append({'ch': 'market.ethusdt.depth.step0', 'ts': 1630000000000 + i * 100,
+                       'tick': {'ts': 1630000000000 + i * 100, 'version': 100000 + i,
+                                'bids': [[round(price - j * 0.01, 2), random.random() * 10] for j in range(levels)],
+                                'asks': [[round(price + j * 0.01, 2), random.random() * 10] for j in range(levels)]}})
+    return frames
+
+
+def read_recorded_frames(root_dirs):
+    from huobi.connection.impl.websocket_recorder import FRAME_BINARY
+    from utils.replay import merge_recordings
+    payloads = []
+    for _, flags, payload in merge_recordings(root_dirs):
+        if flags & FRAME_BINARY:
+            payloads.append(payload)
+    return payloads
+
+
+def bench(name, payloads, number=5):
+    messages = [gzip.decompress(payload) for payload in payloads]
+    baseline = min(timeit.repeat(lambda: [json.loads(message.decode('utf-8')) for message in messages],
+                                 number=number, repeat=3))
+    print(f'============ {name}: {len(messages)} frames =============')
+    print(f'json (str)    {baseline / number / len(messages) * 1e6:8.2f} us/frame')
+    for backend in JSON_BACKENDS:
+        try:
+            _, loads = select_json_backend(backend)
+        except ValueError:
+            print(f'{backend:<13} not installed')
+            continue
+        elapsed = min(timeit.repeat(lambda: [loads(message) for message in messages], number=number, repeat=3))
+        print(f'{backend:<13} {elapsed / number / len(messages) * 1e6:8.2f} us/frame'
+              f'  x{baseline / elapsed:.2f}')
+    baseline = min(timeit.repeat(
+        lambda: [json.loads(gzip.decompress(payload).decode('utf-8')) for payload in payloads], number=number, repeat=3))
+    decoder = GzipFrameDecoder()
+    elapsed = min(timeit.repeat(lambda: [decoder.decode(payload) for payload in payloads], number=number, repeat=3))
+    print(f'gzip + json   {baseline / number / len(payloads) * 1e6:8.2f} us/frame')
+    print(f'frame decoder {elapsed / number / len(payloads) * 1e6:8.2f} us/frame  x{baseline / elapsed:.2f}')
+
+
+def run(quick=False):
+    """Return the seconds per frame of the installed decoders and of the frame decoder on generated frames."""
+    seed()
+    results = {}
+    for name, frames in [('kline', make_kline_frames(1000 if quick else 10000)),
+                         ('depth', make_depth_frames(200 if quick else 2000))]:
+        payloads = [gzip.compress(json.dumps(frame).encode()) for frame in frames]
+        messages = [gzip.decompress(payload) for payload in payloads]
+        for backend in JSON_BACKENDS:
+            try:
+                _, loads = select_json_backend(backend)
+            except ValueError:
+                continue
+            results[f'json.{name}.{backend}'] = measure(lambda: lambda: [loads(message) for message in messages],
+                                                        len(messages))
+        decoder = GzipFrameDecoder()
+        results[f'json.{name}.frame_decoder'] = measure(
+            lambda: lambda: [decoder.decode(payload) for payload in payloads], len(payloads))
+    return results
+
+
+def main():
+    seed()
+    if len(sys.argv) > 1:
+        bench('recorded', read_recorded_frames(sys.argv[1:]))
+        return
+    bench('kline', [gzip.compress(json.dumps(frame).encode()) for frame in make_kline_frames(10000)])
+    bench('depth', [gzip.compress(json.dumps(frame).encode()) for frame in make_depth_frames(2000)])
+
+
+if __name__ == '__main__':
+    main()
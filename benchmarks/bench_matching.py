@@ -0,0 +1,62 @@
+"""Time the order operations of MatchingEngine.
+
+Usage: python benchmarks/bench_matching.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import measure, seed
+from trader import MatchingEngine
+
+
+def run(quick=False):
+    """Return the seconds per order added and canceled, added crossing the book, and per trade matched."""
+    seed()
+    num_orders = 20000 if quick else 200000
+    prices = np.round(np.random.normal(1000, 5, num_orders), 1).tolist()
+    is_buys = (np.random.random(num_orders) < 0.5).tolist()
+    results = {}
+
+    def make_resting_run():
+        engine = MatchingEngine()
+
+        def run_resting():
+            # orders resting 3 away from the price, every other one canceled
+            for i in range(num_orders):
+                is_buy = is_buys[i]
+                engine.add_order(i, 'ethusdt', is_buy, prices[i] - 3 if is_buy else prices[i] + 3, 1.0)
+                if i % 2:
+                    engine.cancel(i - 1)
+        return run_resting
+
+    results['matching.add_cancel'] = measure(make_resting_run, num_orders * 3 // 2)
+
+    def make_crossing_run():
+        engine = MatchingEngine()
+        return lambda: [engine.add_order(i, 'ethusdt', is_buys[i], prices[i], 1.0) for i in range(num_orders)]
+
+    results['matching.add_crossing'] = measure(make_crossing_run, num_orders)
+
+    def make_trade_run():
+        engine = MatchingEngine()
+        for i in range(num_orders):
+            engine.add_order(i, 'ethusdt', True, prices[i] - 20, 1.0)
+        trade_prices = np.linspace(990, 960, num_orders).tolist()
+        return lambda: [engine.match_trade('ethusdt', price, 1.0) for price in trade_prices]
+
+    results['matching.match_trade'] = measure(make_trade_run, num_orders)
+    return results
+
+
+def main():
+    print('============ MatchingEngine =============')
+    for name, seconds in run().items():
+        print(f'{name:<36}{seconds * 1e6:10.2f} us  {1 / seconds:12.0f} ops/s')
+
+
+if __name__ == '__main__':
+    main()
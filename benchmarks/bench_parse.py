@@ -0,0 +1,95 @@
+"""Time the parsing of decoded market payloads into the SDK models through default_parse and json_parse.
+
+Usage: python benchmarks/bench_parse.py [recording_dir ...]
+
+Payloads are the messages of recordings of huobi.connection.impl.websocket_recorder if given, grouped by the kind
+of their channel, or else generated kline, depth and trade messages and a REST kline response.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure, seed
+from benchmarks.bench_json import make_kline_frames, make_depth_frames
+from huobi.model.market import Candlestick
+from huobi.service.market.market_event_parser import parse_candlestick_event, parse_trade_detail_event, \
+    parse_price_depth_event
+from huobi.utils.json_parser import default_parse_list_dict
+
+PARSERS = {
+    'kline': parse_candlestick_event,
+    'depth': parse_price_depth_event,
+    'trade': parse_trade_detail_event,
+}
+
+
+def make_trade_frames(n, trades_per_frame=5):
+    frames = []
+    for i in range(n):
+        ts = 1630000000000 + i * 100
+        frames.append({'ch': 'market.ethusdt.trade.detail', 'ts': ts,
+                       'tick': {'id': 100000 + i, 'ts': ts,
+                                'data': [{'id': (100000 + i) * 100 + j, 'ts': ts, 'tradeId': 200000 + i * 10 + j,
+                                          'amount': random.random(), 'price': 3000 + random.random() * 10,
+                                          'direction': random.choice(['buy', 'sell'])}
+                                         for j in range(trades_per_frame)]}})
+    return frames
+
+
+def make_kline_response(n):
+    return {'ch': 'market.ethusdt.kline.1min', 'status': 'ok', 'ts': 1630000000000,
+            'data': [frame['tick'] for frame in make_kline_frames(n)]}
+
+
+def get_kind(ch):
+    if '.kline.' in ch:
+        return 'kline'
+    if '.depth.' in ch:
+        return 'depth'
+    if ch.endswith('.trade.detail'):
+        return 'trade'
+    return None
+
+
+def read_recorded_messages(root_dirs):
+    from utils.replay import merge_recordings, decode_message
+    messages = {}
+    for _, flags, payload in merge_recordings(root_dirs):
+        message = decode_message(flags, payload)
+        kind = get_kind(message.get('ch', '')) if isinstance(message, dict) else None
+        if kind is not None and 'tick' in message:
+            messages.setdefault(kind, []).append(message)
+    return messages
+
+
+def bench_messages(messages):
+    results = {}
+    for kind, frames in messages.items():
+        parse = PARSERS[kind]
+        results[f'parse.{kind}'] = measure(lambda: lambda: [parse(frame) for frame in frames], len(frames))
+    return results
+
+
+def run(quick=False):
+    """Return the seconds per message of the event parsers and per candle of the REST kline parser."""
+    seed()
+    n = 1000 if quick else 10000
+    results = bench_messages({'kline': make_kline_frames(n), 'depth': make_depth_frames(n // 5),
+                              'trade': make_trade_frames(n)})
+    response = make_kline_response(2000)
+    results['parse.rest_kline'] = measure(
+        lambda: lambda: default_parse_list_dict(response['data'], Candlestick), len(response['data']))
+    return results
+
+
+def main():
+    results = bench_messages(read_recorded_messages(sys.argv[1:])) if len(sys.argv) > 1 else run()
+    print('============ Parsing =============')
+    for name, seconds in results.items():
+        print(f'{name:<24}{seconds * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Time the signing of REST requests with create_signature.
+
+Usage: python benchmarks/bench_signature.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure
+from huobi.utils.api_signature import create_signature
+from huobi.utils.url_params_builder import UrlParamsBuilder
+
+API_KEY = 'c9a1b2c3-d4e5f6a7-b8c9d0e1-f2a3b'
+SECRET_KEY = '0a1b2c3d-4e5f6a7b-8c9d0e1f-2a3b4'
+
+
+def make_builder(num_params):
+    builder = UrlParamsBuilder()
+    for i in range(num_params):
+        builder.put_url(f'param{i}', f'value/{i}')
+    return builder
+
+
+def run(quick=False):
+    """Return the seconds per signature of a GET without parameters and of a request with 10 parameters."""
+    n = 2000 if quick else 20000
+    results = {}
+    for name, method, url, num_params in [('get', 'GET', 'https://api.huobi.pro/v1/account/accounts', 0),
+                                          ('post_10_params', 'POST', 'https://api.huobi.pro/v1/order/orders/place',
+                                           10)]:
+        def make_run():
+            builders = [make_builder(num_params) for _ in range(n)]
+            return lambda: [create_signature(API_KEY, SECRET_KEY, method, url, builder) for builder in builders]
+
+        results[f'signature.{name}'] = measure(make_run, n)
+    return results
+
+
+def main():
+    print('============ Signature =============')
+    for name, seconds in run().items():
+        print(f'{name:<28}{seconds * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Time the tick handling of the grid and bollinger tracker strategies against a BacktestTrader.
+
+Usage: python benchmarks/bench_strategies.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure, seed
+from huobi.constant import CandlestickInterval
+from strategy.bollinger_tracker_strategy import BollingerTrackerStrategy
+from strategy.grid_strategy import GridStrategy
+from trader import BacktestTrader
+import utils
+
+
+def make_grid_strategy(price):
+    trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {'ethusdt': price})
+    strategy = GridStrategy(trader, 'ethusdt', 0, 1000, 2500, 3100, 19, enable_logger=False, interval=None)
+    strategy.start(price)
+    return trader, strategy
+
+
+def make_bollinger_tracker_strategy(price):
+    trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {'ethusdt': price})
+    # orders are set at the start only: resetting them expects the order objects of Trader.submit_orders while
+    # BacktestTrader returns order ids, so the ticks measure the streaming bollinger bands
+    strategy = BollingerTrackerStrategy(trader, 'ethusdt', 0, 1000, window_size=10,
+                                        window_type=CandlestickInterval.MIN15, enable_logger=False, interval=None,
+                                        trigger_interval=10 ** 9)
+    strategy.start(price)
+    return trader, strategy
+
+
+def run(quick=False):
+    """Return the seconds per tick, the feed of a price to the trader and then to the strategy."""
+    seed()
+    n = 2000 if quick else 20000
+    prices = utils.brownian_motion(2800, n + 1, 0.1, sigma=5).tolist()
+    results = {}
+    for name, make_strategy in [('grid', make_grid_strategy), ('bollinger_tracker', make_bollinger_tracker_strategy)]:
+        strategies = []
+
+        def make_run():
+            trader, strategy = make_strategy(prices[0])
+            strategies.append(strategy)
+
+            def ticks():
+                for price in prices[1:]:
+                    trader.feed({'ethusdt': price})
+                    strategy.feed(price)
+            return ticks
+
+        results[f'strategy.tick.{name}'] = measure(make_run, n)
+        for strategy in strategies:
+            if isinstance(strategy, BollingerTrackerStrategy):
+                # see make_bollinger_tracker_strategy, stopping would cancel the orders by attribute
+                strategy.buy_orders = strategy.sell_orders = []
+    return results
+
+
+def main():
+    print('============ Strategies =============')
+    for name, seconds in run().items():
+        print(f'{name:<36}{seconds * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main()
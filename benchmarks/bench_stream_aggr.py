@@ -0,0 +1,40 @@
+"""Time the feed of prices into utils.StreamAggr.
+
+Usage: python benchmarks/bench_stream_aggr.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import measure, seed
+import utils
+
+
+def run(quick=False):
+    """Return the seconds per fed price with and without the bollinger metrics, on 15 min and 1 day windows."""
+    seed()
+    n = 10000 if quick else 100000
+    prices = utils.brownian_motion(3000, n, 0.1, sigma=5).tolist()
+    times = np.arange(1630000000, 1630000000 + n).tolist()
+    results = {}
+    for name, window_size, metrics in [('900s', 900, ('bollinger',)), ('86400s', 86400, ('bollinger',)),
+                                       ('900s_no_metrics', 900, None)]:
+        def make_run():
+            aggr = utils.StreamAggr(window_size, metrics=metrics)
+            return lambda: [aggr.feed(timestamp, price) for timestamp, price in zip(times, prices)]
+
+        results[f'stream_aggr.feed.{name}'] = measure(make_run, n)
+    return results
+
+
+def main():
+    print('============ StreamAggr =============')
+    for name, seconds in run().items():
+        print(f'{name:<36}{seconds * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main()
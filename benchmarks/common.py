@@ -0,0 +1,33 @@
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def seed(value=0):
+    """Seed the generators of the payloads and prices, so that every run measures the same inputs."""
+    random.seed(value)
+    np.random.seed(value)
+
+
+def measure(make_run, ops, repeat=3):
+    """Return the best time in seconds per operation over repeat runs.
+
+    make_run -- function preparing the state of a run, untimed, and returning the function timed
+    ops -- number of operations done by the timed function
+    repeat -- number of runs
+    """
+    best = math.inf
+    for _ in range(repeat):
+        run = make_run()
+        start_time = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start_time)
+    return best / ops
@@ -0,0 +1,103 @@
+"""Run the benchmark suite, save the results and compare them with the results of another commit.
+
+Usage: python benchmarks/run_benchmarks.py [--quick] [--only json,parse,...] [--output results.json]
+                                           [--compare baseline.json] [--threshold 0.1]
+
+Every benchmark reports the best time per operation over a few runs on seeded inputs, so results of the same
+machine are comparable across commits. With --compare, the exit status is 1 if a benchmark got slower than the
+baseline by more than the threshold.
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import ROOT_DIR
+
+SUITES = ['json', 'parse', 'signature', 'stream_aggr', 'backtest', 'strategies', 'matching']
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suites(suites=SUITES, quick=False):
+    """Return the seconds per operation of every benchmark of the suites."""
+    results = {}
+    for suite in suites:
+        if suite not in SUITES:
+            raise ValueError(f'Unknown benchmark suite "{suite}", expected one of {SUITES}')
+        module = importlib.import_module(f'benchmarks.bench_{suite}')
+        results.update(module.run(quick=quick))
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """Return the (name, baseline seconds, seconds, ratio) of the benchmarks of both, and the names of the regressed.
+
+    results -- seconds per operation of every benchmark
+    baseline -- seconds per operation of every benchmark on the commit compared with
+    threshold -- slowdown ratio above which a benchmark regressed, e.g. 0.1 for 10% slower
+    """
+    rows = []
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        rows.append((name, baseline[name], seconds, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the benchmarks of the hot paths.')
+    parser.add_argument('--quick', action='store_true', help='run on smaller inputs, e.g. as a smoke test')
+    parser.add_argument('--only', help='comma separated suites to run, among ' + ', '.join(SUITES))
+    parser.add_argument('--output', help='JSON file to save the results to')
+    parser.add_argument('--compare', help='JSON file of results saved by --output to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    suites = args.only.split(',') if args.only else SUITES
+    results = run_suites(suites, quick=args.quick)
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'quick': args.quick,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    print(f'============ Benchmarks at {report["commit"]} =============')
+    for name, seconds in results.items():
+        print(f'{name:<40}{seconds * 1e6:12.3f} us')
+    if not args.compare:
+        return 0
+    with open(args.compare) as file:
+        baseline = json.load(file)
+    rows, regressions = compare(results, baseline['results'], args.threshold)
+    print(f'============ Compared with {baseline.get("commit")} =============')
+    for name, baseline_seconds, seconds, ratio in rows:
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f'{name:<40}{baseline_seconds * 1e6:12.3f} us {seconds * 1e6:12.3f} us  x{ratio:.2f}{flag}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
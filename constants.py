@@ -1,12 +1,139 @@
+import json
+import os
+import time
+
+__all__ = ['TransactionPair', 'SymbolRegistry', 'transaction_pairs', 'MAX_ORDER_NUM', 'MAX_CANCEL_ORDER_NUM']
+
+
 class TransactionPair(object):
-    def __init__(self, price_scale, amount_scale, target, base):
+    def __init__(self, price_scale, amount_scale, target, base, min_order_value=0.0, min_order_amount=0.0,
+                 max_order_amount=None, state='online'):
         self.price_scale = price_scale
         self.amount_scale = amount_scale
         self.target = target
         self.base = base
+        self.min_order_value = min_order_value
+        self.min_order_amount = min_order_amount
+        self.max_order_amount = max_order_amount
+        self.state = state
+        self.price_step = 10 ** -price_scale
+        self.amount_step = 10 ** -amount_scale
+        # Precomputed once per pair: the number of steps in a unit and the format of the scale
+        self.price_factor = 10 ** price_scale
+        self.amount_factor = 10 ** amount_scale
+        self.price_format = f'%.{price_scale}f'
+        self.amount_format = f'%.{amount_scale}f'
+
+    def quantize_price(self, price):
+        """Round a price to the nearest multiple of price_step."""
+        return round(price * self.price_factor) / self.price_factor
+
+    def quantize_amount(self, amount):
+        """Round an amount to the nearest multiple of amount_step."""
+        return round(amount * self.amount_factor) / self.amount_factor
+
+    def format_price(self, price):
+        # quantized first, so that e.g. 2000.455 rounds by its value and not by its binary representation
+        return self.price_format % self.quantize_price(price)
+
+    def format_amount(self, amount):
+        return self.amount_format % self.quantize_amount(amount)
+
+    def check_order(self, price, amount):
+        """Raise ValueError if a limit order is below the min order amount or value of the pair."""
+        amount = self.quantize_amount(amount)
+        if amount < self.min_order_amount:
+            raise ValueError(f'Order amount {amount} is below the min order amount {self.min_order_amount}')
+        self.check_order_value(self.quantize_price(price) * amount)
+
+    def check_order_value(self, value):
+        """Raise ValueError if an order value, in the base currency, is below the min order value of the pair."""
+        if value < self.min_order_value:
+            raise ValueError(f'Order value {value} is below the min order value {self.min_order_value}')
+
+    @classmethod
+    def from_symbol(cls, symbol):
+        """Create the pair of a huobi.model.generic.Symbol from GenericClient.get_exchange_symbols."""
+        max_order_amount = float(symbol.limit_order_max_order_amt or symbol.max_order_amt or 0)
+        return cls(int(symbol.price_precision), int(symbol.amount_precision), symbol.base_currency,
+                   symbol.quote_currency, min_order_value=float(symbol.min_order_value or 0),
+                   min_order_amount=float(symbol.limit_order_min_order_amt or symbol.min_order_amt or 0),
+                   max_order_amount=max_order_amount or None, state=symbol.state)
+
+    def to_dict(self):
+        return {'price_scale': self.price_scale, 'amount_scale': self.amount_scale, 'target': self.target,
+                'base': self.base, 'min_order_value': self.min_order_value,
+                'min_order_amount': self.min_order_amount, 'max_order_amount': self.max_order_amount,
+                'state': self.state}
+
+
+class SymbolRegistry(dict):
+    def __init__(self, pairs=None, cache_path=None, ttl=24 * 3600, retry_after=60):
+        """Dict of symbol to TransactionPair that loads the pairs it doesn't know from the exchange.
+
+        The pairs of every symbol are fetched with GenericClient.get_exchange_symbols on the first lookup of an
+        unknown symbol and cached in a JSON file for ttl seconds, so only the first process after the cache
+        expires pays the request. Lookups of known symbols are plain dict lookups.
+
+        pairs -- pairs known without a request, overwritten by the pairs of the exchange when they are loaded
+        cache_path -- JSON file the loaded pairs are cached in; not cached if None
+        retry_after -- seconds after a failed load before an unknown symbol triggers another one
+        """
+        super().__init__(pairs or {})
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.loaded_at = None
+        self.failed_at = None
+
+    def __missing__(self, symbol):
+        now = time.time()
+        expired = self.loaded_at is None or now - self.loaded_at > self.ttl
+        if expired and (self.failed_at is None or now - self.failed_at > self.retry_after):
+            try:
+                self.load()
+            except Exception as e:
+                raise KeyError(f'Unknown symbol "{symbol}", failed to load the symbols of the exchange: {e}') from e
+        if symbol not in self:
+            raise KeyError(f'Unknown symbol "{symbol}"')
+        return dict.__getitem__(self, symbol)
+
+    def load(self, force=False):
+        """Load the pairs from the cache file if it is fresh, or else from the exchange."""
+        if not force and self.load_cache():
+            return
+        try:
+            from huobi.client.generic import GenericClient
+            symbols = GenericClient().get_exchange_symbols()
+        except Exception:
+            self.failed_at = time.time()
+            raise
+        self.update({symbol.symbol: TransactionPair.from_symbol(symbol) for symbol in symbols})
+        self.loaded_at = time.time()
+        self.save_cache()
+
+    def load_cache(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return False
+        with open(self.cache_path) as file:
+            cache = json.load(file)
+        if time.time() - cache['loaded_at'] > self.ttl:
+            return False
+        self.update({symbol: TransactionPair(**pair) for symbol, pair in cache['pairs'].items()})
+        self.loaded_at = cache['loaded_at']
+        return True
+
+    def save_cache(self):
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(self.cache_path + '.tmp', 'w') as file:
+            json.dump({'loaded_at': self.loaded_at,
+                       'pairs': {symbol: pair.to_dict() for symbol, pair in self.items()}}, file)
+        os.replace(self.cache_path + '.tmp', self.cache_path)
 
 
-transaction_pairs = {
+transaction_pairs = SymbolRegistry({
     'ethusdt': TransactionPair(2, 4, 'eth', 'usdt'),
     'btcusdt': TransactionPair(2, 6, 'btc', 'usdt'),
     'eth3susdt': TransactionPair(8, 4, 'eth3s', 'usdt'),
@@ -18,8 +145,8 @@ transaction_pairs = {
     'linkusdt': TransactionPair(4, 2, 'link', 'usdt'),
     'link3susdt': TransactionPair(8, 4, 'link3s', 'usdt'),
     'ethbtc': TransactionPair(6, 4, 'eth', 'btc')
-}
+}, cache_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'symbols.json'))
 
 
 MAX_ORDER_NUM = 10
-MAX_CANCEL_ORDER_NUM = 50
\ No newline at end of file
+MAX_CANCEL_ORDER_NUM = 50
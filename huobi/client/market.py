@@ -162,7 +162,7 @@ class MarketClient(object):
             example: def error_handler(exception: 'HuobiApiException')
                         pass
 
-        :return:  No return
+        :return: Subscriber
         """
         symbol_list = symbols.split(",")
         check_symbol_list(symbol_list)
@@ -175,7 +175,7 @@ class MarketClient(object):
         }
 
         from huobi.service.market.sub_pricedepth import SubPriceDepthService
-        SubPriceDepthService(params).subscribe(callback, error_handler, **self.__kwargs)
+        return SubPriceDepthService(params).subscribe(callback, error_handler, **self.__kwargs)
 
     def sub_pricedepth_bbo(self, symbols: 'str', callback, error_handler=None):
         """
@@ -343,7 +343,7 @@ class MarketClient(object):
         :param error_handler: The error handler will be called if subscription failed or error happen between client and Huobi server
             example: def error_handler(exception: 'HuobiApiException')
                         pass
-        :return:  No return
+        :return: Subscriber
         """
         symbol_list = symbols.split(",")
         check_symbol_list(symbol_list)
@@ -354,7 +354,7 @@ class MarketClient(object):
         }
 
         from huobi.service.market.sub_trade_detail import SubTradeDetailService
-        SubTradeDetailService(params).subscribe(callback, error_handler, **self.__kwargs)
+        return SubTradeDetailService(params).subscribe(callback, error_handler, **self.__kwargs)
 
     def req_trade_detail(self, symbols: 'str', callback, error_handler=None):
         """
@@ -0,0 +1,145 @@
+import logging
+import threading
+import weakref
+from collections import deque, OrderedDict
+
+from huobi.constant.system import CallbackQueuePolicy
+from huobi.exception.huobi_api_exception import HuobiApiException
+
+# the live queues, reported by get_callback_queue_stats
+callback_queues = weakref.WeakSet()
+
+
+def get_channel_key(update):
+    """
+    Conflation key of the subscription events, their channel like "market.btcusdt.bbo".
+    """
+    return getattr(update, "ch", None)
+
+
+class CallbackQueue(object):
+
+    def __init__(self, callback, policy=CallbackQueuePolicy.BLOCK, max_size=1024, key=get_channel_key,
+                 error_handler=None, name=None):
+        """
+        Bounded queue between the thread receiving the updates of a subscription and its callback.
+        The callback runs on a dispatcher thread of the queue, so that a slow callback doesn't stall the socket.
+        :param callback: function(update, *args) called with the queued updates and the args they were put with,
+                         in order.
+        :param policy: CallbackQueuePolicy applied when the queue is full; with CONFLATE a queued update is
+                       replaced by a newer one of the same key, and the oldest key is dropped when the queue is full.
+        :param max_size: max number of queued updates.
+        :param key: function(update) returning the conflation key, the channel of the event by default.
+        :param error_handler: function(HuobiApiException) called if the callback raises.
+        :param name: name of the queue in the stats and of its thread.
+        """
+        if policy not in [CallbackQueuePolicy.BLOCK, CallbackQueuePolicy.DROP_OLDEST, CallbackQueuePolicy.CONFLATE]:
+            raise HuobiApiException(HuobiApiException.INPUT_ERROR, "[Input] " + str(policy) + " is invalid policy")
+        if max_size < 1:
+            raise HuobiApiException(HuobiApiException.INPUT_ERROR, "[Input] max_size should be greater than 0")
+        self.callback = callback
+        self.policy = policy
+        self.max_size = max_size
+        self.key = key
+        self.error_handler = error_handler
+        self.name = name if name is not None else "callback-queue-" + str(id(self))
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_depth = 0
+        self.logger = logging.getLogger("huobi-client")
+        self.__conflating = policy == CallbackQueuePolicy.CONFLATE
+        self.__items = OrderedDict() if self.__conflating else deque()
+        self.__closed = False
+        self.__lock = threading.Lock()
+        self.__not_empty = threading.Condition(self.__lock)
+        self.__not_full = threading.Condition(self.__lock)
+        self.__thread = threading.Thread(target=self.__dispatch, name=self.name, daemon=True)
+        self.__thread.start()
+        callback_queues.add(self)
+
+    @property
+    def depth(self):
+        return len(self.__items)
+
+    def put(self, update, *args):
+        """
+        Queue an update, return False if the queue is closed.
+        """
+        with self.__lock:
+            if self.__closed:
+                return False
+            items = self.__items
+            if self.__conflating:
+                key = self.key(update)
+                if key in items:
+                    items[key] = (update, args)
+                    self.conflated += 1
+                    return True
+                if len(items) >= self.max_size:
+                    items.popitem(last=False)
+                    self.dropped += 1
+                items[key] = (update, args)
+            else:
+                if len(items) >= self.max_size:
+                    if self.policy == CallbackQueuePolicy.BLOCK:
+                        while len(items) >= self.max_size and not self.__closed:
+                            self.__not_full.wait()
+                        if self.__closed:
+                            return False
+                    else:
+                        items.popleft()
+                        self.dropped += 1
+                items.append((update, args))
+            if len(items) > self.max_depth:
+                self.max_depth = len(items)
+            self.__not_empty.notify()
+        return True
+
+    def __dispatch(self):
+        while True:
+            with self.__lock:
+                while not self.__items and not self.__closed:
+                    self.__not_empty.wait()
+                if not self.__items:
+                    return
+                update, args = self.__items.popitem(last=False)[1] if self.__conflating else self.__items.popleft()
+                self.__not_full.notify()
+            try:
+                self.callback(update, *args)
+            except Exception as e:
+                self.failed += 1
+                message = "Process error: " + str(e) + " You should capture the exception in your error handler"
+                self.logger.error("[" + self.name + "] " + message)
+                if self.error_handler is not None:
+                    # the dispatcher must survive the handler, or the queue stops and put() blocks forever
+                    try:
+                        self.error_handler(HuobiApiException(HuobiApiException.SUBSCRIPTION_ERROR, message))
+                    except Exception as handler_error:
+                        self.logger.error("[" + self.name + "] Error handler error: " + str(handler_error))
+            else:
+                self.delivered += 1
+
+    def close(self, timeout=None):
+        """
+        Stop accepting updates and wait for the queued ones to be delivered.
+        """
+        with self.__lock:
+            self.__closed = True
+            self.__not_empty.notify_all()
+            self.__not_full.notify_all()
+        if self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+        callback_queues.discard(self)
+
+    def stats(self):
+        return {"depth": self.depth, "max_depth": self.max_depth, "delivered": self.delivered,
+                "failed": self.failed, "dropped": self.dropped, "conflated": self.conflated}
+
+
+def get_callback_queue_stats():
+    """
+    Return the stats of every live callback queue by name.
+    """
+    return {queue.name: queue.stats() for queue in list(callback_queues)}
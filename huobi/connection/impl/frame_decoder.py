@@ -0,0 +1,32 @@
+import zlib
+
+from huobi.utils.json_backend import json_loads
+
+"""
+wbits of zlib to read the gzip header and trailer of a frame.
+"""
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class GzipFrameDecoder(object):
+
+    def __init__(self, initial_bufsize=1024, max_bufsize=1 << 20):
+        """
+        Decoder of the gzipped JSON frames of one websocket connection.
+        Each frame is a complete gzip member, so it's inflated with a single zlib call instead of gzip.decompress,
+        which parses the header in Python and creates a decompress object per frame. The output buffer starts at
+        the size of the largest frame of the connection so far, so that it isn't grown while inflating.
+        :param initial_bufsize: output buffer size of the first frame.
+        :param max_bufsize: bound of the output buffer size.
+        """
+        self.bufsize = initial_bufsize
+        self.max_bufsize = max_bufsize
+
+    def decompress(self, message):
+        data = zlib.decompress(message, GZIP_WBITS, self.bufsize)
+        if len(data) > self.bufsize and self.bufsize < self.max_bufsize:
+            self.bufsize = min(1 << (len(data) - 1).bit_length(), self.max_bufsize)
+        return data
+
+    def decode(self, message):
+        return json_loads(self.decompress(message))
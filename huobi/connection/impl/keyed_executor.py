@@ -0,0 +1,120 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from huobi.constant.system import CallbackQueuePolicy
+from huobi.exception.huobi_api_exception import HuobiApiException
+
+
+class KeyedExecutor(object):
+
+    def __init__(self, num_workers=4, batch_size=64, name="callback-executor", policy=CallbackQueuePolicy.BLOCK,
+                 max_size=1024):
+        """
+        Thread pool running the tasks of the same key in submission order, and tasks of different keys in parallel.
+        Each key has its own bounded queue that at most one worker drains at a time, so a slow key holds one worker
+        and delays only its own tasks. A worker hands a busy key back to the pool after batch_size tasks, so that
+        the other keys get a turn.
+        :param num_workers: number of threads.
+        :param batch_size: max number of tasks of a key run before the worker moves on to other keys.
+        :param name: prefix of the thread names.
+        :param policy: CallbackQueuePolicy applied when the queue of a key is full; with BLOCK the submitting thread
+                       waits, so a task must not submit to its own key, and with CONFLATE only the newest queued task
+                       of a key is kept.
+        :param max_size: max number of queued tasks of a key.
+        """
+        if policy not in [CallbackQueuePolicy.BLOCK, CallbackQueuePolicy.DROP_OLDEST, CallbackQueuePolicy.CONFLATE]:
+            raise HuobiApiException(HuobiApiException.INPUT_ERROR, "[Input] " + str(policy) + " is invalid policy")
+        if max_size < 1:
+            raise HuobiApiException(HuobiApiException.INPUT_ERROR, "[Input] max_size should be greater than 0")
+        self.batch_size = batch_size
+        self.policy = policy
+        self.max_size = 1 if policy == CallbackQueuePolicy.CONFLATE else max_size
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.logger = logging.getLogger("huobi-client")
+        self.__pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix=name)
+        self.__queues = dict()
+        self.__closed = False
+        self.__lock = threading.Lock()
+        self.__not_full = threading.Condition(self.__lock)
+        self.__idle = threading.Condition(self.__lock)
+
+    def submit(self, key, fn, *args):
+        """
+        Run fn(*args) after the tasks submitted before with the same key, return False if the executor is shut down.
+        """
+        with self.__lock:
+            if self.__closed:
+                return False
+            queue = self.__queues.get(key)
+            if queue is not None and len(queue) >= self.max_size:
+                if self.policy == CallbackQueuePolicy.BLOCK:
+                    while len(queue) >= self.max_size and not self.__closed:
+                        self.__not_full.wait()
+                    if self.__closed:
+                        return False
+                    # a drained key is removed, so a new queue may have replaced the one waited on
+                    queue = self.__queues.get(key)
+                elif self.policy == CallbackQueuePolicy.CONFLATE:
+                    queue.popleft()
+                    self.conflated += 1
+                else:
+                    queue.popleft()
+                    self.dropped += 1
+            self.submitted += 1
+            if queue is not None:
+                queue.append((fn, args))
+                return True
+            self.__queues[key] = deque([(fn, args)])
+            self.__pool.submit(self.__drain, key)
+        return True
+
+    def __drain(self, key):
+        while True:
+            for _ in range(self.batch_size):
+                with self.__lock:
+                    queue = self.__queues[key]
+                    if not queue:
+                        del self.__queues[key]
+                        if not self.__queues:
+                            self.__idle.notify_all()
+                        self.__not_full.notify_all()
+                        return
+                    fn, args = queue.popleft()
+                    self.__not_full.notify_all()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self.logger.error("[KeyedExecutor] Task of " + str(key) + " failed: " + str(e))
+                with self.__lock:
+                    self.completed += 1
+            with self.__lock:
+                # once shut down the pool takes no task, so the worker keeps draining the key itself
+                if not self.__closed:
+                    self.__pool.submit(self.__drain, key)
+                    return
+
+    @property
+    def pending(self):
+        with self.__lock:
+            return sum(len(queue) for queue in self.__queues.values())
+
+    def stats(self):
+        return {"pending": self.pending, "submitted": self.submitted, "completed": self.completed,
+                "dropped": self.dropped, "conflated": self.conflated}
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting tasks and stop the threads once the queued tasks have run, waiting for them if wait is True.
+        """
+        with self.__lock:
+            self.__closed = True
+            self.__not_full.notify_all()
+            if wait:
+                while self.__queues:
+                    self.__idle.wait()
+        self.__pool.shutdown(wait=wait)
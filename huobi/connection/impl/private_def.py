@@ -8,4 +8,5 @@ class ConnectionState:
     CLOSED = 4
 
 CONNECT_HEART_BEAT_LIMIT_MS = 60000   # max interval between two package
-RECONNECT_AFTER_TIME_MS = 63000         # if not need connect immediately, it will enter delay connect status and will connect after setting times
\ No newline at end of file
+RECONNECT_INITIAL_DELAY_MS = 50         # delay of the first reconnect attempt after a connection is lost
+RECONNECT_MAX_DELAY_MS = 30000          # the delay doubles on each failed attempt up to this bound
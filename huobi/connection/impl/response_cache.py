@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+"""
+Time to live in seconds of the responses of the endpoints whose data rarely changes.
+"""
+DEFAULT_TTLS = {
+    "/v1/common/symbols": 600,
+    "/v1/common/currencys": 600,
+    "/v2/reference/currencies": 600,
+    "/v1/account/accounts": 3600,
+    "/v2/reference/transact-fee-rate": 300,
+    "/v1/fee/fee-rate/get": 300,
+    "/v2/account/withdraw/quota": 60,
+}
+
+"""
+Endpoints whose cached responses are dropped after a request to the key endpoint succeeds.
+"""
+DEFAULT_INVALIDATIONS = {
+    "/v1/dw/withdraw/api/create": ["/v2/account/withdraw/quota"],
+}
+
+
+class ResponseCache(object):
+
+    def __init__(self, ttls=None, max_size=256, invalidations=None):
+        """
+        LRU cache of parsed REST responses, expiring per endpoint.
+        The cached objects are returned as is to every caller, so they must not be modified.
+        :param ttls: dict of URL path to the seconds its responses are kept; paths not in it aren't cached.
+        :param max_size: max number of cached responses, the least recently used one is evicted beyond it.
+        :param invalidations: dict of URL path to the paths whose responses a request to it invalidates.
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_size = max_size
+        self.invalidations = dict(DEFAULT_INVALIDATIONS if invalidations is None else invalidations)
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get_ttl(self, url):
+        return self.ttls.get(url, 0)
+
+    @staticmethod
+    def make_key(method, host, url, params, api_key):
+        return method, host, url, tuple(sorted((params or {}).items())), api_key
+
+    def get(self, key):
+        """
+        Return the cached response of the key, or None if it isn't cached or has expired.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self.__entries[key]
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl):
+        if value is None or ttl <= 0:
+            return
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, url=None):
+        """
+        Drop the cached responses of the URL path, or all of them if url is None.
+        """
+        with self.__lock:
+            if url is None:
+                self.__entries.clear()
+                return
+            for key in [key for key in self.__entries if key[2] == url]:
+                del self.__entries[key]
+
+    def on_request(self, url):
+        for invalidated_url in self.invalidations.get(url, []):
+            self.invalidate(invalidated_url)
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+"""
+The cache shared by every client that isn't given its own.
+"""
+default_response_cache = ResponseCache()
@@ -1,14 +1,19 @@
+import random
 import threading
+import time
 import websocket
-import gzip
 import ssl
 import logging
 import urllib.parse
 
 from huobi.constant import *
 from huobi.utils import *
+from huobi.utils.json_backend import json_loads
+from huobi.utils.metrics import metrics_registry
 from huobi.exception.huobi_api_exception import HuobiApiException
-from huobi.connection.impl.private_def import ConnectionState
+from huobi.connection.impl.private_def import ConnectionState, RECONNECT_INITIAL_DELAY_MS, RECONNECT_MAX_DELAY_MS
+from huobi.connection.impl.websocket_request import ConnectionGapEvent
+from huobi.connection.impl.frame_decoder import GzipFrameDecoder
 
 # Key: original_connection, Value: connection
 websocket_connection_handler = dict()
@@ -25,9 +30,10 @@ def on_error(original_connection, error):
     websocket_connection.on_failure(error)
 
 
-def on_close(original_connection):
-    websocket_connection = websocket_connection_handler[original_connection]
-    websocket_connection.on_close()
+def on_close(original_connection, *args):
+    websocket_connection = websocket_connection_handler.get(original_connection)
+    if websocket_connection is not None:
+        websocket_connection.on_close(original_connection)
 
 
 def on_open(original_connection):
@@ -37,28 +43,38 @@ def on_open(original_connection):
 
 connection_id = 0
 
+ws_messages = metrics_registry.counter("huobi_ws_messages_total", "Messages received by the websocket connections",
+                                       ["endpoint"])
+ws_received_bytes = metrics_registry.counter("huobi_ws_received_bytes_total",
+                                             "Bytes of the messages received by the websocket connections",
+                                             ["endpoint"])
+ws_reconnects = metrics_registry.counter("huobi_ws_reconnects_total", "Reconnect attempts of the websocket connections",
+                                         ["endpoint"])
+
+MARKET_PING_PREFIX = b"{\"ping\":"
+
 
 def websocket_func(*args):
     try:
         websocket_manage = args[0]
-        websocket_manage.original_connection = websocket.WebSocketApp(websocket_manage.url,
-                                                        on_message=on_message,
-                                                        on_error=on_error,
-                                                        on_close=on_close)
+        original_connection = websocket.WebSocketApp(websocket_manage.url,
+                                                     on_message=on_message,
+                                                     on_error=on_error,
+                                                     on_close=on_close)
+        websocket_manage.original_connection = original_connection
         global websocket_connection_handler
-        websocket_connection_handler[websocket_manage.original_connection] = websocket_manage
+        websocket_connection_handler[original_connection] = websocket_manage
         websocket_manage.logger.info("[Sub][" + str(websocket_manage.id) + "] Connecting...")
-        websocket_manage.original_connection.on_open = on_open
-        websocket_manage.original_connection.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+        original_connection.on_open = on_open
+        original_connection.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
         websocket_manage.logger.info("[Sub][" + str(websocket_manage.id) + "] Connection event loop down")
-        if websocket_manage.state == ConnectionState.CONNECTED:
-            websocket_manage.state = ConnectionState.IDLE
+        websocket_manage.on_close(original_connection)
     except Exception as ex:
         print(ex)
 
 class WebsocketManage:
 
-    def __init__(self, api_key, secret_key, uri, request):
+    def __init__(self, api_key, secret_key, uri, request, recorder=None):
         self.__thread = None
         self.__market_url = HUOBI_WEBSOCKET_URI_PRO + "/ws"
         self.__trading_url = HUOBI_WEBSOCKET_URI_PRO + "/ws/" + request.api_version
@@ -66,7 +82,23 @@ class WebsocketManage:
         self.__api_key = api_key
         self.__secret_key = secret_key
         self.request = request
+        self.recorder = recorder
+        self.frame_decoder = GzipFrameDecoder()
+        self.callback_queue = None
+        self.callback_executor = None
+        self.callback_key = None
+        self.latency_monitor = None
+        self.watch_dog = None
+        self.received_at_us = None
+        # Key: channel, Value: handler of its frames
+        self.__routes = dict()
+        # checked in order on the other frames, the first key present picks the handler
+        self.__control_routes = [("op", self.__on_op), ("action", self.__on_action), ("rep", self.__on_rep),
+                                 ("ping", self.__on_ping)]
         self.reconnect_at = 0
+        self.reconnect_attempts = 0
+        self.disconnected_at = None
+        self.__reconnect_lock = threading.Lock()
         self.original_connection = None
         self.last_receive_time = 0
         self.logger = logging.getLogger("huobi-client")
@@ -74,15 +106,18 @@ class WebsocketManage:
         global connection_id
         connection_id += 1
         self.id = connection_id
-        host = urllib.parse.urlparse(uri).hostname
+        parsed_uri = urllib.parse.urlparse(uri)
+        host = parsed_uri.hostname
+        # a plain ws:// uri, like a local mock exchange, keeps its scheme and port
+        base_url = "ws://" + parsed_uri.netloc if parsed_uri.scheme == "ws" else "wss://" + host
         if host.find("api") == 0:
-            self.__market_url = "wss://" + host + "/ws"
-            self.__mbp_feed_url = "wss://" + host + "/feed"
-            self.__trading_url = "wss://" + host + "/ws/" + request.api_version
+            self.__market_url = base_url + "/ws"
+            self.__mbp_feed_url = base_url + "/feed"
+            self.__trading_url = base_url + "/ws/" + request.api_version
         else:
-            self.__market_url = "wss://" + host + "/api/ws"
-            self.__mbp_feed_url = "wss://" + host + "/feed"
-            self.__trading_url = "wss://" + host + "/ws/" + request.api_version
+            self.__market_url = base_url + "/api/ws"
+            self.__mbp_feed_url = base_url + "/feed"
+            self.__trading_url = base_url + "/ws/" + request.api_version
 
         if request.is_trading:
             self.url = self.__trading_url
@@ -90,19 +125,47 @@ class WebsocketManage:
             self.url = self.__mbp_feed_url
         else:
             self.url = self.__market_url
+        # labelled by the path of the url, not the connection, as every request socket is a new connection
+        endpoint = urllib.parse.urlparse(self.url).path
+        self.__messages_metric = ws_messages.labels(endpoint)
+        self.__received_bytes_metric = ws_received_bytes.labels(endpoint)
+        self.__reconnects_metric = ws_reconnects.labels(endpoint)
+
+    def next_reconnect_delay(self):
+        """
+        Return the delay in ms of the next reconnect attempt, doubling after each attempt since the last message
+        received, with jitter so that connections lost together don't reconnect at once.
+        """
+        delay = min(RECONNECT_INITIAL_DELAY_MS * 2 ** min(self.reconnect_attempts, 30), RECONNECT_MAX_DELAY_MS)
+        return int(delay / 2 + random.uniform(0, delay / 2))
 
     def close_and_wait_reconnect(self, delay_in_ms):
-        if self.original_connection is not None:
-            self.original_connection.close()
-            self.original_connection = None
+        with self.__reconnect_lock:
+            if self.state == ConnectionState.WAIT_RECONNECT or self.state == ConnectionState.CLOSED:
+                return
+            # set before closing, so that the close event of the connection doesn't schedule another reconnect
             self.state = ConnectionState.WAIT_RECONNECT
-            self.reconnect_at =  + delay_in_ms
-        self.logger.warning("[Sub][%d] Lost connectiong for %d ms, will try reconnecting " % (self.id, self.reconnect_at))
+            if self.disconnected_at is None:
+                self.disconnected_at = self.last_receive_time
+            self.reconnect_at = get_current_timestamp() + delay_in_ms
+            original_connection = self.original_connection
+            self.original_connection = None
+        if original_connection is not None:
+            original_connection.close()
+        self.logger.warning("[Sub][%d] Lost connection, will try reconnecting in %d ms" % (self.id, delay_in_ms))
+        timer = threading.Timer(delay_in_ms / 1000.0, self.re_connect)
+        timer.daemon = True
+        timer.start()
 
     def re_connect(self):
-        if get_current_timestamp() > self.reconnect_at:
-            self.logger.info("[Sub][%d] Reconnecting ... " % self.id)
-            self.connect()
+        with self.__reconnect_lock:
+            if self.state != ConnectionState.WAIT_RECONNECT or get_current_timestamp() < self.reconnect_at:
+                return
+            self.state = ConnectionState.IDLE
+            self.reconnect_attempts += 1
+        self.__reconnects_metric.inc()
+        self.logger.info("[Sub][%d] Reconnecting ... " % self.id)
+        self.connect()
 
     def connect(self):
         if self.state == ConnectionState.CONNECTED:
@@ -116,9 +179,11 @@ class WebsocketManage:
         self.original_connection.send(data)
 
     def close(self):
-        self.original_connection.close()
-        del websocket_connection_handler[self.original_connection]
         self.state = ConnectionState.CLOSED
+        if self.callback_queue is not None:
+            self.callback_queue.close(timeout=0)
+        self.original_connection.close()
+        websocket_connection_handler.pop(self.original_connection, None)
         self.logger.info("[Sub][" + str(self.id) + "] Closing normally")
 
     def on_open(self, original_connection):
@@ -126,6 +191,8 @@ class WebsocketManage:
         self.original_connection = original_connection
         self.last_receive_time = get_current_timestamp()
         self.state = ConnectionState.CONNECTED
+        if self.disconnected_at is not None:
+            self.on_gap()
         if self.request.is_trading:
             try:
                 if self.request.api_version == ApiVersion.VERSION_V1:
@@ -149,6 +216,32 @@ class WebsocketManage:
                 self.request.subscription_handler(self)
         return
 
+    def on_close(self, original_connection):
+        # a connection closed by the server, lost or failing to open is reconnected, unless it was closed by the
+        # client, is a stale one already replaced or the watchdog it was created on doesn't auto connect
+        if original_connection is not self.original_connection or self.request.auto_close:
+            return
+        if self.watch_dog is None or self.watch_dog.is_auto_connect:
+            self.close_and_wait_reconnect(self.next_reconnect_delay())
+        elif self.state == ConnectionState.CONNECTED:
+            self.state = ConnectionState.IDLE
+
+    def on_gap(self):
+        gap_event = ConnectionGapEvent()
+        gap_event.connection_id = self.id
+        gap_event.last_receive_time = self.disconnected_at
+        gap_event.reconnect_time = self.last_receive_time
+        gap_event.attempts = self.reconnect_attempts
+        self.disconnected_at = None
+        self.logger.warning("[Sub][%d] Missed the messages of %d ms" % (self.id, self.last_receive_time
+                                                                         - gap_event.last_receive_time))
+        try:
+            if self.request.gap_handler is not None:
+                self.request.gap_handler(gap_event)
+        except Exception as e:
+            self.on_error("Process error: " + str(e)
+                     + " You should capture the exception in your error handler")
+
     def on_error(self, error_message):
         if self.request.error_handler is not None:
             exception = HuobiApiException(HuobiApiException.SUBSCRIPTION_ERROR, error_message)
@@ -161,80 +254,91 @@ class WebsocketManage:
 
     def on_message(self, message):
         self.last_receive_time = get_current_timestamp()
+        if self.latency_monitor is not None:
+            self.received_at_us = time.time_ns() // 1000
+        if self.reconnect_attempts:
+            self.reconnect_attempts = 0
+        self.__messages_metric.inc()
+        self.__received_bytes_metric.inc(len(message))
+        if self.recorder is not None:
+            self.recorder.record(self.id, message)
         if isinstance(message, (str)): # V2
-            # print("RX string : ", message)
-            dict_data = json.loads(message)
+            data = message
         elif isinstance(message, (bytes)): # V1
-            # print("RX bytes: " + gzip.decompress(message).decode("utf-8"))
-            dict_data = json.loads(gzip.decompress(message).decode("utf-8"))
+            data = self.frame_decoder.decompress(message)
         else:
             print("RX unknow type : ", type(message))
             return
 
-        status_outer = dict_data.get("status", "")
-        err_code_outer = dict_data.get("err-code", 0)
-        op_outer = dict_data.get("op", "")
-        action_outer = dict_data.get("action", "")
-        ch_outer = dict_data.get("ch", "")
-        rep_outer = dict_data.get("rep", "")
-        ping_market_outer = int(dict_data.get("ping", 0))
-        if status_outer and len(status_outer) and status_outer != "ok":
-            error_code = dict_data.get("err-code", "Unknown error")
-            error_msg = dict_data.get("err-msg", "Unknown error")
-            self.on_error(error_code + ": " + error_msg)
-        elif err_code_outer and int(err_code_outer) != 0:
+        # pings are answered before parsing the frame as JSON
+        if data[:8] == MARKET_PING_PREFIX and data[-1:] == b"}" and data[8:-1].isdigit():
+            self.__process_ping_on_market_line(int(data[8:-1]))
+            return
+        dict_data = json_loads(data)
+
+        # market data and V2 pushes go straight to the handler of their channel
+        ch = dict_data.get("ch")
+        if ch is not None and dict_data.get("action", "push") == "push":
+            if self.latency_monitor is not None and "ts" in dict_data:
+                self.latency_monitor.record_feed(ch, dict_data["ts"], self.received_at_us)
+            handler = self.__routes.get(ch)
+            if handler is None:
+                handler = self.__routes[ch] = self.__on_push if "action" in dict_data else self.__on_receive
+            handler(dict_data)
+            return
+
+        status = dict_data.get("status")
+        err_code = dict_data.get("err-code")
+        if (status and status != "ok") or (err_code and int(err_code) != 0):
             error_code = dict_data.get("err-code", "Unknown error")
             error_msg = dict_data.get("err-msg", "Unknown error")
             self.on_error(error_code + ": " + error_msg)
-        elif op_outer and len(op_outer): # for V1
-            if op_outer == "notify":
-                self.__on_receive(dict_data)
-            elif op_outer == "ping":
-                #print("******** receive trade ping pong ********", dict_data)
-                ping_ts = dict_data.get("ts", 0)
-                self.__process_ping_on_trading_line(ping_ts)
-            elif op_outer == "auth":
+            return
+        for key, handler in self.__control_routes:
+            value = dict_data.get(key)
+            if value:
+                handler(dict_data, value)
+                return
+        #print("unknown data process, RX: ", data)
+
+    def __on_op(self, dict_data, op): # for V1
+        if op == "notify" or op == "req":
+            self.__on_receive(dict_data)
+        elif op == "ping":
+            self.__process_ping_on_trading_line(dict_data.get("ts", 0))
+        elif op == "auth":
+            if self.request.subscription_handler is not None:
+                self.request.subscription_handler(self)
+
+    def __on_action(self, dict_data, action): # for V2
+        if action == "ping":
+            self.__process_ping_on_v2_trade(dict_data.get("data").get("ts"))
+        elif action == "sub":
+            if dict_data.get("code", -1) == 200:
+                logging.info("subscribe ACK received")
+            else:
+                logging.error("receive error data : " + str(dict_data))
+        elif action == "req":
+            if dict_data.get("code", -1) == 200:
+                logging.info("signature ACK received")
                 if self.request.subscription_handler is not None:
                     self.request.subscription_handler(self)
-            elif op_outer == "req":
-                self.__on_receive(dict_data)
-        elif action_outer and len(action_outer):  # for V2
-            if action_outer == "ping":
-                action_data = dict_data.get("data")
-                ping_ts = action_data.get("ts")
-                self.__process_ping_on_v2_trade(ping_ts)
-            elif action_outer == "sub":
-                action_code = dict_data.get("code", -1)
-                if action_code == 200:
-                    logging.info("subscribe ACK received")
-                else:
-                    logging.error("receive error data : " + message)
-            elif action_outer == "req": #
-                action_code = dict_data.get("code", -1)
-                if action_code == 200:
-                    logging.info("signature ACK received")
-                    if self.request.subscription_handler is not None:
-                        self.request.subscription_handler(self)
-                else:
-                    logging.error("receive error data : " + message)
-            elif action_outer == "push":
-                action_data = dict_data.get("data")
-                if action_data:
-                    self.__on_receive(dict_data)
-                else:
-                    logging.error("receive error push data : " + message)
+            else:
+                logging.error("receive error data : " + str(dict_data))
+        elif action == "push":
+            self.__on_push(dict_data)
 
-        elif ch_outer and len(ch_outer):
+    def __on_push(self, dict_data):
+        if dict_data.get("data"):
             self.__on_receive(dict_data)
-        elif rep_outer and len(rep_outer):
-            self.__on_receive(dict_data)
-        elif ping_market_outer:
-            #print("******** receive market ping pong ********", dict_data)
-            ping_ts = ping_market_outer
-            self.__process_ping_on_market_line(ping_ts)
         else:
-            #print("unknown data process, RX: ", gzip.decompress(message).decode("utf-8"))
-            pass
+            logging.error("receive error push data : " + str(dict_data))
+
+    def __on_rep(self, dict_data, rep):
+        self.__on_receive(dict_data)
+
+    def __on_ping(self, dict_data, ping_ts):
+        self.__process_ping_on_market_line(int(ping_ts))
 
     def __on_receive(self, dict_data):
         res = None
@@ -244,16 +348,31 @@ class WebsocketManage:
         except Exception as e:
             self.on_error("Failed to parse server's response: " + str(e))
 
+        ch = dict_data.get("ch") if self.latency_monitor is not None else None
+        if self.callback_queue is not None:
+            self.callback_queue.put(res, ch, self.received_at_us)
+        else:
+            self.deliver(res, ch, self.received_at_us)
+
+        # websocket request will close the connection after receive
+        if self.request.auto_close:
+            self.close()
+
+    def deliver(self, res, ch=None, received_at_us=None):
+        if self.callback_executor is not None:
+            self.callback_executor.submit(self.callback_key(res), self.run_callback, res, ch, received_at_us)
+        else:
+            self.run_callback(res, ch, received_at_us)
+
+    def run_callback(self, res, ch=None, received_at_us=None):
         try:
             if self.request.update_callback is not None:
                 self.request.update_callback(res)
         except Exception as e:
             self.on_error("Process error: " + str(e)
                      + " You should capture the exception in your error handler")
-
-        # websocket request will close the connection after receive
-        if self.request.auto_close:
-            self.close()
+        if ch is not None and received_at_us is not None:
+            self.latency_monitor.record_callback(ch, time.time_ns() // 1000 - received_at_us)
 
     def __process_ping_on_trading_line(self, ping_ts):
         #print("### __process_ping_on_trading_line ###")
@@ -276,6 +395,6 @@ class WebsocketManage:
 
     def close_on_error(self):
         if self.original_connection is not None:
-            self.original_connection.close()
             self.state = ConnectionState.CLOSED_ON_ERROR
+            self.original_connection.close()
             self.logger.error("[Sub][" + str(self.id) + "] Connection is closing due to error")
@@ -0,0 +1,213 @@
+import bisect
+import glob
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+SEGMENT_MAGIC = b"HBREC001"
+# recv_ts_ns, connection id, flags, payload length
+FRAME_HEADER = struct.Struct("<qIBI")
+# recv_ts_ns, offset of the frame in the segment
+INDEX_ENTRY = struct.Struct("<qQ")
+
+FRAME_BINARY = 1   # the frame was received as bytes (gzip V1 market data), otherwise as text
+FRAME_ZLIB = 2     # the payload was compressed by the recorder
+
+
+class WebsocketRecorder(object):
+
+    def __init__(self, root_dir, prefix="ws", segment_bytes=64 * 1024 * 1024, compress=False,
+                 index_interval_ms=1000, fsync_interval_s=1.0, batch_size=1024):
+        """
+        Record every received websocket frame to segmented append-only files.
+
+        Frames are appended with their receive time by a background thread, so record() never blocks the
+        receive path. Every segment <prefix>-<n>.seg has a sparse time index <prefix>-<n>.idx with one entry
+        per index_interval_ms of recording.
+
+        :param root_dir: The directory of the segments, created if missing.
+        :param prefix: The prefix of the segment file names.
+        :param segment_bytes: The size after which a new segment is started.
+        :param compress: Compress text frames with zlib; binary V1 frames are gzip already and kept as is.
+        :param index_interval_ms: The receive time between two index entries.
+        :param fsync_interval_s: The maximum time written frames stay unsynced.
+        :param batch_size: The maximum number of frames written per batch.
+        """
+        self.root_dir = root_dir
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        self.index_interval_ns = int(index_interval_ms * 1e6)
+        self.fsync_interval_s = fsync_interval_s
+        self.batch_size = batch_size
+        self.logger = logging.getLogger("huobi-client")
+        self.frames = 0
+        self.written_bytes = 0
+        os.makedirs(root_dir, exist_ok=True)
+        existing = sorted(glob.glob(os.path.join(root_dir, prefix + "-*.seg")))
+        self.__segment_no = int(existing[-1][-10:-4]) + 1 if existing else 0
+        self.__segment = None
+        self.__index = None
+        self.__last_index_ns = None
+        self.__queue = queue.SimpleQueue()
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="websocket-recorder", daemon=True)
+        self.__thread.start()
+
+    def record(self, connection_id, message):
+        if self.__closed:
+            return
+        self.__queue.put((time.time_ns(), connection_id, message))
+
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def __open_segment(self):
+        name = os.path.join(self.root_dir, "%s-%06d" % (self.prefix, self.__segment_no))
+        self.__segment_no += 1
+        self.__segment = open(name + ".seg", "wb")
+        self.__segment.write(SEGMENT_MAGIC)
+        self.__index = open(name + ".idx", "wb")
+        self.__last_index_ns = None
+
+    def __close_segment(self):
+        if self.__segment is not None:
+            for file in (self.__segment, self.__index):
+                file.flush()
+                os.fsync(file.fileno())
+                file.close()
+            self.__segment = None
+
+    def __write(self, recv_ns, connection_id, message):
+        flags = 0
+        if isinstance(message, bytes):
+            flags |= FRAME_BINARY
+            payload = message
+        else:
+            payload = message.encode("utf-8")
+            if self.compress:
+                flags |= FRAME_ZLIB
+                payload = zlib.compress(payload)
+        if self.__segment is None or self.__segment.tell() >= self.segment_bytes:
+            self.__close_segment()
+            self.__open_segment()
+        offset = self.__segment.tell()
+        if self.__last_index_ns is None or recv_ns - self.__last_index_ns >= self.index_interval_ns:
+            self.__index.write(INDEX_ENTRY.pack(recv_ns, offset))
+            self.__last_index_ns = recv_ns
+        self.__segment.write(FRAME_HEADER.pack(recv_ns, connection_id, flags, len(payload)))
+        self.__segment.write(payload)
+        self.frames += 1
+        self.written_bytes += FRAME_HEADER.size + len(payload)
+
+    def __run(self):
+        last_sync = time.monotonic()
+        running = True
+        while running:
+            try:
+                item = self.__queue.get(timeout=self.fsync_interval_s)
+            except queue.Empty:
+                item = ()
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for item in batch:
+                    if item is None:
+                        running = False
+                    elif item:
+                        self.__write(*item)
+                if self.__segment is not None:
+                    self.__segment.flush()
+                    self.__index.flush()
+                    if time.monotonic() - last_sync >= self.fsync_interval_s:
+                        os.fsync(self.__segment.fileno())
+                        os.fsync(self.__index.fileno())
+                        last_sync = time.monotonic()
+            except Exception as e:
+                self.logger.error("[Recorder] Failed to write frames: " + str(e))
+        self.__close_segment()
+
+
+class SegmentReader(object):
+
+    def __init__(self, path):
+        """
+        Memory-mapped reader of one recorded segment.
+
+        :param path: The path of the .seg file; its .idx file is used to seek by time if present.
+        """
+        self.path = path
+        self.__file = open(path, "rb")
+        size = os.fstat(self.__file.fileno()).st_size
+        self.buffer = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self.buffer[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise ValueError("Not a recorded segment: " + path)
+        self.index_times = []
+        self.index_offsets = []
+        index_path = path[:-4] + ".idx"
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as index_file:
+                data = index_file.read()
+            for recv_ns, offset in INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size]):
+                self.index_times.append(recv_ns)
+                self.index_offsets.append(offset)
+
+    def offset_of(self, recv_ns):
+        """Return an offset at or before the first frame received at or after recv_ns."""
+        position = bisect.bisect_right(self.index_times, recv_ns) - 1
+        return self.index_offsets[position] if position >= 0 else len(SEGMENT_MAGIC)
+
+    def frames(self, start_ns=None, end_ns=None):
+        """
+        Iterate the frames of the segment as (recv_ts_ns, connection_id, flags, payload).
+
+        The payload is a zero-copy memoryview into the mapped file and must be released before close(). A frame cut
+        short by a crash ends the iteration.
+        """
+        buffer = memoryview(self.buffer)
+        offset = len(SEGMENT_MAGIC) if start_ns is None else self.offset_of(start_ns)
+        size = len(buffer)
+        try:
+            while offset + FRAME_HEADER.size <= size:
+                recv_ns, connection_id, flags, length = FRAME_HEADER.unpack_from(buffer, offset)
+                offset += FRAME_HEADER.size
+                if offset + length > size:
+                    break
+                if end_ns is not None and recv_ns >= end_ns:
+                    break
+                if start_ns is None or recv_ns >= start_ns:
+                    yield recv_ns, connection_id, flags, buffer[offset:offset + length]
+                offset += length
+        finally:
+            buffer.release()
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.__file.close()
+
+
+def decode_frame(flags, payload):
+    """Return the frame as received from the server: bytes for gzip V1 frames, str for text frames."""
+    if flags & FRAME_BINARY:
+        return bytes(payload)
+    if flags & FRAME_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    return str(payload, "utf-8")
+
+
+def list_segments(root_dir, prefix="ws"):
+    return sorted(glob.glob(os.path.join(root_dir, prefix + "-*.seg")))
@@ -11,4 +11,31 @@ class WebsocketRequest(object):
         self.error_handler = None
         self.json_parser = None
         self.update_callback = None
+        self.gap_handler = None
         self.api_version = ApiVersion.VERSION_V1  # v1 as default
+
+
+class ConnectionGapEvent:
+    """
+    Sent to the gap handler of a subscription when its connection is back after being lost. The updates between
+    last_receive_time and reconnect_time are missing, so state built from them, like order books, must be resynced.
+
+    :member
+        connection_id: The id of the connection.
+        last_receive_time: UNIX timestamp in millisecond of the last message received before the connection was lost.
+        reconnect_time: UNIX timestamp in millisecond the connection was opened again.
+        attempts: The number of connection attempts it took.
+    """
+
+    def __init__(self):
+        self.connection_id = 0
+        self.last_receive_time = 0
+        self.reconnect_time = 0
+        self.attempts = 0
+
+    def print_object(self, format_data=""):
+        from huobi.utils.print_mix_object import PrintBasic
+        PrintBasic.print_basic(self.connection_id, format_data + "Connection Id")
+        PrintBasic.print_basic(self.last_receive_time, format_data + "Last Receive Time")
+        PrintBasic.print_basic(self.reconnect_time, format_data + "Reconnect Time")
+        PrintBasic.print_basic(self.attempts, format_data + "Attempts")
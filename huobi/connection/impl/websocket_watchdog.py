@@ -17,14 +17,14 @@ def watch_dog_job(*args):
                 ts = get_current_timestamp() - websocket_manage.last_receive_time
                 if ts > watch_dog_obj.heart_beat_limit_ms:
                     watch_dog_obj.logger.warning("[Sub][" + str(websocket_manage.id) + "] No response from server")
-                    websocket_manage.close_and_wait_reconnect(watch_dog_obj.wait_reconnect_millisecond())
+                    websocket_manage.close_and_wait_reconnect(websocket_manage.next_reconnect_delay())
         elif websocket_manage.state == ConnectionState.WAIT_RECONNECT:
             watch_dog_obj.logger.warning("[Sub] call re_connect")
             websocket_manage.re_connect()
             pass
         elif websocket_manage.state == ConnectionState.CLOSED_ON_ERROR:
             if watch_dog_obj.is_auto_connect:
-                websocket_manage.close_and_wait_reconnect(watch_dog_obj.reconnect_after_ms)
+                websocket_manage.close_and_wait_reconnect(websocket_manage.next_reconnect_delay())
                 pass
 
 
@@ -32,11 +32,10 @@ class WebSocketWatchDog(threading.Thread):
     mutex = threading.Lock()
     websocket_manage_list = list()
 
-    def __init__(self, is_auto_connect=True, heart_beat_limit_ms=CONNECT_HEART_BEAT_LIMIT_MS, reconnect_after_ms=RECONNECT_AFTER_TIME_MS):
+    def __init__(self, is_auto_connect=True, heart_beat_limit_ms=CONNECT_HEART_BEAT_LIMIT_MS):
         threading.Thread.__init__(self)
         self.is_auto_connect = is_auto_connect
         self.heart_beat_limit_ms = heart_beat_limit_ms
-        self.reconnect_after_ms = reconnect_after_ms if reconnect_after_ms > heart_beat_limit_ms else heart_beat_limit_ms
         self.logger = logging.getLogger("huobi-client")
         self.scheduler = BlockingScheduler()
         self.scheduler.add_job(watch_dog_job, "interval", max_instances=10, seconds=1, args=[self])
@@ -46,6 +45,7 @@ class WebSocketWatchDog(threading.Thread):
         self.scheduler.start()
 
     def on_connection_created(self, websocket_manage):
+        websocket_manage.watch_dog = self
         self.mutex.acquire()
         self.websocket_manage_list.append(websocket_manage)
         self.mutex.release()
@@ -55,13 +55,4 @@ class WebSocketWatchDog(threading.Thread):
         self.websocket_manage_list.remove(websocket_manage)
         self.mutex.release()
 
-    # calculate next reconnect time
-    def wait_reconnect_millisecond(self):
-        wait_millisecond = int(self.reconnect_after_ms - self.heart_beat_limit_ms)
-        now_ms = get_current_timestamp()
-        wait_millisecond = wait_millisecond if wait_millisecond else 1000
-        # job loop after 1 second
-        return (wait_millisecond + now_ms)
-
-
 
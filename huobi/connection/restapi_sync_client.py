@@ -1,12 +1,29 @@
 import logging
+import re
+import time
 
 from huobi.connection.impl.restapi_invoker import call_sync, call_sync_perforence_test
 from huobi.connection.impl.restapi_request import RestApiRequest
+from huobi.connection.impl.response_cache import default_response_cache
 from huobi.constant import *
 from huobi.utils import *
+from huobi.utils.metrics import metrics_registry
 
 from huobi.exception.huobi_api_exception import HuobiApiException
 
+rest_request_seconds = metrics_registry.histogram("huobi_rest_request_duration_seconds",
+                                                  "Duration of the REST requests", ["method", "endpoint"])
+rest_request_errors = metrics_registry.counter("huobi_rest_request_errors_total",
+                                               "REST requests that failed or returned an error", ["method", "endpoint"])
+rest_cache_hits = metrics_registry.counter("huobi_rest_cache_hits_total",
+                                           "REST requests answered from the response cache", ["endpoint"])
+
+# ids in the path, like the order id of /v1/order/orders/{order-id}, which would make an endpoint per order
+ID_PATTERN = re.compile(r"/\d+(?=/|$)")
+
+
+def get_endpoint(url):
+    return ID_PATTERN.sub("/{id}", url)
 
 
 class RestApiSyncClient(object):
@@ -20,12 +37,15 @@ class RestApiSyncClient(object):
             url: The URL name like "https://api.huobi.pro".
             performance_test: for performance test
             init_log: to init logger
+            response_cache: the ResponseCache of the responses of rarely changing endpoints, shared by every
+                            client by default; None to always send the request
         """
         self.__api_key = kwargs.get("api_key", None)
         self.__secret_key = kwargs.get("secret_key", None)
         self.__server_url = kwargs.get("url", get_default_server_url(None))
         self.__init_log = kwargs.get("init_log", None)
         self.__performance_test = kwargs.get("performance_test", None)
+        self.__response_cache = kwargs.get("response_cache", default_response_cache)
         if self.__init_log and self.__init_log:
             logger = logging.getLogger("huobi-client")
             logger.setLevel(level=logging.INFO)
@@ -116,12 +136,38 @@ class RestApiSyncClient(object):
             return self.request_process_product(method, url, params, parse)
 
     def request_process_product(self, method, url, params, parse):
+        cache = self.__response_cache
+        ttl = cache.get_ttl(url) if cache is not None and method in [HttpMethod.GET, HttpMethod.GET_SIGN] else 0
+        if ttl > 0:
+            # the key is made of the params before signing, which adds a timestamp
+            key = cache.make_key(method, self.__server_url, url, params, self.__api_key)
+            result = cache.get(key)
+            if result is not None:
+                rest_cache_hits.labels(get_endpoint(url)).inc()
+                return result
         request = self.create_request(method, url, params, parse)
         if request:
-            return call_sync(request)
+            result = self.__call_sync(request, url)
+            if ttl > 0:
+                cache.put(key, result, ttl)
+            elif cache is not None:
+                cache.on_request(url)
+            return result
 
         return None
 
+    @staticmethod
+    def __call_sync(request, url):
+        endpoint = get_endpoint(url)
+        start_time = time.perf_counter()
+        try:
+            return call_sync(request)
+        except Exception:
+            rest_request_errors.labels(request.method, endpoint).inc()
+            raise
+        finally:
+            rest_request_seconds.labels(request.method, endpoint).observe(time.perf_counter() - start_time)
+
     def request_process_performance(self, method, url, params, parse):
         request = self.create_request(method, url, params, parse)
         if request:
@@ -141,7 +187,10 @@ class RestApiSyncClient(object):
     def request_process_post_batch_product(self, method, url, params, parse):
         request = self.create_request_post_batch(method, url, params, parse)
         if request:
-            return call_sync(request)
+            result = self.__call_sync(request, url)
+            if self.__response_cache is not None:
+                self.__response_cache.on_request(url)
+            return result
 
         return None
 
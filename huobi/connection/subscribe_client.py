@@ -1,5 +1,6 @@
 import logging
 
+from huobi.connection.impl.callback_queue import CallbackQueue, get_channel_key
 from huobi.connection.impl.websocket_watchdog import WebSocketWatchDog
 from huobi.connection.impl.websocket_manage import WebsocketManage
 from huobi.connection.impl.websocket_request import WebsocketRequest
@@ -19,11 +20,33 @@ class SubscribeClient(object):
             secret_key: The private key applied from Huobi.
             url: Set the URI for subscription.
             init_log: to init logger
+            recorder: WebsocketRecorder every received frame is written to
+            latency_monitor: FeedLatencyMonitor, possibly shared by clients, recording the latencies of the channels
+            gap_handler: function(ConnectionGapEvent) called when a lost connection is back, before its
+                         subscriptions are sent again
+            callback_queue_policy: CallbackQueuePolicy of a queue between the socket and the callback of each
+                                   subscription, or None to call the callbacks on the socket thread
+            callback_queue_size: max number of queued updates of a subscription
+            callback_queue_key: function(update) returning the conflation key, the channel by default
+            callback_executor: KeyedExecutor, possibly shared by clients, the callbacks run on instead of a single
+                               thread per subscription, bounding the queued updates of each key by its own policy;
+                               with callback_queue_policy the queue delivers into it, and an executor with the BLOCK
+                               policy holds the queue while a key is full, so that the policy of the queue applies
+            callback_executor_key: function(update) returning the key whose updates are delivered in order, the
+                                   channel by default
         """
         self.__api_key = kwargs.get("api_key", None)
         self.__secret_key = kwargs.get("secret_key", None)
         self.__uri = kwargs.get("url", WebSocketDefine.Uri)
         self.__init_log = kwargs.get("init_log", None)
+        self.__recorder = kwargs.get("recorder", None)
+        self.__gap_handler = kwargs.get("gap_handler", None)
+        self.__latency_monitor = kwargs.get("latency_monitor", None)
+        self.__callback_queue_policy = kwargs.get("callback_queue_policy", None)
+        self.__callback_queue_size = kwargs.get("callback_queue_size", 1024)
+        self.__callback_queue_key = kwargs.get("callback_queue_key", get_channel_key)
+        self.__callback_executor = kwargs.get("callback_executor", None)
+        self.__callback_executor_key = kwargs.get("callback_executor_key", get_channel_key)
         if self.__init_log and self.__init_log:
             logger = logging.getLogger("huobi-client")
             logger.setLevel(level=logging.INFO)
@@ -34,7 +57,17 @@ class SubscribeClient(object):
         self.__websocket_manage_list = list()
 
     def __create_websocket_manage(self, request):
-        manager = WebsocketManage(self.__api_key, self.__secret_key, self.__uri, request)
+        request.gap_handler = self.__gap_handler
+        manager = WebsocketManage(self.__api_key, self.__secret_key, self.__uri, request,
+                                  recorder=self.__recorder)
+        manager.latency_monitor = self.__latency_monitor
+        if self.__callback_executor is not None and not request.auto_close:
+            manager.callback_executor = self.__callback_executor
+            manager.callback_key = self.__callback_executor_key
+        if self.__callback_queue_policy is not None and not request.auto_close:
+            manager.callback_queue = CallbackQueue(manager.deliver, self.__callback_queue_policy,
+                                                   self.__callback_queue_size, self.__callback_queue_key,
+                                                   request.error_handler, name="sub-" + str(manager.id))
         self.__websocket_manage_list.append(manager)
         manager.connect()
         SubscribeClient.subscribe_watch_dog.on_connection_created(manager)
@@ -25,6 +25,12 @@ class ApiVersion:
     VERSION_V1 = "v1"
     VERSION_V2 = "v2"
 
+
+class CallbackQueuePolicy:
+    BLOCK = "block"                # the receiving thread waits for room in the queue
+    DROP_OLDEST = "drop_oldest"    # the oldest queued update is dropped to make room
+    CONFLATE = "conflate"          # only the newest queued update of each key is kept
+
 def get_default_server_url(user_configed_url):
     if user_configed_url and len(user_configed_url):
         return user_configed_url
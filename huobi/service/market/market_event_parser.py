@@ -0,0 +1,25 @@
+from huobi.model.market import *
+from huobi.utils import *
+
+
+def parse_candlestick_event(dict_data):
+    return default_parse(dict_data, CandlestickEvent, Candlestick)
+
+
+def parse_trade_detail_event(dict_data):
+    tick = dict_data.get("tick", {})
+    trade_detail_event = default_parse(tick, TradeDetailEvent, TradeDetail)
+    trade_detail_event.ch = dict_data.get("ch", "")
+    return trade_detail_event
+
+
+def parse_mbp_increase_event(dict_data):
+    return MbpIncreaseEvent.json_parse(dict_data)
+
+
+def parse_price_depth_event(dict_data):
+    price_depth_event_obj = PriceDepthEvent()
+    price_depth_event_obj.ch = dict_data.get("ch", "")
+    tick = dict_data.get("tick", "")
+    price_depth_event_obj.tick = PriceDepth.json_parse(tick)
+    return price_depth_event_obj
@@ -3,10 +3,10 @@ import time
 from huobi.utils import *
 
 from huobi.connection.subscribe_client import SubscribeClient
+from huobi.service.market.market_event_parser import parse_candlestick_event
 from huobi.model.market import *
 
 
-
 class SubCandleStickService:
     def __init__(self, params):
 
@@ -21,11 +21,8 @@ class SubCandleStickService:
                 connection.send(kline_channel(symbol, interval))
                 time.sleep(0.01)
 
-        def parse(dict_data):
-            return default_parse(dict_data, CandlestickEvent, Candlestick)
-
         SubscribeClient(**kwargs).execute_subscribe_v1(subscription,
-                                            parse,
+                                            parse_candlestick_event,
                                             callback,
                                             error_handler)
 
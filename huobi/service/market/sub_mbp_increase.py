@@ -3,6 +3,7 @@ import time
 from huobi.model.market import *
 from huobi.utils import *
 from huobi.connection.subscribe_client import SubscribeClient
+from huobi.service.market.market_event_parser import parse_mbp_increase_event
 
 
 class SubMbpIncreaseService:
@@ -18,11 +19,8 @@ class SubMbpIncreaseService:
                 connection.send(mbp_increase_channel(symbol, level))
                 time.sleep(0.01)
 
-        def parse(dict_data):
-            return MbpIncreaseEvent.json_parse(dict_data)
-
         SubscribeClient(**kwargs).execute_subscribe_mbp(subscription,
-                                            parse,
+                                            parse_mbp_increase_event,
                                             callback,
                                             error_handler)
 
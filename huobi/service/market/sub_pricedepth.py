@@ -3,6 +3,7 @@ import time
 from huobi.model.market import *
 from huobi.utils import *
 from huobi.connection.subscribe_client import SubscribeClient
+from huobi.service.market.market_event_parser import parse_price_depth_event
 
 
 class SubPriceDepthService:
@@ -18,17 +19,12 @@ class SubPriceDepthService:
                 connection.send(price_depth_channel(symbol, step))
                 time.sleep(0.01)
 
-        def parse(dict_data):
-            price_depth_event_obj = PriceDepthEvent()
-            price_depth_event_obj.ch = dict_data.get("ch", "")
-            tick = dict_data.get("tick", "")
-            price_depth_event_obj.tick = PriceDepth.json_parse(tick)
-            return price_depth_event_obj
-
-        SubscribeClient(**kwargs).execute_subscribe_v1(subscription,
-                                            parse,
-                                            callback,
-                                            error_handler)
+        subscriber = SubscribeClient(**kwargs)
+        subscriber.execute_subscribe_v1(subscription,
+                                        parse_price_depth_event,
+                                        callback,
+                                        error_handler)
+        return subscriber
 
 
 
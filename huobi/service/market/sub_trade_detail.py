@@ -3,6 +3,7 @@ import time
 from huobi.model.market import *
 from huobi.utils import *
 from huobi.connection.subscribe_client import SubscribeClient
+from huobi.service.market.market_event_parser import parse_trade_detail_event
 
 
 class SubTradeDetailService:
@@ -17,16 +18,12 @@ class SubTradeDetailService:
                 connection.send(trade_detail_channel(symbol))
                 time.sleep(0.01)
 
-        def parse(dict_data):
-            tick = dict_data.get("tick", {})
-            trade_detail_event = default_parse(tick, TradeDetailEvent, TradeDetail)
-            trade_detail_event.ch = dict_data.get("ch", "")
-            return trade_detail_event
-
-        SubscribeClient(**kwargs).execute_subscribe_v1(subscription,
-                                            parse,
-                                            callback,
-                                            error_handler)
+        subscriber = SubscribeClient(**kwargs)
+        subscriber.execute_subscribe_v1(subscription,
+                                        parse_trade_detail_event,
+                                        callback,
+                                        error_handler)
+        return subscriber
 
 
 
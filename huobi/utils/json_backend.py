@@ -0,0 +1,36 @@
+import json
+import os
+
+"""
+JSON decoders in order of preference, all of them accept bytes as well as str.
+"""
+JSON_BACKENDS = ["orjson", "ujson", "json"]
+
+
+def select_json_backend(name=None):
+    """
+    Return the name and the loads function of the fastest installed JSON decoder.
+    :param name: the decoder to use instead, one of JSON_BACKENDS.
+    """
+    for backend in JSON_BACKENDS if name is None else [name]:
+        if backend == "orjson":
+            try:
+                import orjson
+                return backend, orjson.loads
+            except ImportError:
+                pass
+        elif backend == "ujson":
+            try:
+                import ujson
+                return backend, ujson.loads
+            except ImportError:
+                pass
+        elif backend == "json":
+            return backend, json.loads
+    raise ValueError("JSON backend " + str(name) + " is unknown or isn't installed")
+
+
+"""
+Selected at import, HUOBI_JSON_BACKEND in the environment picks the decoder explicitly.
+"""
+json_backend, json_loads = select_json_backend(os.environ.get("HUOBI_JSON_BACKEND") or None)
@@ -0,0 +1,99 @@
+import bisect
+import itertools
+
+
+class LatencyHistogram(object):
+
+    def __init__(self, max_value=60 * 1000 * 1000, precision_bits=7):
+        """
+        Histogram of non-negative integer values, like latencies in microseconds, in HDR-style log-linear buckets.
+        Values below 2 ** precision_bits have a bucket each; above, every power of two is split into
+        2 ** (precision_bits - 1) buckets, so a value is known within 1 / 2 ** (precision_bits - 1) of itself.
+        Recording is an index computation and a list increment without a lock; a count may be lost when two
+        threads record in the same bucket at once, which is negligible for latency percentiles.
+        :param max_value: the largest value told apart, larger ones are counted in the last bucket.
+        :param precision_bits: number of significant bits kept of a value.
+        """
+        self.precision_bits = precision_bits
+        self.max_value = max_value
+        self.__linear_count = 1 << precision_bits
+        self.__half_count = 1 << (precision_bits - 1)
+        self.counts = [0] * (self.get_index(max_value) + 1)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def get_index(self, value):
+        if value < self.__linear_count:
+            return value
+        shift = value.bit_length() - self.precision_bits
+        return self.__linear_count + (shift - 1) * self.__half_count + (value >> shift) - self.__half_count
+
+    def get_bucket_range(self, index):
+        """
+        Return the lowest and highest values counted in the bucket of the index.
+        """
+        if index < self.__linear_count:
+            return index, index
+        shift, offset = divmod(index - self.__linear_count, self.__half_count)
+        shift += 1
+        lowest = (self.__half_count + offset) << shift
+        return lowest, lowest + (1 << shift) - 1
+
+    def record(self, value):
+        value = int(value)
+        if value < 0:
+            value = 0
+        index = self.get_index(value) if value <= self.max_value else len(self.counts) - 1
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, percent):
+        """
+        Return the highest value of the bucket the percentile falls in, or None if nothing was recorded.
+        """
+        return self.percentiles([percent])[0]
+
+    def percentiles(self, percents):
+        total = self.total
+        if total == 0:
+            return [None] * len(percents)
+        cumulative = list(itertools.accumulate(self.counts))
+        values = []
+        for percent in percents:
+            rank = max(1, min(total, int(-(-percent * total // 100))))
+            index = bisect.bisect_left(cumulative, rank)
+            if index >= len(self.counts) - 1:
+                # the last bucket also counts the values above max_value
+                values.append(self.max)
+            else:
+                values.append(max(self.min, min(self.get_bucket_range(index)[1], self.max)))
+        return values
+
+    def mean(self):
+        return self.sum / self.total if self.total else None
+
+    def merge(self, other):
+        if len(other.counts) != len(self.counts) or other.precision_bits != self.precision_bits:
+            raise ValueError("histograms of different buckets can't be merged")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        if other.total:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
@@ -0,0 +1,237 @@
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Bounds in seconds of the histogram buckets of request and handling durations.
+"""
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def format_labels(label_names, label_values, extra=""):
+    labels = [name + "=\"" + escape_label_value(value) + "\"" for name, value in zip(label_names, label_values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class CounterChild(object):
+    __slots__ = ["value"]
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        # a read-modify-write under the GIL; an increment may be lost under contention, which is accepted for metrics
+        self.value += amount
+
+
+class GaugeChild(object):
+    __slots__ = ["value"]
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class HistogramChild(object):
+    __slots__ = ["bounds", "counts", "sum"]
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric(object):
+    TYPE = None
+
+    def __init__(self, name, documentation, label_names=()):
+        """
+        Metric with a child of each combination of label values, like a counter of each endpoint.
+        :param name: the metric name, like "huobi_rest_requests_total".
+        :param documentation: the HELP line of the metric.
+        :param label_names: names of the labels the children are told apart by.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.children = dict()
+        self.__lock = threading.Lock()
+
+    def new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *label_values):
+        """
+        Return the child of the label values; keep it to update it without the lookup on a hot path.
+        """
+        child = self.children.get(label_values)
+        if child is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError("metric " + self.name + " expects labels " + str(self.label_names))
+            with self.__lock:
+                child = self.children.setdefault(label_values, self.new_child())
+        return child
+
+    def expose(self):
+        lines = ["# HELP " + self.name + " " + self.documentation.replace("\n", " "),
+                 "# TYPE " + self.name + " " + self.TYPE]
+        for label_values, child in sorted(list(self.children.items())):
+            lines += self.expose_child(label_values, child)
+        return lines
+
+    def expose_child(self, label_values, child):
+        return [self.name + format_labels(self.label_names, label_values) + " " + format_value(child.value)]
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def new_child(self):
+        return CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def new_child(self):
+        return GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def expose_child(self, label_values, child):
+        lines = []
+        cumulative = 0
+        counts = list(child.counts)
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = format_labels(self.label_names, label_values, "le=\"" + format_value(float(bound)) + "\"")
+            lines.append(self.name + "_bucket" + labels + " " + str(cumulative))
+        labels = format_labels(self.label_names, label_values)
+        lines.append(self.name + "_sum" + labels + " " + format_value(child.sum))
+        lines.append(self.name + "_count" + labels + " " + str(cumulative))
+        return lines
+
+
+class MetricsRegistry(object):
+
+    def __init__(self):
+        """
+        Metrics of the process, exposed in the Prometheus text format.
+        """
+        self.metrics = dict()
+        self.server = None
+        self.__lock = threading.Lock()
+
+    def __get_or_create(self, cls, name, documentation, label_names, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self.__lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = cls(name, documentation, label_names, **kwargs)
+        if type(metric) is not cls or metric.label_names != tuple(label_names):
+            raise ValueError("metric " + name + " is already registered with another type or labels")
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self.__get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name, documentation, label_names=()):
+        return self.__get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self.__get_or_create(Histogram, name, documentation, label_names, buckets=buckets)
+
+    def expose(self):
+        lines = []
+        for name in sorted(list(self.metrics)):
+            lines += self.metrics[name].expose()
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port=9100, address="127.0.0.1"):
+        """
+        Serve the metrics at http://address:port/metrics on a daemon thread and return the server.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ["/metrics", "/"]:
+                    self.send_error(404)
+                    return
+                body = registry.expose().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((address, port), MetricsHandler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        return self.server
+
+    def stop_http_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+"""
+The registry the SDK clients, traders and strategies report to.
+"""
+metrics_registry = MetricsRegistry()
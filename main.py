@@ -7,6 +7,7 @@ from trader.trader import Trader
 from strategy import *
 
 from huobi.constant import *
+from huobi.utils.metrics import metrics_registry
 
 trader = None
 
@@ -17,6 +18,8 @@ def main():
         config = json.load(handle)
     global trader
     trader = Trader(config['api_key'], config['secret_key'], config['account_id'])
+    if 'metrics_port' in config:
+        metrics_registry.start_http_server(config['metrics_port'])
 
 
 main()
@@ -0,0 +1,3 @@
+from .exchange import MockExchange, MockOrder, ExchangeError
+from .server import MockExchangeServer
+from .websocket import WebSocketConnection
@@ -0,0 +1,266 @@
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from constants import transaction_pairs
+from huobi.constant import OrderType, OrderState, OrderSide
+from trader.matching_engine import MatchingEngine
+
+BUY_ORDER_TYPES = (OrderType.BUY_LIMIT, OrderType.BUY_MARKET, OrderType.BUY_LIMIT_MAKER)
+LIMIT_ORDER_TYPES = (OrderType.BUY_LIMIT, OrderType.SELL_LIMIT, OrderType.BUY_LIMIT_MAKER, OrderType.SELL_LIMIT_MAKER)
+MARKET_ORDER_TYPES = (OrderType.BUY_MARKET, OrderType.SELL_MARKET)
+FINISHED_STATES = (OrderState.FILLED, OrderState.CANCELED, OrderState.PARTIAL_CANCELED)
+
+
+class ExchangeError(RuntimeError):
+    def __init__(self, err_code, err_msg):
+        """Rejection of a request, answered with the err-code and err-msg of the exchange."""
+        super().__init__(f'{err_code}: {err_msg}')
+        self.err_code = err_code
+        self.err_msg = err_msg
+
+
+class MockOrder(object):
+    def __init__(self, order_id, account_id, symbol, order_type, price, amount, client_order_id, source, created_at):
+        self.id = order_id
+        self.account_id = account_id
+        self.symbol = symbol
+        self.type = order_type
+        self.price = price
+        self.amount = amount
+        self.client_order_id = client_order_id
+        self.source = source
+        self.created_at = created_at
+        self.canceled_at = 0
+        self.finished_at = 0
+        self.filled_amount = 0.0
+        self.filled_cash_amount = 0.0
+        self.filled_fees = 0.0
+        self.state = OrderState.SUBMITTED
+
+    @property
+    def is_buy(self):
+        return self.type in BUY_ORDER_TYPES
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'symbol': self.symbol, 'account-id': self.account_id, 'amount': str(self.amount),
+            'price': str(self.price), 'created-at': self.created_at, 'type': self.type,
+            'field-amount': str(self.filled_amount), 'field-cash-amount': str(self.filled_cash_amount),
+            'field-fees': str(self.filled_fees), 'finished-at': self.finished_at, 'source': self.source,
+            'state': self.state, 'canceled-at': self.canceled_at, 'client-order-id': self.client_order_id,
+        }
+
+
+class MockExchange(object):
+    def __init__(self, prices, balance=None, account_id=1000001, fee_rate=0.002, volatility=0.0005, seed=None,
+                 pairs=None):
+        """Accounts, orders and random walk prices of a simulated exchange, without any networking.
+
+        Market orders fill at the last price. Limit orders rest in a trader.MatchingEngine and fill at their price when
+        the price reaches them, by price-time priority and partially up to the volume of the step.
+        Every method is thread safe and returns the events the servers push, as
+        (kind, symbol, data) tuples where kind is 'order' or 'trade'.
+
+        prices -- initial price of every symbol, e.g. {'btcusdt': 20000}
+        balance -- initial balance of the spot account, e.g. {'usdt': 10000, 'btc': 1}
+        account_id -- id of the spot account
+        fee_rate -- fee of the fills of makers and takers, taken from the received currency
+        volatility -- standard deviation of the relative price change of a step of the random walk
+        seed -- seed of the random walk
+        pairs -- TransactionPair of every symbol, constants.transaction_pairs by default
+        """
+        self.prices = dict(prices)
+        self.pairs = pairs if pairs is not None else transaction_pairs
+        self.account_id = account_id
+        self.fee_rate = fee_rate
+        self.volatility = volatility
+        self.balance = {currency: float(amount) for currency, amount in (balance or {}).items()}
+        self.frozen = {currency: 0.0 for currency in self.balance}
+        self.orders = {}
+        self.open_orders = {symbol: {} for symbol in self.prices}
+        self.client_orders = {}
+        self.volumes = {symbol: 0.0 for symbol in self.prices}
+        self.trade_ids = itertools.count(100000000)
+        self.order_ids = itertools.count(500000000000)
+        self.rng = np.random.default_rng(seed)
+        self.engine = MatchingEngine(maker_fee=fee_rate, taker_fee=fee_rate)
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def now():
+        return int(time.time() * 1000)
+
+    def get_pair(self, symbol):
+        if symbol not in self.prices:
+            raise ExchangeError('invalid-parameter', f'invalid symbol {symbol}')
+        pair = self.pairs.get(symbol)
+        if pair is None:
+            raise ExchangeError('invalid-parameter', f'unknown precision of symbol {symbol}')
+        return pair
+
+    def get_balance(self, currency):
+        return self.balance.get(currency, 0.0)
+
+    def get_balance_list(self):
+        with self.lock:
+            return [row for currency in sorted(self.balance) for row in (
+                {'currency': currency, 'type': 'trade', 'balance': str(self.balance[currency])},
+                {'currency': currency, 'type': 'frozen', 'balance': str(self.frozen.get(currency, 0.0))})]
+
+    def step(self):
+        """Move every price a step of the random walk and fill the limit orders reached, returning the events."""
+        events = []
+        with self.lock:
+            changes = self.rng.normal(0.0, self.volatility, len(self.prices))
+            for (symbol, price), change in zip(list(self.prices.items()), changes):
+                pair = self.get_pair(symbol)
+                self.prices[symbol] = round(price * (1 + change), pair.price_scale)
+                self.volumes[symbol] = float(self.rng.exponential(1.0))
+                events += self.match(symbol, self.volumes[symbol])
+        return events
+
+    def set_price(self, symbol, price):
+        """Move the price of a symbol and fill the limit orders reached entirely, returning the events."""
+        with self.lock:
+            self.get_pair(symbol)
+            self.prices[symbol] = price
+            return self.match(symbol)
+
+    def match(self, symbol, volume=None):
+        return self.apply_fills(self.engine.match_trade(symbol, self.prices[symbol], volume))
+
+    def apply_fills(self, fills):
+        events = []
+        for order_id, price, amount, fee, is_maker in fills:
+            events += self.fill(self.orders[order_id], price, amount, aggressor=not is_maker, fee=fee)
+        return events
+
+    def create_order(self, account_id, symbol, order_type, amount, price=None, client_order_id=None, source='api'):
+        """Place an order, returning it and the events of its creation and immediate fill."""
+        with self.lock:
+            pair = self.get_pair(symbol)
+            if int(account_id) != self.account_id:
+                raise ExchangeError('account-frozen-account-inexistent-error', f'account {account_id} not found')
+            if order_type not in LIMIT_ORDER_TYPES + MARKET_ORDER_TYPES:
+                raise ExchangeError('invalid-parameter', f'unsupported order type {order_type}')
+            if client_order_id and client_order_id in self.client_orders:
+                raise ExchangeError('client-order-id-duplicated', f'duplicated client order id {client_order_id}')
+            amount = float(amount)
+            if amount <= 0:
+                raise ExchangeError('order-orderamount-precision-error', 'amount must be greater than 0')
+            last_price = self.prices[symbol]
+            if order_type in LIMIT_ORDER_TYPES:
+                if price is None or float(price) <= 0:
+                    raise ExchangeError('order-limitorder-price-error', 'limit orders need a positive price')
+                price = float(price)
+                crossing = price >= last_price if order_type in BUY_ORDER_TYPES else price <= last_price
+                if crossing and order_type in (OrderType.BUY_LIMIT_MAKER, OrderType.SELL_LIMIT_MAKER):
+                    raise ExchangeError('order-limitorder-price-error', 'limit maker order would be filled')
+            else:
+                price = last_price
+            # a market buy amount is in the quote currency
+            currency, cost = (pair.base, amount if order_type == OrderType.BUY_MARKET else amount * price) \
+                if order_type in BUY_ORDER_TYPES else (pair.target, amount)
+            if cost > self.get_balance(currency) + 1e-12:
+                raise ExchangeError('account-frozen-balance-insufficient-error',
+                                    f'trade account balance is not enough, left: `{self.get_balance(currency)}`')
+            self.balance[currency] = self.get_balance(currency) - cost
+            self.frozen[currency] = self.frozen.get(currency, 0.0) + cost
+
+            order = MockOrder(next(self.order_ids), self.account_id, symbol, order_type,
+                              price if order_type in LIMIT_ORDER_TYPES else 0.0, amount, client_order_id or '',
+                              source, self.now())
+            self.orders[order.id] = order
+            if client_order_id:
+                self.client_orders[client_order_id] = order
+            events = [('order', symbol, self.get_order_event(order, 'creation'))]
+            if order_type == OrderType.BUY_MARKET:
+                events += self.fill(order, last_price, amount / last_price, aggressor=True)
+            elif order_type == OrderType.SELL_MARKET:
+                events += self.fill(order, last_price, amount, aggressor=True)
+            elif crossing:
+                events += self.fill(order, last_price, amount, aggressor=True)
+            else:
+                self.open_orders[symbol][order.id] = order
+                events += self.apply_fills(self.engine.add_order(order.id, symbol, order.is_buy, price, amount,
+                                                                 order.created_at))
+            return order, events
+
+    def fill(self, order, price, amount, aggressor, fee=None):
+        pair = self.pairs[order.symbol]
+        cash_amount = price * amount
+        if fee is None:
+            fee = self.engine.get_fee(order.is_buy, price, amount, not aggressor)
+        if order.is_buy:
+            # a limit buy filled below its price gives back the difference
+            frozen = order.amount if order.type == OrderType.BUY_MARKET else order.price * amount
+            self.frozen[pair.base] -= frozen
+            self.balance[pair.base] += frozen - cash_amount
+            self.balance[pair.target] = self.get_balance(pair.target) + amount - fee
+        else:
+            self.frozen[pair.target] -= amount
+            self.balance[pair.base] = self.get_balance(pair.base) + cash_amount - fee
+        order.filled_amount += amount
+        order.filled_cash_amount += cash_amount
+        order.filled_fees += fee
+        trade_time = self.now()
+        if order.type in MARKET_ORDER_TYPES or self.engine.get_order(order.id) is None:
+            order.state = OrderState.FILLED
+            order.finished_at = trade_time
+            self.open_orders[order.symbol].pop(order.id, None)
+        else:
+            order.state = OrderState.PARTIAL_FILLED
+        trade_id = next(self.trade_ids)
+        trade = {
+            'eventType': 'trade', 'symbol': order.symbol, 'orderId': order.id, 'tradePrice': str(price),
+            'tradeVolume': str(amount), 'orderSide': OrderSide.BUY if order.is_buy else OrderSide.SELL,
+            'orderType': order.type, 'aggressor': aggressor, 'tradeId': trade_id, 'tradeTime': trade_time,
+            'transactFee': str(fee), 'feeCurrency': pair.target if order.is_buy else pair.base, 'feeDeduct': '',
+            'feeDeductType': '', 'accountId': order.account_id, 'source': order.source,
+            'orderPrice': str(order.price), 'orderSize': str(order.amount), 'clientOrderId': order.client_order_id,
+            'orderCreateTime': order.created_at, 'orderStatus': order.state,
+        }
+        update = self.get_order_event(order, 'trade')
+        update.update({'tradePrice': str(price), 'tradeVolume': str(amount), 'tradeId': trade_id,
+                       'tradeTime': trade_time, 'aggressor': aggressor})
+        return [('order', order.symbol, update), ('trade', order.symbol, trade)]
+
+    def get_order_event(self, order, event_type):
+        return {'eventType': event_type, 'symbol': order.symbol, 'accountId': order.account_id, 'orderId': order.id,
+                'clientOrderId': order.client_order_id, 'orderSource': order.source, 'orderPrice': str(order.price),
+                'orderSize': str(order.amount), 'type': order.type, 'orderStatus': order.state,
+                'remainAmt': str(order.amount - order.filled_amount), 'execAmt': str(order.filled_amount),
+                'orderCreateTime': order.created_at, 'lastActTime': self.now()}
+
+    def get_order(self, order_id=None, client_order_id=None):
+        with self.lock:
+            order = self.orders.get(int(order_id)) if order_id is not None else \
+                self.client_orders.get(client_order_id)
+        if order is None:
+            raise ExchangeError('base-record-invalid', 'record invalid')
+        return order
+
+    def cancel_order(self, order_id=None, client_order_id=None):
+        """Cancel an open order, returning it and the event of its cancellation."""
+        with self.lock:
+            order = self.get_order(order_id, client_order_id)
+            if order.state in FINISHED_STATES:
+                raise ExchangeError('order-orderstate-error', f'the order state is error: {order.state}')
+            pair = self.pairs[order.symbol]
+            remaining = order.amount - order.filled_amount
+            currency, frozen = (pair.base, remaining * order.price) if order.is_buy else (pair.target, remaining)
+            self.frozen[currency] -= frozen
+            self.balance[currency] += frozen
+            order.state = OrderState.PARTIAL_CANCELED if order.filled_amount else OrderState.CANCELED
+            order.canceled_at = order.finished_at = self.now()
+            self.open_orders[order.symbol].pop(order.id, None)
+            self.engine.cancel(order.id)
+            return order, [('order', order.symbol, self.get_order_event(order, 'cancellation'))]
+
+    def get_open_orders(self, symbol=None):
+        with self.lock:
+            symbols = [symbol] if symbol else list(self.open_orders)
+            return [order for symbol in symbols for order in self.open_orders.get(symbol, {}).values()]
@@ -0,0 +1,583 @@
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import utils
+from .exchange import ExchangeError
+from .websocket import WebSocketConnection, get_accept_key, OPCODE_TEXT
+
+# websocket paths of the market data, gzip V1 frames, and of the authenticated V2 trading channels
+MARKET_PATHS = ('/ws', '/api/ws', '/feed')
+TRADING_PATH = '/ws/v2'
+# REST paths checked against the API keys of the server
+SIGNED_PREFIXES = ('/v1/order/', '/v1/account/', '/v2/account/')
+MARKET_CHANNEL = re.compile(r'^market\.([a-z0-9]+)\.(kline\.(?:1min|5min|15min|30min|60min|4hour|1day)|trade\.detail|depth\.step[0-5]|bbo|detail|mbp\.(?:5|20|150|400)|mbp\.refresh\.(?:5|10|20))$')
+DEPTH_LEVELS = 20
+
+
+def dumps(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+def verify_signature(secret_key, method, host, path, params, signature):
+    """Check a signature of huobi.utils.api_signature or api_signature_v2 computed over the other params."""
+    query = '&'.join('%s=%s' % (key, urllib.parse.quote(str(params[key]), safe='')) for key in sorted(params))
+    payload = '%s\n%s\n%s\n%s' % (method, host, path, query)
+    expected = base64.b64encode(hmac.new(secret_key.encode('utf-8'), msg=payload.encode('utf-8'),
+                                         digestmod=hashlib.sha256).digest()).decode()
+    return hmac.compare_digest(expected, signature or '')
+
+
+class MockExchangeServer(object):
+    def __init__(self, exchange, host='127.0.0.1', port=0, api_keys=None, rest_latency=0.0, ws_latency=0.0,
+                 error_rate=0.0, message_rate=10.0, ping_interval=5.0, seed=None):
+        """Local stand-in of the Huobi REST and websocket APIs used by the SDK clients, for load and latency tests.
+
+        Point the clients at url and ws_url, e.g. TradeClient(api_key=..., secret_key=..., url=server.url) and
+        MarketClient(url=server.ws_url) for the subscriptions. Market channels are pushed in gzip V1 frames at
+        message_rate, the orders and trade clearing V2 channels on every order event of the exchange. The MBP
+        increments of market.<symbol>.mbp.<levels> chain their seqNum to prevSeqNum and a req of the channel returns
+        the book they apply to, like the exchange.
+
+        exchange -- mock_exchange.MockExchange holding the accounts, orders and prices
+        host, port -- address to listen on; port 0 picks a free port
+        api_keys -- dict of the secret key of every API key checked against the signatures; any key is accepted if
+                    None
+        rest_latency -- seconds every REST response is delayed by
+        ws_latency -- seconds every websocket frame is delayed by
+        error_rate -- share of the REST requests answered with an error
+        message_rate -- price steps per second, each pushing an update on every subscribed market channel
+        ping_interval -- seconds between the pings sent on every websocket; never pinged if None
+        seed -- seed of the injected errors and of the generated market data
+        """
+        self.exchange = exchange
+        self.host = host
+        self.port = port
+        self.api_keys = api_keys
+        self.rest_latency = rest_latency
+        self.ws_latency = ws_latency
+        self.error_rate = error_rate
+        self.message_rate = message_rate
+        self.ping_interval = ping_interval
+        self.rng = np.random.default_rng(seed)
+        self.routes = [
+            ('GET', re.compile(r'/v1/common/timestamp'), self.get_timestamp),
+            ('GET', re.compile(r'/v1/common/symbols'), self.get_symbols),
+            ('GET', re.compile(r'/market/history/kline'), self.get_candlestick),
+            ('GET', re.compile(r'/market/trade'), self.get_market_trade),
+            ('GET', re.compile(r'/market/detail/merged'), self.get_market_detail_merged),
+            ('GET', re.compile(r'/market/depth'), self.get_price_depth),
+            ('GET', re.compile(r'/v1/account/accounts'), self.get_accounts),
+            ('GET', re.compile(r'/v1/account/accounts/(\d+)/balance'), self.get_balance),
+            ('GET', re.compile(r'/v1/order/orders/getClientOrder'), self.get_client_order),
+            ('GET', re.compile(r'/v1/order/orders/(\d+)'), self.get_order),
+            ('GET', re.compile(r'/v1/order/openOrders'), self.get_open_orders),
+            ('POST', re.compile(r'/v1/order/orders/place'), self.place_order),
+            ('POST', re.compile(r'/v1/order/batch-orders'), self.place_batch_orders),
+            ('POST', re.compile(r'/v1/order/orders/(\d+)/submitcancel'), self.cancel_order),
+            ('POST', re.compile(r'/v1/order/orders/submitCancelClientOrder'), self.cancel_client_order),
+            ('POST', re.compile(r'/v1/order/orders/batchcancel'), self.cancel_orders),
+        ]
+        self.failures = []
+        self.subscribers = {}
+        self.connections = set()
+        self.candles = {}
+        # Key: (symbol, levels), Value: the seqNum, bids and asks of the MBP book pushed in increments
+        self.mbp_books = {}
+        self.rest_requests = 0
+        self.rest_errors = 0
+        self.market_messages = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.server = None
+        self.threads = []
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def ws_url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.headers.get('Upgrade', '').lower() == 'websocket':
+                    server.handle_websocket(self)
+                else:
+                    server.handle_rest(self, 'GET')
+
+            def do_POST(self):
+                server.handle_rest(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.stopped.clear()
+        self.threads = [threading.Thread(target=self.server.serve_forever, name='mock-exchange', daemon=True),
+                        threading.Thread(target=self.run_market, name='mock-exchange-market', daemon=True)]
+        if self.ping_interval:
+            self.threads.append(threading.Thread(target=self.run_pings, name='mock-exchange-ping', daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        for connection in list(self.connections):
+            connection.close()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def fail_next(self, count=1, err_code='mock-error', err_msg='injected error', path=None):
+        """Answer the next count REST requests, of the path if given, with an error."""
+        with self.lock:
+            self.failures.append([count, err_code, err_msg, path])
+
+    def drop_connections(self):
+        """Drop every websocket without a close frame, like a lost network, so that the clients reconnect."""
+        for connection in list(self.connections):
+            connection.abort()
+
+    def stats(self):
+        return {'rest_requests': self.rest_requests, 'rest_errors': self.rest_errors,
+                'ws_connections': len(self.connections), 'market_messages': self.market_messages,
+                'sent_frames': sum(connection.sent_frames for connection in list(self.connections))}
+
+    # REST
+
+    def get_injected_error(self, path):
+        with self.lock:
+            for failure in self.failures:
+                if failure[3] is None or failure[3] == path:
+                    failure[0] -= 1
+                    if failure[0] <= 0:
+                        self.failures.remove(failure)
+                    return failure[1], failure[2]
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return 'mock-error', 'injected error'
+        return None
+
+    def handle_rest(self, handler, method):
+        start_time = time.perf_counter()
+        parsed = urllib.parse.urlparse(handler.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+        length = int(handler.headers.get('Content-Length') or 0)
+        data = handler.rfile.read(length) if length else None
+        self.rest_requests += 1
+        try:
+            # a malformed body is answered as an invalid parameter, like the other errors of the request
+            body = json.loads(data) if data else None
+            error = self.get_injected_error(parsed.path)
+            if error is not None:
+                raise ExchangeError(*error)
+            if parsed.path.startswith(SIGNED_PREFIXES):
+                self.check_signature(method, handler.headers.get('Host', self.host), parsed.path, params)
+            for route_method, pattern, route in self.routes:
+                match = pattern.fullmatch(parsed.path)
+                if match is not None and route_method == method:
+                    response = route(params, body, *match.groups())
+                    break
+            else:
+                raise ExchangeError('invalid-parameter', f'invalid path {parsed.path}')
+        except ExchangeError as e:
+            self.rest_errors += 1
+            response = {'status': 'error', 'err-code': e.err_code, 'err-msg': e.err_msg, 'data': None}
+        except (KeyError, TypeError, ValueError, NotImplementedError) as e:
+            self.rest_errors += 1
+            response = {'status': 'error', 'err-code': 'invalid-parameter', 'err-msg': str(e), 'data': None}
+        data = dumps(response).encode()
+        delay = self.rest_latency - (time.perf_counter() - start_time)
+        if delay > 0:
+            time.sleep(delay)
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def check_signature(self, method, host, path, params):
+        if self.api_keys is None:
+            return
+        params = dict(params)
+        signature = params.pop('Signature', None)
+        secret_key = self.api_keys.get(params.get('AccessKeyId'))
+        if secret_key is None or not verify_signature(secret_key, method, host.split(':')[0], path, params,
+                                                      signature):
+            raise ExchangeError('api-signature-not-valid', 'Signature not valid: Verification failure')
+
+    @staticmethod
+    def ok(data):
+        return {'status': 'ok', 'data': data}
+
+    def ok_tick(self, ch, tick):
+        return {'status': 'ok', 'ch': ch, 'ts': self.exchange.now(), 'tick': tick}
+
+    def get_timestamp(self, params, body):
+        return self.ok(self.exchange.now())
+
+    def get_symbols(self, params, body):
+        return self.ok([{'symbol': symbol, 'base-currency': pair.target, 'quote-currency': pair.base,
+                         'price-precision': pair.price_scale, 'amount-precision': pair.amount_scale,
+                         'min-order-value': pair.min_order_value, 'state': pair.state}
+                        for symbol, pair in ((symbol, self.exchange.get_pair(symbol))
+                                             for symbol in self.exchange.prices)])
+
+    def get_candlestick(self, params, body):
+        symbol = params['symbol']
+        period = params['period']
+        size = int(params.get('size', 150))
+        seconds = utils.get_seconds_of_candlestick_interval(period)
+        price = self.exchange.prices[symbol]
+        now = int(time.time()) // seconds * seconds
+        # a random walk ending at the last price, newest first like the exchange
+        closes = price * np.exp(np.cumsum(self.rng.normal(0, self.exchange.volatility * 10, size)))
+        closes[0] = price
+        candles = []
+        for i, close in enumerate(closes):
+            open_price = closes[i + 1] if i + 1 < size else close
+            candles.append({'id': now - i * seconds, 'open': open_price, 'close': close,
+                            'high': max(open_price, close), 'low': min(open_price, close),
+                            'amount': float(self.rng.exponential(10)), 'vol': float(self.rng.exponential(10) * close),
+                            'count': int(self.rng.integers(1, 100))})
+        return {'status': 'ok', 'ch': f'market.{symbol}.kline.{period}', 'ts': self.exchange.now(),
+                'data': candles}
+
+    def get_market_trade(self, params, body):
+        symbol = params['symbol']
+        return self.ok_tick(f'market.{symbol}.trade.detail', self.make_trade_tick(symbol))
+
+    def get_market_detail_merged(self, params, body):
+        symbol = params['symbol']
+        tick = self.make_detail_tick(symbol)
+        bids, asks = self.make_depth(symbol, 1)
+        tick.update({'bid': bids[0], 'ask': asks[0]})
+        return self.ok_tick(f'market.{symbol}.detail.merged', tick)
+
+    def get_price_depth(self, params, body):
+        symbol = params['symbol']
+        bids, asks = self.make_depth(symbol, int(params.get('depth', DEPTH_LEVELS)))
+        return self.ok_tick(f'market.{symbol}.depth.{params.get("type", "step0")}',
+                            {'ts': self.exchange.now(), 'version': self.exchange.now(), 'bids': bids, 'asks': asks})
+
+    def get_accounts(self, params, body):
+        return self.ok([{'id': self.exchange.account_id, 'type': 'spot', 'subtype': '', 'state': 'working'}])
+
+    def get_balance(self, params, body, account_id):
+        if int(account_id) != self.exchange.account_id:
+            raise ExchangeError('account-frozen-account-inexistent-error', f'account {account_id} not found')
+        return self.ok({'id': self.exchange.account_id, 'type': 'spot', 'state': 'working',
+                        'list': self.exchange.get_balance_list()})
+
+    def get_order(self, params, body, order_id):
+        return self.ok(self.exchange.get_order(order_id).to_dict())
+
+    def get_client_order(self, params, body):
+        return self.ok(self.exchange.get_order(client_order_id=params['clientOrderId']).to_dict())
+
+    def get_open_orders(self, params, body):
+        orders = self.exchange.get_open_orders(params.get('symbol'))
+        side = params.get('side')
+        if side:
+            orders = [order for order in orders if order.is_buy == (side == 'buy')]
+        return self.ok([order.to_dict() for order in orders[:int(params.get('size', 100))]])
+
+    def create_order(self, order_config):
+        order, events = self.exchange.create_order(
+            order_config['account-id'], order_config['symbol'], order_config['type'], order_config['amount'],
+            order_config.get('price'), order_config.get('client-order-id'), order_config.get('source', 'api'))
+        self.publish_order_events(events)
+        return order
+
+    def place_order(self, params, body):
+        return self.ok(str(self.create_order(body).id))
+
+    def place_batch_orders(self, params, body):
+        results = []
+        for order_config in body:
+            try:
+                order = self.create_order(order_config)
+                results.append({'order-id': order.id, 'client-order-id': order.client_order_id})
+            except ExchangeError as e:
+                results.append({'client-order-id': order_config.get('client-order-id', ''),
+                                'err-code': e.err_code, 'err-msg': e.err_msg})
+        return self.ok(results)
+
+    def cancel_order(self, params, body, order_id):
+        order, events = self.exchange.cancel_order(order_id)
+        self.publish_order_events(events)
+        return self.ok(str(order.id))
+
+    def cancel_client_order(self, params, body):
+        order, events = self.exchange.cancel_order(client_order_id=body['client-order-id'])
+        self.publish_order_events(events)
+        return self.ok(order.id)
+
+    def cancel_orders(self, params, body):
+        success, failed = [], []
+        for order_id in body.get('order-ids', []):
+            try:
+                self.cancel_order(params, body, order_id)
+                success.append(str(order_id))
+            except ExchangeError as e:
+                failed.append({'order-id': str(order_id), 'err-code': e.err_code, 'err-msg': e.err_msg})
+        return self.ok({'success': success, 'failed': failed})
+
+    # websockets
+
+    def handle_websocket(self, handler):
+        path = urllib.parse.urlparse(handler.path).path
+        key = handler.headers.get('Sec-WebSocket-Key')
+        if key is None or (path not in MARKET_PATHS and path != TRADING_PATH):
+            handler.send_error(404)
+            return
+        handler.send_response(101, 'Switching Protocols')
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', get_accept_key(key))
+        handler.end_headers()
+        handler.wfile.flush()
+        handler.close_connection = True
+        connection = WebSocketConnection(handler.connection, handler.rfile, handler.wfile, latency=self.ws_latency)
+        connection.is_market = path != TRADING_PATH
+        connection.authenticated = False
+        connection.channels = set()
+        connection.host = handler.headers.get('Host', self.host).split(':')[0]
+        self.connections.add(connection)
+        try:
+            while not self.stopped.is_set():
+                message = connection.receive()
+                if message is None:
+                    break
+                opcode, payload = message
+                try:
+                    dict_data = json.loads(payload if opcode == OPCODE_TEXT else gzip.decompress(payload))
+                except ValueError:
+                    continue
+                if connection.is_market:
+                    self.on_market_message(connection, dict_data)
+                else:
+                    self.on_trading_message(connection, dict_data)
+        finally:
+            self.connections.discard(connection)
+            with self.lock:
+                for ch in connection.channels:
+                    self.subscribers.get(ch, {}).pop(connection, None)
+            connection.close()
+            connection.join(timeout=1)
+
+    def subscribe(self, connection, ch):
+        with self.lock:
+            self.subscribers.setdefault(ch, {})[connection] = None
+            connection.channels.add(ch)
+
+    def unsubscribe(self, connection, ch):
+        with self.lock:
+            self.subscribers.get(ch, {}).pop(connection, None)
+            connection.channels.discard(ch)
+
+    @staticmethod
+    def send_market(connection, dict_data):
+        connection.send_binary(gzip.compress(dumps(dict_data).encode(), compresslevel=1))
+
+    def on_market_message(self, connection, dict_data):
+        ch = dict_data.get('sub') or dict_data.get('unsub') or dict_data.get('req')
+        if 'pong' in dict_data:
+            return
+        match = MARKET_CHANNEL.match(ch or '')
+        if match is None or match.group(1) not in self.exchange.prices:
+            self.send_market(connection, {'id': dict_data.get('id'), 'status': 'error', 'err-code': 'bad-request',
+                                          'err-msg': f'invalid topic {ch}', 'ts': self.exchange.now()})
+        elif 'sub' in dict_data:
+            self.subscribe(connection, ch)
+            self.send_market(connection, {'id': dict_data.get('id'), 'status': 'ok', 'subbed': ch,
+                                          'ts': self.exchange.now()})
+        elif 'unsub' in dict_data:
+            self.unsubscribe(connection, ch)
+            self.send_market(connection, {'id': dict_data.get('id'), 'status': 'ok', 'unsubbed': ch,
+                                          'ts': self.exchange.now()})
+        else:
+            self.send_market(connection, {'id': dict_data.get('id'), 'status': 'ok', 'rep': ch,
+                                          'ts': self.exchange.now(), 'data': self.make_market_tick(ch, True)})
+
+    def on_trading_message(self, connection, dict_data):
+        action = dict_data.get('action')
+        ch = dict_data.get('ch', '')
+        if action == 'pong':
+            return
+        if action == 'req' and ch == 'auth':
+            params = dict(dict_data.get('params') or {})
+            if self.check_auth(connection.host, params):
+                connection.authenticated = True
+                connection.send_text(dumps({'action': 'req', 'code': 200, 'ch': 'auth', 'data': {}}))
+            else:
+                connection.send_text(dumps({'action': 'req', 'code': 2002, 'ch': 'auth',
+                                                 'message': 'auth.fail'}))
+        elif action == 'sub':
+            if not connection.authenticated:
+                connection.send_text(dumps({'action': 'sub', 'code': 2002, 'ch': ch, 'message': 'auth.fail'}))
+            elif not ch.startswith(('orders#', 'trade.clearing#')):
+                connection.send_text(dumps({'action': 'sub', 'code': 2001, 'ch': ch, 'message': 'invalid.ch'}))
+            else:
+                self.subscribe(connection, ch)
+                connection.send_text(dumps({'action': 'sub', 'code': 200, 'ch': ch, 'data': {}}))
+
+    def check_auth(self, host, params):
+        if self.api_keys is None:
+            return True
+        secret_key = self.api_keys.get(params.get('accessKey'))
+        signature = params.pop('signature', None)
+        params.pop('authType', None)
+        return secret_key is not None and verify_signature(secret_key, 'GET', host, TRADING_PATH, params, signature)
+
+    def publish_order_events(self, events):
+        for kind, symbol, data in events:
+            if kind == 'order':
+                channels = (f'orders#{symbol}', 'orders#*')
+            else:
+                channels = tuple(f'trade.clearing#{market}{mode}' for market in (symbol, '*') for mode in ('', '#0',
+                                                                                                         '#1'))
+            for ch in channels:
+                subscribers = list(self.subscribers.get(ch, ()))
+                if subscribers:
+                    message = dumps({'action': 'push', 'ch': ch, 'data': data})
+                    for connection in subscribers:
+                        connection.send_text(message)
+
+    # market data
+
+    def make_depth(self, symbol, levels):
+        price = self.exchange.prices[symbol]
+        pair = self.exchange.get_pair(symbol)
+        spread = max(price * 1e-4, pair.price_step)
+        amounts = np.round(self.rng.exponential(1.0, 2 * levels), pair.amount_scale).tolist()
+        bids = [[round(price - spread * (i + 1), pair.price_scale), amounts[i]] for i in range(levels)]
+        asks = [[round(price + spread * (i + 1), pair.price_scale), amounts[levels + i]] for i in range(levels)]
+        return bids, asks
+
+    def make_trade_tick(self, symbol):
+        now = self.exchange.now()
+        trade_id = next(self.exchange.trade_ids)
+        return {'id': trade_id, 'ts': now, 'data': [{
+            'id': trade_id, 'ts': now, 'tradeId': trade_id, 'amount': self.exchange.volumes[symbol],
+            'price': self.exchange.prices[symbol], 'direction': 'buy' if self.rng.random() < 0.5 else 'sell'}]}
+
+    def make_candle(self, symbol, period):
+        price = self.exchange.prices[symbol]
+        seconds = utils.get_seconds_of_candlestick_interval(period)
+        candle_id = int(time.time()) // seconds * seconds
+        candle = self.candles.get((symbol, period))
+        if candle is None or candle['id'] != candle_id:
+            candle = self.candles[(symbol, period)] = {'id': candle_id, 'open': price, 'close': price,
+                                                       'low': price, 'high': price, 'amount': 0.0, 'vol': 0.0,
+                                                       'count': 0}
+        volume = self.exchange.volumes[symbol]
+        candle.update({'close': price, 'low': min(candle['low'], price), 'high': max(candle['high'], price),
+                       'amount': candle['amount'] + volume, 'vol': candle['vol'] + volume * price,
+                       'count': candle['count'] + 1})
+        return dict(candle)
+
+    def make_detail_tick(self, symbol):
+        candle = self.make_candle(symbol, '1day')
+        candle['ts'] = self.exchange.now()
+        return candle
+
+    def make_mbp_tick(self, symbol, topic, is_request):
+        levels = int(topic.rsplit('.', 1)[1])
+        if topic.startswith('mbp.refresh.'):
+            bids, asks = self.make_depth(symbol, levels)
+            return {'seqNum': self.market_messages, 'bids': bids, 'asks': asks}
+        with self.lock:
+            book = self.mbp_books.get((symbol, levels))
+            if book is None:
+                book = self.mbp_books[(symbol, levels)] = {'seqNum': 0, 'bids': {}, 'asks': {}}
+            if is_request:
+                return {'seqNum': book['seqNum'],
+                        'bids': [list(row) for row in sorted(book['bids'].items(), reverse=True)],
+                        'asks': [list(row) for row in sorted(book['asks'].items())]}
+            # the increment holds the levels changed since the previous one, the removed ones with amount 0
+            tick = {'seqNum': book['seqNum'] + 1, 'prevSeqNum': book['seqNum']}
+            for side, rows in zip(('bids', 'asks'), self.make_depth(symbol, levels)):
+                new_levels = dict(rows)
+                tick[side] = [[price, amount] for price, amount in rows if book[side].get(price) != amount] \
+                    + [[price, 0.0] for price in book[side] if price not in new_levels]
+                book[side] = new_levels
+            book['seqNum'] += 1
+            return tick
+
+    def make_market_tick(self, ch, is_request=False):
+        _, symbol, topic = ch.split('.', 2)
+        if topic.startswith('mbp.'):
+            return self.make_mbp_tick(symbol, topic, is_request)
+        if topic.startswith('kline.'):
+            return self.make_candle(symbol, topic[len('kline.'):])
+        if topic == 'trade.detail':
+            return self.make_trade_tick(symbol)
+        if topic == 'detail':
+            return self.make_detail_tick(symbol)
+        bids, asks = self.make_depth(symbol, 1 if topic == 'bbo' else DEPTH_LEVELS)
+        if topic == 'bbo':
+            return {'symbol': symbol, 'quoteTime': self.exchange.now(), 'bid': bids[0][0], 'bidSize': bids[0][1],
+                    'ask': asks[0][0], 'askSize': asks[0][1], 'seqId': self.market_messages}
+        return {'ts': self.exchange.now(), 'version': self.market_messages, 'bids': bids, 'asks': asks}
+
+    def publish_market(self):
+        with self.lock:
+            subscribed = [(ch, list(connections)) for ch, connections in self.subscribers.items()
+                          if connections and ch.startswith('market.')]
+        for ch, connections in subscribed:
+            frame = gzip.compress(dumps({'ch': ch, 'ts': self.exchange.now(),
+                                              'tick': self.make_market_tick(ch)}).encode(), compresslevel=1)
+            for connection in connections:
+                connection.send_binary(frame)
+            self.market_messages += 1
+
+    def run_market(self):
+        interval = 1.0 / self.message_rate
+        next_time = time.monotonic()
+        while not self.stopped.is_set():
+            self.publish_order_events(self.exchange.step())
+            self.publish_market()
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                self.stopped.wait(delay)
+            elif delay < -1:
+                # too far behind to catch up, e.g. after a pause of the process
+                next_time = time.monotonic()
+
+    def run_pings(self):
+        while not self.stopped.wait(self.ping_interval):
+            now = self.exchange.now()
+            for connection in list(self.connections):
+                if connection.is_market:
+                    self.send_market(connection, {'ping': now})
+                else:
+                    connection.send_text(dumps({'action': 'ping', 'data': {'ts': now}}))
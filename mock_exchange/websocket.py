@@ -0,0 +1,169 @@
+import base64
+import collections
+import hashlib
+import socket
+import struct
+import threading
+import time
+
+# RFC 6455
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def get_accept_key(key):
+    """Return the Sec-WebSocket-Accept answering the Sec-WebSocket-Key of a handshake."""
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+
+
+def unmask(payload, mask):
+    # XOR of the payload as one big integer, much faster than a loop over the bytes
+    n = len(payload)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+
+def encode_frame(opcode, payload):
+    """Encode an unmasked, unfragmented frame sent by a server."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return header + payload
+
+
+class WebSocketConnection(object):
+    def __init__(self, sock, rfile, wfile, latency=0.0, max_queued=100000):
+        """Server side of a websocket upgraded from an HTTP request.
+
+        Frames are sent by a thread of the connection, after the latency, so that a slow client doesn't stall the
+        thread publishing to every connection. Frames queued beyond max_queued drop the oldest ones.
+
+        sock -- socket of the request
+        rfile, wfile -- files reading and writing the socket
+        latency -- seconds every frame is delayed by before it is sent
+        max_queued -- max number of frames waiting to be sent
+        """
+        self.sock = sock
+        self.rfile = rfile
+        self.wfile = wfile
+        self.latency = latency
+        self.closed = False
+        self.sent_frames = 0
+        self.dropped_frames = 0
+        self.outbox = collections.deque(maxlen=max_queued)
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.send_loop, daemon=True)
+        self.thread.start()
+
+    def send(self, opcode, payload):
+        with self.condition:
+            if self.closed:
+                return False
+            if len(self.outbox) == self.outbox.maxlen:
+                self.dropped_frames += 1
+            self.outbox.append((time.monotonic() + self.latency, encode_frame(opcode, payload)))
+            self.condition.notify()
+        return True
+
+    def send_text(self, text):
+        return self.send(OPCODE_TEXT, text.encode('utf-8'))
+
+    def send_binary(self, data):
+        return self.send(OPCODE_BINARY, data)
+
+    def send_loop(self):
+        while True:
+            with self.condition:
+                while not self.outbox and not self.closed:
+                    self.condition.wait()
+                if not self.outbox:
+                    return
+                send_at, frame = self.outbox.popleft()
+            delay = send_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.wfile.write(frame)
+            except OSError:
+                self.abort()
+                return
+            self.sent_frames += 1
+
+    def read_exactly(self, n):
+        data = self.rfile.read(n)
+        if data is None or len(data) < n:
+            raise ConnectionError('websocket closed by the client')
+        return data
+
+    def read_frame(self):
+        first, second = self.read_exactly(2)
+        n = second & 0x7F
+        if n == 126:
+            n = struct.unpack('!H', self.read_exactly(2))[0]
+        elif n == 127:
+            n = struct.unpack('!Q', self.read_exactly(8))[0]
+        mask = self.read_exactly(4) if second & 0x80 else None
+        payload = self.read_exactly(n) if n else b''
+        if mask is not None and payload:
+            payload = unmask(payload, mask)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    def receive(self):
+        """Return the (opcode, payload) of the next text or binary message, or None once the websocket is closed.
+
+        Pings are answered and fragmented messages are joined.
+        """
+        fragments = []
+        message_opcode = None
+        while not self.closed:
+            try:
+                fin, opcode, payload = self.read_frame()
+            except (ConnectionError, OSError, ValueError):
+                self.abort()
+                return None
+            if opcode == OPCODE_PING:
+                self.send(OPCODE_PONG, payload)
+            elif opcode == OPCODE_PONG:
+                pass
+            elif opcode == OPCODE_CLOSE:
+                self.close(payload[:2] if len(payload) >= 2 else b'')
+                return None
+            else:
+                if opcode != OPCODE_CONTINUATION:
+                    message_opcode = opcode
+                fragments.append(payload)
+                if fin:
+                    return message_opcode, b''.join(fragments)
+        return None
+
+    def close(self, status=struct.pack('!H', 1000)):
+        """Send a close frame after the queued frames and stop sending."""
+        with self.condition:
+            if self.closed:
+                return
+            self.outbox.append((time.monotonic() + self.latency, encode_frame(OPCODE_CLOSE, status)))
+            self.closed = True
+            self.condition.notify()
+
+    def abort(self):
+        """Drop the connection without a close frame, like a lost network."""
+        with self.condition:
+            self.closed = True
+            self.outbox.clear()
+            self.condition.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
@@ -109,7 +109,7 @@ class BollingerTrackerStrategy(SinglePairStrategy, RunnableStrategy):
             self.last_triggered = time
 
     def start_impl(self, price=None):
-        self.trader.add_trade_clearing_subscription(self.symbol, self.handle_trade_clear)
+        self.subscription = self.trader.add_trade_clearing_subscription(self.symbol, self.handle_trade_clear)
         self.newest_price = price
         self.initial_total_asset_in_base = self.get_total_asset(in_base=True)
         self.initial_price = price
@@ -120,7 +120,9 @@ class BollingerTrackerStrategy(SinglePairStrategy, RunnableStrategy):
         self.last_triggered = self.trader.get_time()
 
     def stop(self):
-        self.trader.remove_trade_clearing_subscription(self.subscription)
+        if self.subscription is not None:
+            self.trader.remove_trade_clearing_subscription(self.subscription)
+            self.subscription = None
         self.trader.cancel_orders(self.symbol, [order.order_id for order in self.buy_orders])
         self.trader.cancel_orders(self.symbol, [order.order_id for order in self.sell_orders])
         super().stop()
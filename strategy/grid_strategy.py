@@ -114,11 +114,11 @@ class GridStrategy(SinglePairStrategy, RunnableStrategy):
         if assumed_asset > self.base_asset:
             diff = assumed_asset - self.base_asset
             amount = diff / self.newest_price
-            if amount > 10 ** (-self.pair.amount_scale):
+            if amount > self.pair.amount_step:
                 self.create_order(None, OrderType.SELL_MARKET, amount)
         elif assumed_asset < self.base_asset:
             amount = self.base_asset - assumed_asset
-            if amount > 10 ** (-self.pair.price_scale):
+            if amount > self.pair.price_step:
                 self.create_order(None, OrderType.BUY_MARKET, amount)
 
     def get_newest_grid(self):
@@ -202,7 +202,7 @@ class GridStrategy(SinglePairStrategy, RunnableStrategy):
         self.prev_grid = curr_grid
 
     def start_impl(self, price=None):
-        self.trader.add_trade_clearing_subscription(self.symbol, self.handle_trade_clear, None)
+        self.subscription = self.trader.add_trade_clearing_subscription(self.symbol, self.handle_trade_clear, None)
         self.newest_price = price
         self.initial_total_asset_in_base = self.get_total_asset(in_base=True)
         self.initial_price = price
@@ -237,10 +237,13 @@ class GridStrategy(SinglePairStrategy, RunnableStrategy):
             time.sleep(self.interval)
 
     def stop(self, sell_at_market_price=False):
-        self.trader.remove_trade_clearing_subscription()
+        if self.subscription is not None:
+            self.trader.remove_trade_clearing_subscription(self.subscription)
+            self.subscription = None
         if sell_at_market_price:
             self.create_order(None, OrderType.SELL_MARKET, self.target_asset)
-        self.logger.info('Stopping grid strategy')
+        if self.enable_logger:
+            self.logger.info('Stopping grid strategy')
         order_list = [order_id for order_id in (self.curr_sell_order_id, self.curr_buy_order_id) if order_id]
         if order_list:
             self.cancel_orders(order_list)
@@ -4,6 +4,14 @@ import time
 import warnings
 
 from strategy import BaseStrategy
+from huobi.utils.metrics import metrics_registry
+
+strategy_feed_seconds = metrics_registry.histogram('strategy_feed_duration_seconds',
+                                                   'Duration of the price fetch and feed of the strategy loops',
+                                                   ['strategy'])
+strategy_feed_errors = metrics_registry.counter('strategy_feed_errors_total',
+                                                'Iterations of the strategy loops that failed to read the price',
+                                                ['strategy'])
 
 
 class RunnableStrategy(BaseStrategy, abc.ABC):
@@ -35,16 +43,27 @@ class RunnableStrategy(BaseStrategy, abc.ABC):
         self._started = True
 
     def run(self):
+        feed_seconds = strategy_feed_seconds.labels(type(self).__name__)
         while True:
             self.exit.wait(self.interval)
             if self._stopped:
                 break
+            start_time = time.perf_counter()
+            order_tracer = getattr(self.trader, 'order_tracer', None)
             try:
                 newest_price = self.trader.get_newest_price(self.symbol)
+                if order_tracer is not None:
+                    # the orders placed while feeding the price are decided on it
+                    order_tracer.mark_decision()
                 self.feed(newest_price)
             except RuntimeError:
+                strategy_feed_errors.labels(type(self).__name__).inc()
                 if self.enable_logger:
                     self.logger.error('Unable to read the newest price from the trader')
+            finally:
+                if order_tracer is not None:
+                    order_tracer.clear_decision()
+            feed_seconds.observe(time.perf_counter() - start_time)
         if self.enable_logger:
             self.logger.info('Strategy successfully stopped')
 
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from huobi.constant import *
+
+from trader import BacktestTrader
+from strategy.grid_strategy import GridStrategy
+import utils
+
+
+class AnalyticsTest(unittest.TestCase):
+    def test_drawdown(self):
+        equity = np.array([[100, 110, 99, 105, 121, 120],
+                           [100, 90, 80, 70, 60, 50]], dtype=float)
+        np.testing.assert_allclose(utils.analytics.max_drawdown(equity), [0.1, 0.5])
+        np.testing.assert_array_equal(utils.analytics.max_drawdown_duration(equity), [2, 5])
+        np.testing.assert_array_equal(utils.analytics.max_drawdown_duration(equity, times=np.arange(6) * 60),
+                                      [120, 300])
+
+    def test_aggregate_runs_matches_single_runs(self):
+        equities = utils.gbm_paths(1000, 50, 100, 1, sigma=0.01, seed=0)
+        times = np.arange(101) * 3600
+        table = utils.aggregate_runs(equities, times)
+        self.assertEqual(len(table), 50)
+        for i in (0, 17, 49):
+            metrics = utils.performance_metrics(equities[i], times)
+            for name in ('sharpe', 'sortino', 'max_drawdown', 'max_drawdown_duration', 'annualized_return'):
+                self.assertAlmostEqual(table[name][i], metrics[name][0])
+        returns = equities[0, 1:] / equities[0, :-1] - 1
+        self.assertAlmostEqual(table['sharpe'][0], returns.mean() / returns.std() * np.sqrt(365 * 24))
+        self.assertEqual(len(utils.format_table(table).splitlines()), 51)
+
+    def test_report_from_trader(self):
+        symbol = 'ethusdt'
+        trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {symbol: 2550}, init_time=0, equity_quote='usdt')
+        strategy = GridStrategy(trader, symbol, 0, 1000, 2000, 3000, 10, enable_logger=False, interval=None)
+        strategy.start(2550)
+        for timestamp, price in enumerate([2450, 2350, 2450, 2550, 2650, 2550], 1):
+            trader.feed({symbol: price}, timestamp=timestamp * 60)
+            strategy.feed(price)
+        report = utils.BacktestReport.from_trader(trader, grids=strategy.grids)
+        fills = trader.fill_log()
+        self.assertEqual(report.metrics['num_fills'], len(fills))
+        self.assertAlmostEqual(report.metrics['fee_drag'], fills['fee'].sum() / 1000)
+        self.assertEqual(report.grid_stats['buys'].sum() + report.grid_stats['sells'].sum(), len(fills))
+        self.assertEqual(report.grid_stats['buys'][4], 1)
+        self.assertEqual(report.grid_stats['sells'][5], 1)
+        self.assertIn('sharpe', report.to_table())
+
+        # the fees in usdt don't compare to an equity in eth
+        trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {symbol: 2550}, init_time=0, equity_quote='eth')
+        trader.create_order(symbol, None, OrderType.BUY_MARKET, 100)
+        with self.assertRaises(ValueError):
+            utils.BacktestReport.from_trader(trader)
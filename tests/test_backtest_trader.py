@@ -1,4 +1,4 @@
-from trader import BacktestTrader
+from trader import BacktestTrader, MatchingEngine
 from huobi.constant import *
 
 import unittest
@@ -49,6 +49,24 @@ class BacktestTraderTest(unittest.TestCase):
         order = trader.get_order(order_id)
         self.assertTrue(order.state == OrderState.FILLED)
 
+    def test_matching_engine(self):
+        symbol = 'ethusdt'
+        trader = BacktestTrader({'usdt': 100, 'eth': 0.1}, {symbol: 2000}, matching_engine=MatchingEngine(0.002))
+        fills = []
+        trader.add_trade_clearing_subscription(symbol, lambda event: fills.append(event.data.tradeVolume))
+        first_id, second_id = trader.submit_orders(symbol, [1900, 1900], [0.02, 0.02], OrderType.BUY_LIMIT)
+        # the older order of the price fills first, partially up to the traded volume
+        trader.feed({symbol: 1900}, volumes={symbol: 0.025})
+        self.assertEqual(trader.get_order(first_id).state, OrderState.FILLED)
+        self.assertEqual(trader.get_order(second_id).state, OrderState.PARTIAL_FILLED)
+        self.assertAlmostEqual(trader.get_balance('eth'), 0.1 + 0.025 * 0.998, 6)
+        # amounts are corrected down by the amount step, 0.0001 eth
+        self.assertAlmostEqual(fills[1], 0.025 - 0.0199)
+        trader.cancel_orders(symbol, [second_id])
+        self.assertEqual(trader.get_order(second_id).state, OrderState.PARTIAL_CANCELED)
+        trader.feed({symbol: 1800})
+        self.assertEqual(len(trader.fill_log()), 2)
+
     def test_cancel(self):
         symbol = 'ethusdt'
         trader = BacktestTrader({'usdt': 100, 'eth': 0.1}, {symbol: 2000})
@@ -0,0 +1,30 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.run_benchmarks import compare, main, run_suites
+
+
+class BenchmarksTest(unittest.TestCase):
+    def test_compare(self):
+        rows, regressions = compare({'a': 1.0, 'b': 2.5, 'c': 1.0}, {'a': 1.0, 'b': 2.0}, threshold=0.1)
+        self.assertEqual(rows, [('a', 1.0, 1.0, 1.0), ('b', 2.0, 2.5, 1.25)])
+        self.assertEqual(regressions, ['b'])
+        with self.assertRaises(ValueError):
+            run_suites(['unknown'])
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            self.assertEqual(main(['--quick', '--only', 'signature,stream_aggr', '--output', path]), 0)
+            with open(path) as file:
+                report = json.load(file)
+            self.assertIn('signature.get', report['results'])
+            self.assertIn('stream_aggr.feed.900s', report['results'])
+            # the same results never regress
+            self.assertEqual(main(['--quick', '--only', 'signature', '--compare', path, '--threshold', '1e9']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from huobi.connection.impl.callback_queue import CallbackQueue, get_callback_queue_stats
+from huobi.constant import *
+
+from test_websocket_manage import make_manage, make_frame
+
+
+class Event(object):
+    def __init__(self, ch, ts):
+        self.ch = ch
+        self.ts = ts
+
+
+class BlockedCallback(object):
+    def __init__(self):
+        self.updates = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, update):
+        self.started.set()
+        self.release.wait(5)
+        self.updates.append(update)
+
+
+class CallbackQueueTest(unittest.TestCase):
+    def test_drop_oldest(self):
+        callback = BlockedCallback()
+        queue = CallbackQueue(callback, CallbackQueuePolicy.DROP_OLDEST, max_size=2, name='drop')
+        queue.put(0)
+        callback.started.wait(5)
+        for i in range(1, 5):
+            queue.put(i)
+        self.assertEqual(get_callback_queue_stats()['drop'],
+                         {'depth': 2, 'max_depth': 2, 'delivered': 0, 'failed': 0, 'dropped': 2,
+                          'conflated': 0})
+        callback.release.set()
+        queue.close(timeout=5)
+        self.assertEqual(callback.updates, [0, 3, 4])
+        self.assertFalse(queue.put(5))
+        self.assertNotIn('drop', get_callback_queue_stats())
+
+    def test_conflate(self):
+        callback = BlockedCallback()
+        queue = CallbackQueue(callback, CallbackQueuePolicy.CONFLATE, max_size=2)
+        queue.put(Event('market.btcusdt.bbo', 0))
+        callback.started.wait(5)
+        for ts, ch in enumerate(['market.btcusdt.bbo', 'market.ethusdt.bbo', 'market.btcusdt.bbo',
+                                 'market.eosusdt.bbo'], 1):
+            queue.put(Event(ch, ts))
+        # the newer btcusdt update keeps the place of the one it replaced, so it's the oldest when eosusdt comes
+        self.assertEqual((queue.depth, queue.conflated, queue.dropped), (2, 1, 1))
+        callback.release.set()
+        queue.close(timeout=5)
+        self.assertEqual([(event.ch, event.ts) for event in callback.updates],
+                         [('market.btcusdt.bbo', 0), ('market.ethusdt.bbo', 2), ('market.eosusdt.bbo', 4)])
+
+    def test_block(self):
+        callback = BlockedCallback()
+        queue = CallbackQueue(callback, CallbackQueuePolicy.BLOCK, max_size=1)
+        queue.put(0)
+        callback.started.wait(5)
+        queue.put(1)
+        producer = threading.Thread(target=queue.put, args=(2,))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        callback.release.set()
+        producer.join(5)
+        queue.close(timeout=5)
+        self.assertEqual(callback.updates, [0, 1, 2])
+
+    def test_raising_error_handler(self):
+        updates = []
+
+        def callback(update):
+            if update == 0:
+                raise ValueError('callback error')
+            updates.append(update)
+
+        error_handler = MagicMock(side_effect=RuntimeError('handler error'))
+        queue = CallbackQueue(callback, CallbackQueuePolicy.BLOCK, max_size=1, error_handler=error_handler)
+        for i in range(3):
+            producer = threading.Thread(target=queue.put, args=(i,))
+            producer.start()
+            producer.join(5)
+            self.assertFalse(producer.is_alive())
+        queue.close(timeout=5)
+        self.assertEqual(updates, [1, 2])
+        self.assertEqual(error_handler.call_count, 1)
+        self.assertEqual((queue.delivered, queue.failed), (2, 1))
+
+    def test_websocket_manage(self):
+        manage = make_manage()
+        done = threading.Event()
+        manage.request.update_callback.side_effect = lambda update: done.set() if update['ts'] == 2 else 1 / 0
+        manage.callback_queue = CallbackQueue(manage.deliver, CallbackQueuePolicy.DROP_OLDEST,
+                                              error_handler=manage.request.error_handler)
+        manage.on_message(make_frame({'ch': 'market.ethusdt.bbo', 'ts': 1, 'tick': {}}))
+        manage.on_message(make_frame({'ch': 'market.ethusdt.bbo', 'ts': 2, 'tick': {}}))
+        self.assertTrue(done.wait(5))
+        manage.callback_queue.close(timeout=5)
+        self.assertEqual(manage.request.update_callback.call_count, 2)
+        self.assertEqual(manage.request.error_handler.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
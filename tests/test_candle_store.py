@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from huobi.constant import *
+from huobi.model.market import Candlestick
+
+from trader import BacktestTrader
+from utils import CandleStore
+
+
+def make_candles(ids, close=None):
+    candles = []
+    for i in ids:
+        candle = Candlestick()
+        candle.id = i
+        candle.open = candle.low = float(i)
+        candle.close = candle.high = float(i if close is None else close)
+        candle.amount = candle.vol = 1.0
+        candle.count = 1
+        candles.append(candle)
+    return candles
+
+
+class CandleStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_append(self):
+        self.assertIsNone(self.store.last_id('ethusdt', '1min'))
+        self.assertEqual(len(self.store.get('ethusdt', '1min')['id']), 0)
+        self.assertEqual(self.store.append('ethusdt', '1min', make_candles([180, 60, 120, 120])), 3)
+        # older candles are skipped and the newest stored one is replaced
+        self.assertEqual(self.store.append('ethusdt', '1min', make_candles([60, 180, 240], close=0)), 1)
+        columns = self.store.load('ethusdt', '1min')
+        np.testing.assert_array_equal(columns['id'], [60, 120, 180, 240])
+        np.testing.assert_array_equal(columns['close'], [60, 120, 0, 0])
+        self.assertEqual(self.store.last_id('ethusdt', '1min'), 240)
+        self.assertEqual(self.store.keys(), {'ethusdt': ['1min']})
+
+        store = CandleStore(self.dir.name)
+        self.assertEqual(store.count('ethusdt', '1min'), 4)
+        self.assertEqual(store.append('ethusdt', '1min', {name: columns[name][:1] for name in columns}), 0)
+
+    def test_get(self):
+        self.store.append('ethusdt', '1min', make_candles(range(0, 6000, 60)))
+        candles = self.store.get('ethusdt', '1min', 600, 1200)
+        np.testing.assert_array_equal(candles['id'], np.arange(600, 1200, 60))
+        self.assertIsInstance(candles['close'].base, np.memmap)
+        candles = self.store.get_last('ethusdt', '1min', 3, end=630)
+        np.testing.assert_array_equal(candles['id'], [480, 540, 600])
+
+    def test_backtest_previous_prices(self):
+        self.store.append('ethusdt', CandlestickInterval.MIN1, make_candles(range(0, 6000, 60)))
+        trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {'ethusdt': 2500}, init_time=3000,
+                                candle_store=self.store)
+        prices = list(trader.get_previous_prices('ethusdt', CandlestickInterval.MIN1, 10))
+        self.assertEqual(prices[0], (2400, 2400.0))
+        self.assertEqual(prices[-1], (2940, 2940.0))
+        # not enough history in the store
+        prices = list(trader.get_previous_prices('ethusdt', CandlestickInterval.MIN1, 100))
+        self.assertEqual(len(prices), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
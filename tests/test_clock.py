@@ -0,0 +1,44 @@
+import time
+import unittest
+
+from huobi.constant import *
+
+from trader import BacktestTrader
+from utils import SimulatedClock, StreamAggr
+
+
+class SimulatedClockTest(unittest.TestCase):
+    def test_advance(self):
+        clock = SimulatedClock(100)
+        self.assertEqual(clock.now(), 100)
+        self.assertEqual(clock.now(), 100)
+        clock.advance_to(105)
+        clock.advance(2)
+        self.assertEqual(clock.now(), 107)
+        self.assertRaises(ValueError, clock.advance_to, 106)
+
+    def test_replay_speed(self):
+        events = [(t, None) for t in range(0, 11)]
+        start = time.monotonic()
+        list(SimulatedClock(0).replay(events))
+        self.assertLess(time.monotonic() - start, 0.05)
+        start = time.monotonic()
+        replayed = list(SimulatedClock(0, speed=100).replay(events))
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual([t for t, _ in replayed], list(range(0, 11)))
+
+    def test_shared_by_trader_and_aggregator(self):
+        symbol = 'ethusdt'
+        clock = SimulatedClock(1000)
+        trader = BacktestTrader({'usdt': 100, 'eth': 0.1}, {symbol: 2000}, clock=clock)
+        aggr = StreamAggr(window_size=10)
+        for timestamp, price in ((1000, 2000), (1005, 2010), (1020, 1990)):
+            trader.feed({symbol: price}, timestamp=timestamp)
+            self.assertEqual(trader.get_time(), timestamp)
+            self.assertEqual(trader.get_time(), timestamp)
+            aggr.feed(trader.get_time(), price)
+        self.assertEqual(aggr.count(), 1)
+        order_id = trader.create_order(symbol, 1900, OrderType.BUY_LIMIT, 0.01)
+        trader.feed({symbol: 1800})
+        self.assertEqual(trader.get_order(order_id).created_at, 1020)
+        self.assertEqual(trader.get_order(order_id).finished_at, 1021)
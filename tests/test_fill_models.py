@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from huobi.constant import *
+
+from trader import BacktestTrader
+from trader.fill_models import ConstantLatency, LognormalLatency, Depth, QueuePositionModel, DepthSlippageModel
+
+
+class FillModelsTest(unittest.TestCase):
+    def test_latency(self):
+        self.assertEqual(ConstantLatency(0.2).sample(), 0.2)
+        samples = LognormalLatency(0.1, sigma=0.5, seed=0).sample(10000)
+        self.assertAlmostEqual(np.median(samples), 0.1, places=2)
+        self.assertTrue(np.all(samples >= 0))
+
+    def test_queue_position(self):
+        depth = Depth(bids=[[99, 5], [100, 2]], asks=[[101, 3]])
+        model = QueuePositionModel(queue_fraction=1.0)
+        queue = model.initial_queue([100, 99, 101, 98], [True, True, False, True], depth)
+        np.testing.assert_array_equal(queue, [2, 5, 3, 0])
+        order_prices, is_buy = np.array([100.0, 101.0]), np.array([True, False])
+        filled, queue = model.update(order_prices, is_buy, np.array([2.0, 3.0]), 100, 1.5)
+        np.testing.assert_array_equal(filled, [False, False])
+        filled, queue = model.update(order_prices, is_buy, queue, 100, 1.0)
+        np.testing.assert_array_equal(filled, [True, False])
+        filled, queue = model.update(order_prices, is_buy, queue, 101.5, 0.0)
+        np.testing.assert_array_equal(filled, [False, True])
+
+    def test_depth_slippage(self):
+        depth = Depth(bids=[[99, 1], [98, 1]], asks=[[101, 1], [102, 1]])
+        model = DepthSlippageModel()
+        # buy 101 + 51 usdt: one eth at 101 and half an eth at 102
+        prices = model.fill_prices([True, True, False, False], [50.5, 152, 0.5, 1.5], 100, depth)
+        np.testing.assert_allclose(prices, [101, 152 / 1.5, 99, (99 + 49) / 1.5])
+        np.testing.assert_allclose(DepthSlippageModel(0.01).fill_prices([True, False], [10, 1], 100), [101, 99])
+
+
+class BacktestTraderFillModelsTest(unittest.TestCase):
+    def test_latency(self):
+        symbol = 'ethusdt'
+        trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {symbol: 2000}, latency_model=ConstantLatency(2))
+        market_order_id = trader.create_order(symbol, None, OrderType.BUY_MARKET, 200)
+        limit_order_id = trader.create_order(symbol, 1900, OrderType.BUY_LIMIT, 0.1)
+        self.assertEqual(trader.get_order(market_order_id).state, OrderState.SUBMITTED)
+        trader.feed({symbol: 1800})
+        self.assertEqual(trader.get_order(limit_order_id).state, OrderState.SUBMITTED)
+        trader.feed({symbol: 1800})
+        self.assertEqual(trader.get_order(market_order_id).state, OrderState.FILLED)
+        self.assertEqual(trader.get_order(market_order_id).price, 1800)
+        self.assertEqual(trader.get_order(limit_order_id).state, OrderState.FILLED)
+
+    def test_queue_and_slippage(self):
+        symbol = 'ethusdt'
+        trader = BacktestTrader({'usdt': 1000, 'eth': 1}, {symbol: 2000},
+                                queue_model=QueuePositionModel(), slippage_model=DepthSlippageModel())
+        trader.feed_depth(symbol, bids=[[1990, 0.5], [1980, 1]], asks=[[2010, 0.1], [2020, 1]])
+        order_id = trader.create_order(symbol, 1990, OrderType.BUY_LIMIT, 0.1)
+        trader.feed({symbol: 1990}, volumes={symbol: 0.3})
+        self.assertEqual(trader.get_order(order_id).state, OrderState.SUBMITTED)
+        trader.feed({symbol: 1990}, volumes={symbol: 0.3})
+        self.assertEqual(trader.get_order(order_id).state, OrderState.FILLED)
+        order_id = trader.create_order(symbol, None, OrderType.BUY_MARKET, 402)
+        self.assertAlmostEqual(trader.get_order(order_id).price, 402 / (0.1 + 201 / 2020), places=3)
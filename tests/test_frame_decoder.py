@@ -0,0 +1,21 @@
+import gzip
+import json
+import unittest
+
+from huobi.connection.impl.frame_decoder import GzipFrameDecoder
+
+
+class GzipFrameDecoderTest(unittest.TestCase):
+    def test_decode(self):
+        decoder = GzipFrameDecoder(initial_bufsize=16, max_bufsize=4096)
+        small = {'ping': 1630000000000}
+        large = {'ch': 'market.ethusdt.depth.step0', 'tick': {'bids': [[3000.0 - i, 1.0] for i in range(150)]}}
+        self.assertEqual(decoder.decode(gzip.compress(json.dumps(small).encode())), small)
+        self.assertEqual(decoder.bufsize, 32)
+        self.assertEqual(decoder.decode(gzip.compress(json.dumps(large).encode())), large)
+        self.assertEqual(decoder.bufsize, 4096)
+        self.assertEqual(decoder.decode(gzip.compress(json.dumps(small).encode())), small)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from huobi.connection.impl.restapi_invoker import call_sync
+from huobi.connection.impl.restapi_request import RestApiRequest
+from huobi.utils.json_backend import JSON_BACKENDS, select_json_backend
+
+
+class JsonBackendTest(unittest.TestCase):
+    def test_backends(self):
+        message = '{"ch":"market.ethusdt.kline.1min","tick":{"id":1,"close":3000.5}}'.encode()
+        for name in JSON_BACKENDS:
+            try:
+                backend, loads = select_json_backend(name)
+            except ValueError:
+                continue
+            self.assertEqual(backend, name)
+            self.assertEqual(loads(message)['tick'], {'id': 1, 'close': 3000.5})
+        self.assertIn(select_json_backend()[0], JSON_BACKENDS)
+        with self.assertRaises(ValueError):
+            select_json_backend('yaml')
+
+    def test_call_sync_decodes_content(self):
+        request = RestApiRequest()
+        request.method = 'GET'
+        request.json_parser = lambda dict_data: dict_data['data']
+        response = MagicMock(content=b'{"status":"ok","data":[1,2]}')
+        with patch('huobi.connection.impl.restapi_invoker.session.get', return_value=response):
+            self.assertEqual(call_sync(request), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
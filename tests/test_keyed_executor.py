@@ -0,0 +1,128 @@
+import threading
+import unittest
+
+from huobi.connection.impl.callback_queue import CallbackQueue
+from huobi.connection.impl.keyed_executor import KeyedExecutor
+from huobi.constant import *
+
+from test_websocket_manage import make_manage, make_frame
+
+
+class KeyedExecutorTest(unittest.TestCase):
+    def test_order_per_key(self):
+        executor = KeyedExecutor(num_workers=4, batch_size=8)
+        results = {key: [] for key in range(10)}
+        for i in range(1000):
+            executor.submit(i % 10, results[i % 10].append, i)
+        executor.shutdown()
+        for key, values in results.items():
+            self.assertEqual(values, list(range(key, 1000, 10)))
+        self.assertEqual((executor.submitted, executor.completed, executor.pending), (1000, 1000, 0))
+
+    def test_slow_key(self):
+        executor = KeyedExecutor(num_workers=2)
+        release = threading.Event()
+        done = threading.Event()
+        executor.submit('btcusdt', release.wait, 5)
+        executor.submit('btcusdt', lambda: 1 / 0)
+        executor.submit('ethusdt', done.set)
+        self.assertTrue(done.wait(5))
+        self.assertFalse(release.is_set())
+        release.set()
+        executor.shutdown()
+        self.assertEqual(executor.completed, 3)
+
+    def test_bounded_keys(self):
+        for policy, expected, stats in [(CallbackQueuePolicy.DROP_OLDEST, [0, 3, 4], (2, 0)),
+                                        (CallbackQueuePolicy.CONFLATE, [0, 4], (0, 3))]:
+            executor = KeyedExecutor(num_workers=2, policy=policy, max_size=2)
+            release = threading.Event()
+            started = threading.Event()
+            results = []
+
+            def task(i):
+                started.set()
+                release.wait(5)
+                results.append(i)
+
+            executor.submit('btcusdt', task, 0)
+            started.wait(5)
+            for i in range(1, 5):
+                executor.submit('btcusdt', task, i)
+            self.assertEqual((executor.dropped, executor.conflated), stats)
+            release.set()
+            executor.shutdown()
+            self.assertEqual(results, expected)
+            self.assertFalse(executor.submit('btcusdt', task, 5))
+
+    def test_block(self):
+        executor = KeyedExecutor(num_workers=2, max_size=1)
+        release = threading.Event()
+        executor.submit('btcusdt', release.wait, 5)
+        executor.submit('btcusdt', lambda: None)
+        producer = threading.Thread(target=executor.submit, args=('btcusdt', lambda: None))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        release.set()
+        producer.join(5)
+        self.assertFalse(producer.is_alive())
+        executor.shutdown()
+        self.assertEqual(executor.completed, 3)
+
+    def test_shutdown_without_wait(self):
+        executor = KeyedExecutor(num_workers=1, batch_size=2)
+        release = threading.Event()
+        results = []
+        executor.submit('btcusdt', release.wait, 5)
+        for i in range(10):
+            executor.submit('btcusdt', results.append, i)
+        executor.shutdown(wait=False)
+        # the key past its batch is drained by its worker, not handed back to the stopped pool
+        release.set()
+        executor.shutdown()
+        self.assertEqual(results, list(range(10)))
+
+    def test_callback_queue(self):
+        # a queue delivering into a full key of a blocking executor fills and applies its own policy
+        executor = KeyedExecutor(num_workers=2, max_size=1)
+        release = threading.Event()
+        started = threading.Event()
+        results = []
+
+        def task(i):
+            started.set()
+            release.wait(5)
+            results.append(i)
+
+        queue = CallbackQueue(lambda i: executor.submit('btcusdt', task, i), CallbackQueuePolicy.DROP_OLDEST,
+                              max_size=2)
+        queue.put(0)
+        started.wait(5)
+        for i in range(1, 10):
+            queue.put(i)
+        # at most one task waits in the executor and one in the blocked dispatcher, the queue holds the rest
+        self.assertLessEqual(executor.pending, 1)
+        self.assertGreaterEqual(queue.dropped, 5)
+        release.set()
+        queue.close(timeout=5)
+        executor.shutdown()
+        self.assertEqual((results[0], results[-1]), (0, 9))
+        self.assertEqual(results, sorted(results))
+        self.assertEqual(len(results), 10 - queue.dropped)
+
+    def test_websocket_manage(self):
+        manage = make_manage()
+        executor = KeyedExecutor(num_workers=2)
+        manage.callback_executor = executor
+        manage.callback_key = lambda update: update['ch']
+        received = []
+        manage.request.update_callback.side_effect = lambda update: received.append(update['ts'])
+        for ts in range(20):
+            manage.on_message(make_frame({'ch': 'market.ethusdt.bbo', 'ts': ts, 'tick': {}}))
+        executor.shutdown()
+        self.assertEqual(received, list(range(20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from huobi.constant import *
+
+from utils import CandleStore, KlineDownloader
+from utils.kline_downloader import find_gaps
+from test_candle_store import make_candles
+
+
+class FakeExchange(object):
+    def __init__(self, missing=(), dropped_once=()):
+        self.missing = set(missing)
+        self.dropped_once = set(dropped_once)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def fetch_page(self, symbol, interval, from_ts, end_ts):
+        with self.lock:
+            self.requests.append((symbol, from_ts, end_ts))
+            ids = [i for i in range(from_ts, end_ts + 1, 60) if i not in self.missing and i not in self.dropped_once]
+            self.dropped_once -= set(range(from_ts, end_ts + 1, 60))
+        return make_candles(ids)
+
+
+class KlineDownloaderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_find_gaps(self):
+        self.assertEqual(find_gaps([60, 120, 300, 360, 540], 60), [(180, 240), (420, 480)])
+        self.assertEqual(find_gaps([120], 60, prev_id=0), [(60, 60)])
+
+    def test_download(self):
+        exchange = FakeExchange()
+        downloader = KlineDownloader(self.store, page_size=10, requests_per_second=1000,
+                                     fetch_page=exchange.fetch_page)
+        self.assertEqual(downloader.plan_pages(30, 1260, 60), [(0, 540), (600, 1140), (1200, 1260)])
+        reports = downloader.download('ethusdt,btcusdt', CandlestickInterval.MIN1, 0, 1199)
+        self.assertEqual(reports['ethusdt'], {'appended': 20, 'gaps': []})
+        np.testing.assert_array_equal(self.store.load('btcusdt', CandlestickInterval.MIN1)['id'],
+                                      np.arange(0, 1200, 60))
+        self.assertEqual(len(exchange.requests), 4)
+
+        # resume from the newest stored candle
+        exchange.requests.clear()
+        reports = downloader.download('ethusdt', CandlestickInterval.MIN1, 0, 1500)
+        self.assertEqual(reports['ethusdt']['appended'], 6)
+        self.assertEqual(exchange.requests, [('ethusdt', 1140, 1500)])
+
+    def test_gaps(self):
+        exchange = FakeExchange(missing=[300, 360], dropped_once=[120, 540, 600])
+        downloader = KlineDownloader(self.store, page_size=10, requests_per_second=1000,
+                                     fetch_page=exchange.fetch_page)
+        reports = downloader.download('ethusdt', CandlestickInterval.MIN1, 0, 1199)
+        self.assertEqual(reports['ethusdt']['gaps'], [(300, 360)])
+        ids = self.store.load('ethusdt', CandlestickInterval.MIN1)['id']
+        np.testing.assert_array_equal(ids, [i for i in range(0, 1200, 60) if i not in (300, 360)])
+
+    def test_failure(self):
+        def fetch_page(symbol, interval, from_ts, end_ts):
+            if symbol == 'btcusdt' and from_ts >= 600:
+                raise RuntimeError('rate limited')
+            return make_candles(range(from_ts, end_ts + 1, 60))
+
+        downloader = KlineDownloader(self.store, page_size=10, requests_per_second=1000, max_retries=2,
+                                     fetch_page=fetch_page)
+        reports = downloader.download(['ethusdt', 'btcusdt'], CandlestickInterval.MIN1, 0, 1199)
+        self.assertEqual(reports['ethusdt']['appended'], 20)
+        self.assertEqual(reports['btcusdt']['appended'], 10)
+        self.assertIsInstance(reports['btcusdt']['error'], RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
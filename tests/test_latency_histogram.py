@@ -0,0 +1,63 @@
+import time
+import unittest
+
+from huobi.connection.impl.callback_queue import CallbackQueue
+from huobi.connection.impl.latency_monitor import FeedLatencyMonitor, FEED_LATENCY, CALLBACK_LATENCY
+from huobi.constant import *
+from huobi.utils.latency_histogram import LatencyHistogram
+
+from test_websocket_manage import make_manage, make_frame
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_buckets(self):
+        histogram = LatencyHistogram(max_value=10 ** 9, precision_bits=5)
+        for value in list(range(5000)) + [10 ** 6 + 7, 10 ** 9]:
+            lowest, highest = histogram.get_bucket_range(histogram.get_index(value))
+            self.assertTrue(lowest <= value <= highest)
+            self.assertLessEqual(highest - lowest, max(value, 1) / 16)
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        for value in range(1, 10001):
+            histogram.record(value)
+        histogram.record(-5)
+        histogram.record(10 ** 12)
+        p50, p99, p100 = histogram.percentiles([50, 99, 100])
+        self.assertAlmostEqual(p50, 5000, delta=5000 / 64)
+        self.assertAlmostEqual(p99, 9900, delta=9900 / 64)
+        self.assertEqual(p100, 10 ** 12)
+        self.assertEqual((histogram.min, histogram.total), (0, 10002))
+
+        other = LatencyHistogram()
+        other.record(3)
+        histogram.merge(other)
+        self.assertEqual(histogram.total, 10003)
+        histogram.reset()
+        self.assertEqual(histogram.total, 0)
+
+
+class FeedLatencyMonitorTest(unittest.TestCase):
+    def test_websocket_manage(self):
+        manage = make_manage()
+        monitor = manage.latency_monitor = FeedLatencyMonitor()
+        manage.request.update_callback.side_effect = lambda update: time.sleep(0.01)
+        ts = int(time.time() * 1000) - 200
+        manage.on_message(make_frame({'ch': 'market.ethusdt.bbo', 'ts': ts, 'tick': {}}))
+        percentiles = monitor.percentiles('market.ethusdt.bbo', FEED_LATENCY, (50,))
+        self.assertGreaterEqual(percentiles[50], 200000)
+        self.assertGreaterEqual(monitor.percentiles('market.ethusdt.bbo', CALLBACK_LATENCY, (50,))[50], 10000)
+
+        # through a callback queue the latency includes the wait in the queue
+        manage.callback_queue = CallbackQueue(manage.deliver, CallbackQueuePolicy.BLOCK)
+        manage.on_message(make_frame({'ch': 'market.btcusdt.bbo', 'ts': ts, 'tick': {}}))
+        manage.callback_queue.close(timeout=5)
+        summary = monitor.summary()
+        self.assertEqual(list(summary), ['market.btcusdt.bbo', 'market.ethusdt.bbo'])
+        self.assertEqual(summary['market.btcusdt.bbo'][CALLBACK_LATENCY]['count'], 1)
+        self.assertIsNone(monitor.percentiles('market.eosusdt.bbo')[50])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from strategy.grid_strategy import GridStrategy
+import utils
+
+
+def grid_strategy_factory(trader, symbol):
+    return GridStrategy(trader, symbol, 0, 1000, 2500, 3100, 12, enable_logger=False, interval=None)
+
+
+class MarketSimulatorTest(unittest.TestCase):
+    def test_paths_shape_and_seed(self):
+        for generate in (
+            lambda seed: utils.gbm_paths(100, 50, 20, 1, sigma=0.02, seed=seed),
+            lambda seed: utils.jump_diffusion_paths(100, 50, 20, 1, jump_intensity=0.5, seed=seed),
+            lambda seed: utils.regime_switching_paths(100, 50, 20, 1, [0, 0], [0.01, 0.05],
+                                                      [[0.9, 0.1], [0.2, 0.8]], seed=seed),
+            lambda seed: utils.bootstrap_paths(100, np.linspace(-0.01, 0.01, 30), 50, 20, block_size=4, seed=seed),
+        ):
+            paths = generate(0)
+            self.assertEqual(paths.shape, (50, 21))
+            self.assertTrue(np.all(paths[:, 0] == 100))
+            self.assertTrue(np.all(paths > 0))
+            np.testing.assert_array_equal(paths, generate(0))
+            self.assertFalse(np.array_equal(paths, generate(1)))
+
+    def test_bootstrap_resamples_recorded_returns(self):
+        returns = np.array([-0.02, 0.01, 0.03])
+        paths = utils.bootstrap_paths(10, returns, 5, 7, seed=0)
+        sampled = utils.log_returns(paths[0])
+        self.assertTrue(np.all(np.isclose(sampled[:, None], returns[None, :]).any(axis=1)))
+
+    def test_regime_switching_stays_in_absorbing_regime(self):
+        _, regimes = utils.regime_switching_paths(100, 10, 30, 1, [0, 0], [0.01, 0.02], [[1, 0], [0, 1]],
+                                                  init_regime=1, seed=0, return_regimes=True)
+        self.assertTrue(np.all(regimes == 1))
+
+
+class StressTesterTest(unittest.TestCase):
+    def test_stress_tester(self):
+        paths = utils.gbm_paths(2800, 6, 200, 1, sigma=0.003, seed=0)
+        serial = utils.StressTester(grid_strategy_factory, 'ethusdt', {'usdt': 1000, 'eth': 0}).run(paths)
+        parallel = utils.StressTester(grid_strategy_factory, 'ethusdt', {'usdt': 1000, 'eth': 0},
+                                      num_workers=2, chunk_size=2).run(paths)
+        np.testing.assert_allclose(serial.equity, parallel.equity)
+        self.assertEqual(serial.num_failed, 0)
+        self.assertEqual(serial.equity.shape, (6, 201))
+        self.assertTrue(np.all(serial.max_drawdowns >= 0))
+        summary = serial.summary()
+        self.assertGreaterEqual(summary['expected_shortfall'], summary['value_at_risk'])
+
+    def test_failed_paths(self):
+        # The grid strategy refuses to start when the price is out of its range
+        paths = np.array([np.full(10, 2800.0), np.full(10, 4000.0)])
+        result = utils.StressTester(grid_strategy_factory, 'ethusdt', {'usdt': 1000, 'eth': 0}).run(paths)
+        self.assertEqual(result.num_failed, 1)
+        self.assertTrue(np.isnan(result.equity[1]).all())
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from trader import MatchingEngine
+
+
+class MatchingEngineTest(unittest.TestCase):
+    def test_price_time_priority(self):
+        engine = MatchingEngine(maker_fee=0.001, taker_fee=0.002)
+        self.assertEqual(engine.add_order('b1', 'ethusdt', True, 100.0, 1.0), [])
+        engine.add_order('b2', 'ethusdt', True, 100.0, 2.0)
+        engine.add_order('b3', 'ethusdt', True, 101.0, 1.0)
+        engine.add_order('a1', 'ethusdt', False, 103.0, 1.0)
+        bids, asks = engine.depth('ethusdt')
+        np.testing.assert_array_equal(bids, [[101.0, 1.0], [100.0, 3.0]])
+        np.testing.assert_array_equal(asks, [[103.0, 1.0]])
+
+        # the best price fills first, then the oldest order of a price, partially at the end
+        fills = engine.add_order('s1', 'ethusdt', False, 100.0, 2.5)
+        self.assertEqual([fill[:3] for fill in fills if fill[4]], [('b3', 101.0, 1.0), ('b1', 100.0, 1.0),
+                                                                  ('b2', 100.0, 0.5)])
+        self.assertEqual(sum(fill[2] for fill in fills if fill[0] == 's1'), 2.5)
+        self.assertAlmostEqual(fills[0][3], 0.001)
+        self.assertAlmostEqual(fills[1][3], 101.0 * 0.002)
+        self.assertIsNone(engine.get_order('s1'))
+        self.assertEqual(engine.get_order('b2').remaining, 1.5)
+
+        fills, remaining = engine.execute('ethusdt', True, 2.0, limit_price=105.0)
+        self.assertEqual((fills, remaining), ([('a1', 103.0, 1.0, 103.0 * 0.001, True)], 1.0))
+        self.assertEqual(engine.cancel('b2').remaining, 1.5)
+        self.assertIsNone(engine.cancel('b2'))
+        self.assertEqual(engine.get_open_orders('ethusdt'), [])
+        with self.assertRaises(ValueError):
+            engine.add_order('b4', 'ethusdt', True, 100.0, 0.0)
+
+    def test_match_trade(self):
+        engine = MatchingEngine()
+        for i, price in enumerate([99.0, 98.0, 97.0, 99.0]):
+            engine.add_order(i, 'ethusdt', True, price, 1.0)
+        engine.add_order('a', 'ethusdt', False, 101.0, 1.0)
+        self.assertEqual(engine.match_trade('ethusdt', 100.0), [])
+        # a trade at 98 reaches the bids at 98 and above, shared by priority up to its volume
+        self.assertEqual([fill[:3] for fill in engine.match_trade('ethusdt', 98.0, volume=2.5)],
+                         [(0, 99.0, 1.0), (3, 99.0, 1.0), (1, 98.0, 0.5)])
+        self.assertEqual([fill[:3] for fill in engine.match_trade('ethusdt', 101.0)], [('a', 101.0, 1.0)])
+        self.assertEqual([fill[:3] for fill in engine.match_trade('ethusdt', 90.0)], [(1, 98.0, 0.5),
+                                                                                       (2, 97.0, 1.0)])
+        self.assertEqual(engine.orders, {})
+
+    def test_float_dust(self):
+        engine = MatchingEngine()
+        engine.add_order('b', 'ethusdt', True, 100.0, 1.0)
+        engine.add_order('s', 'ethusdt', False, 101.0, 1.0)
+        self.assertEqual([fill[:3] for fill in engine.match_trade('ethusdt', 99.0, volume=0.7)], [('b', 100.0, 0.7)])
+        # 1.0 - 0.7 - 0.3 leaves 5.55e-17, which must not keep the order in the book
+        self.assertEqual([fill[:3] for fill in engine.match_trade('ethusdt', 99.0, volume=0.3)], [('b', 100.0, 0.3)])
+        self.assertIsNone(engine.get_order('b'))
+        self.assertEqual(engine.match_trade('ethusdt', 99.0), [])
+        engine.execute('ethusdt', True, 0.7, limit_price=101.0)
+        self.assertEqual(engine.add_order('b2', 'ethusdt', True, 101.0, 0.3)[0][:3], ('s', 101.0, 0.3))
+        self.assertEqual((engine.orders, len(engine.depth('ethusdt')[0])), ({}, 0))
+
+    def test_many_levels(self):
+        engine = MatchingEngine()
+        prices = np.random.default_rng(0).permutation(np.arange(1, 201)).astype(float).tolist()
+        for price in prices:
+            engine.add_order(price, 'ethusdt', price <= 100, price, 1.0)
+        bids, asks = engine.depth('ethusdt', levels=3)
+        np.testing.assert_array_equal(bids[:, 0], [100.0, 99.0, 98.0])
+        np.testing.assert_array_equal(asks[:, 0], [101.0, 102.0, 103.0])
+        for price in prices[::2]:
+            engine.cancel(price)
+        bids, asks = engine.depth('ethusdt')
+        self.assertEqual(len(bids) + len(asks), 100)
+        self.assertTrue(np.all(np.diff(bids[:, 0]) < 0) and np.all(np.diff(asks[:, 0]) > 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
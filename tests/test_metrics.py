@@ -0,0 +1,79 @@
+import unittest
+import urllib.request
+from unittest.mock import patch
+
+from huobi.client.trade import TradeClient
+from huobi.connection.impl.websocket_manage import ws_messages
+from huobi.connection.restapi_sync_client import get_endpoint
+from huobi.exception.huobi_api_exception import HuobiApiException
+from huobi.utils.metrics import MetricsRegistry, metrics_registry
+
+from test_websocket_manage import make_manage, make_frame
+
+
+class MetricsTest(unittest.TestCase):
+    def test_exposition(self):
+        registry = MetricsRegistry()
+        requests = registry.counter('requests_total', 'Requests', ['endpoint'])
+        requests.labels('/v1/common/symbols').inc()
+        requests.labels('/v1/common/symbols').inc(2)
+        registry.gauge('queue_depth', 'Depth').set(3.5)
+        latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+        self.assertIs(registry.counter('requests_total', 'Requests', ['endpoint']), requests)
+        with self.assertRaises(ValueError):
+            registry.gauge('requests_total', 'Requests')
+        with self.assertRaises(ValueError):
+            requests.labels()
+        self.assertEqual(registry.expose(), '\n'.join([
+            '# HELP latency_seconds Latency',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            'latency_seconds_sum 5.55',
+            'latency_seconds_count 3',
+            '# HELP queue_depth Depth',
+            '# TYPE queue_depth gauge',
+            'queue_depth 3.5',
+            '# HELP requests_total Requests',
+            '# TYPE requests_total counter',
+            'requests_total{endpoint="/v1/common/symbols"} 3',
+        ]) + '\n')
+
+        server = registry.start_http_server(port=0)
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+                self.assertIn('queue_depth 3.5', response.read().decode())
+        finally:
+            registry.stop_http_server()
+
+    def test_rest_requests(self):
+        self.assertEqual(get_endpoint('/v1/order/orders/12345/submitcancel'), '/v1/order/orders/{id}/submitcancel')
+        errors = metrics_registry.counter('huobi_rest_request_errors_total', '', ['method', 'endpoint'])
+        durations = metrics_registry.histogram('huobi_rest_request_duration_seconds', '', ['method', 'endpoint'])
+        error = errors.labels('POST', '/v1/order/orders/{id}/submitcancel')
+        duration = durations.labels('POST', '/v1/order/orders/{id}/submitcancel')
+        num_errors, num_requests = error.value, sum(duration.counts)
+        client = TradeClient(api_key='key', secret_key='secret')
+        with patch('huobi.connection.restapi_sync_client.call_sync', return_value=1):
+            client.cancel_order('ethusdt', 12345)
+        with patch('huobi.connection.restapi_sync_client.call_sync', side_effect=HuobiApiException('', '')):
+            with self.assertRaises(HuobiApiException):
+                client.cancel_order('ethusdt', 67890)
+        self.assertEqual(error.value, num_errors + 1)
+        self.assertEqual(sum(duration.counts), num_requests + 2)
+
+    def test_websocket_messages(self):
+        messages = ws_messages.labels('/ws')
+        num_messages = messages.value
+        # one child per url path, however many connections are made
+        for _ in range(3):
+            make_manage().on_message(make_frame({'ch': 'market.ethusdt.bbo', 'ts': 1, 'tick': {}}))
+        self.assertEqual(messages.value, num_messages + 3)
+        self.assertTrue(all(label_values[0].startswith('/') for label_values in ws_messages.children))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import gzip
+import io
+import json
+import queue
+import time
+import unittest
+import urllib.request
+
+from constants import TransactionPair
+from huobi.client.account import AccountClient
+from huobi.client.market import MarketClient
+from huobi.client.trade import TradeClient
+from huobi.connection.impl.websocket_manage import WebsocketManage
+from huobi.connection.impl.websocket_request import WebsocketRequest
+from huobi.constant import *
+from huobi.exception.huobi_api_exception import HuobiApiException
+from mock_exchange import MockExchange, MockExchangeServer, ExchangeError
+from mock_exchange.websocket import WebSocketConnection, encode_frame, OPCODE_TEXT
+
+API_KEY = 'mock-key'
+SECRET_KEY = 'mock-secret'
+PAIRS = {'btcusdt': TransactionPair(2, 6, 'btc', 'usdt', min_order_value=5)}
+
+
+def make_exchange():
+    return MockExchange({'btcusdt': 20000.0}, balance={'usdt': 10000, 'btc': 1}, fee_rate=0.002, seed=1,
+                        pairs=PAIRS)
+
+
+def make_request(api_version, subscription_handler, messages):
+    request = WebsocketRequest()
+    request.api_version = api_version
+    request.is_trading = api_version == ApiVersion.VERSION_V2
+    request.json_parser = lambda dict_data: dict_data
+    request.update_callback = messages.put
+    request.error_handler = lambda error: messages.put(error)
+    request.subscription_handler = subscription_handler
+    return request
+
+
+class MockExchangeTest(unittest.TestCase):
+    def test_exchange(self):
+        exchange = make_exchange()
+        order, events = exchange.create_order(1000001, 'btcusdt', OrderType.BUY_LIMIT, 0.1, 19000)
+        self.assertEqual([kind for kind, _, _ in events], ['order'])
+        self.assertEqual(exchange.get_balance('usdt'), 8100)
+        self.assertEqual(exchange.get_open_orders('btcusdt'), [order])
+        with self.assertRaises(ExchangeError):
+            exchange.create_order(1000001, 'btcusdt', OrderType.BUY_LIMIT_MAKER, 0.1, 21000)
+        with self.assertRaises(ExchangeError):
+            exchange.create_order(1000001, 'btcusdt', OrderType.SELL_LIMIT, 2, 21000)
+
+        events = exchange.set_price('btcusdt', 18990)
+        self.assertEqual([kind for kind, _, _ in events], ['order', 'trade'])
+        self.assertEqual(order.state, OrderState.FILLED)
+        self.assertAlmostEqual(exchange.get_balance('btc'), 1.0998)
+        self.assertEqual(events[1][2]['tradePrice'], '19000.0')
+        self.assertFalse(events[1][2]['aggressor'])
+        with self.assertRaises(ExchangeError):
+            exchange.cancel_order(order.id)
+
+        order, events = exchange.create_order(1000001, 'btcusdt', OrderType.SELL_MARKET, 0.5)
+        self.assertEqual(order.state, OrderState.FILLED)
+        self.assertTrue(events[-1][2]['aggressor'])
+        self.assertAlmostEqual(exchange.get_balance('usdt'), 8100 + 0.5 * 18990 * 0.998)
+
+    def test_frames(self):
+        payload = json.dumps({'sub': 'market.btcusdt.kline.1min'}).encode() * 10
+        mask = b'\x01\x02\x03\x04'
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        frame = bytearray(encode_frame(OPCODE_TEXT, masked))
+        frame[1] |= 0x80
+        frame[4:4] = mask
+        connection = WebSocketConnection(None, io.BytesIO(bytes(frame)), io.BytesIO())
+        self.assertEqual(connection.receive(), (OPCODE_TEXT, payload))
+        connection.close()
+        connection.join(timeout=1)
+
+    def test_mbp(self):
+        server = MockExchangeServer(make_exchange(), seed=1)
+        # a client applying the increments on a requested book stays in sync with the server
+        book = server.make_market_tick('market.btcusdt.mbp.5', True)
+        self.assertEqual((book['seqNum'], book['bids']), (0, []))
+        books = {'bids': {}, 'asks': {}}
+        for _ in range(5):
+            tick = server.make_market_tick('market.btcusdt.mbp.5')
+            self.assertEqual(tick['prevSeqNum'], book['seqNum'])
+            for side in ('bids', 'asks'):
+                for price, amount in tick[side]:
+                    if amount:
+                        books[side][price] = amount
+                    else:
+                        books[side].pop(price, None)
+            book = server.make_market_tick('market.btcusdt.mbp.5', True)
+            self.assertEqual(book['seqNum'], tick['seqNum'])
+            self.assertEqual(book['bids'], [list(row) for row in sorted(books['bids'].items(), reverse=True)])
+            self.assertEqual(book['asks'], [list(row) for row in sorted(books['asks'].items())])
+        self.assertEqual(len(server.make_market_tick('market.btcusdt.mbp.refresh.10')['asks']), 10)
+
+
+class MockExchangeServerTest(unittest.TestCase):
+    def setUp(self):
+        self.exchange = make_exchange()
+        self.server = MockExchangeServer(self.exchange, api_keys={API_KEY: SECRET_KEY}, message_rate=50,
+                                         ping_interval=0.2, seed=1).start()
+        self.addCleanup(self.server.stop)
+        self.trade_client = TradeClient(api_key=API_KEY, secret_key=SECRET_KEY, url=self.server.url)
+
+    def test_rest(self):
+        account_client = AccountClient(api_key=API_KEY, secret_key=SECRET_KEY, url=self.server.url)
+        account_id = account_client.get_accounts()[0].id
+        self.assertEqual(account_id, 1000001)
+        balance = {(row.currency, row.type): float(row.balance) for row in account_client.get_balance(account_id)}
+        self.assertEqual(balance[('usdt', 'trade')], 10000)
+
+        order_id = self.trade_client.create_order('btcusdt', account_id, OrderType.BUY_LIMIT, 0.1, 10000, 'api',
+                                                  client_order_id='a1')
+        order = self.trade_client.get_order(order_id)
+        self.assertEqual((order.symbol, order.type, order.state), ('btcusdt', OrderType.BUY_LIMIT,
+                                                                   OrderState.SUBMITTED))
+        results = self.trade_client.batch_create_order([
+            {'symbol': 'btcusdt', 'account_id': account_id, 'order_type': OrderType.SELL_LIMIT, 'amount': 0.1,
+             'price': 30000, 'source': 'api'},
+            {'symbol': 'btcusdt', 'account_id': account_id, 'order_type': OrderType.SELL_LIMIT, 'amount': 10,
+             'price': 30000, 'source': 'api'}])
+        self.assertTrue(results[0].order_id)
+        self.assertEqual(results[1].err_code, 'account-frozen-balance-insufficient-error')
+        open_orders = self.trade_client.get_open_orders('btcusdt', account_id)
+        self.assertEqual(sorted(order.id for order in open_orders), sorted([order_id, results[0].order_id]))
+
+        self.assertEqual(self.trade_client.cancel_order('btcusdt', order_id), order_id)
+        self.assertEqual(self.trade_client.get_order(order_id).state, OrderState.CANCELED)
+        self.assertEqual(len(MarketClient(url=self.server.url).get_candlestick('btcusdt', '1min', 10)), 10)
+
+        self.server.fail_next(err_code='mock-error', err_msg='injected')
+        with self.assertRaises(HuobiApiException):
+            self.trade_client.get_order(order_id)
+        with self.assertRaises(HuobiApiException):
+            TradeClient(api_key=API_KEY, secret_key='wrong', url=self.server.url).get_order(order_id)
+        self.assertEqual(self.server.stats()['rest_errors'], 2)
+
+        request = urllib.request.Request(self.server.url + '/v1/order/orders/place', data=b'{"symbol":',
+                                         method='POST')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            self.assertEqual(json.loads(response.read())['err-code'], 'invalid-parameter')
+
+    def connect(self, api_version, subscription_handler):
+        messages = queue.Queue()
+        manage = WebsocketManage(API_KEY, SECRET_KEY, self.server.ws_url,
+                                 make_request(api_version, subscription_handler, messages))
+        manage.connect()
+        self.addCleanup(lambda: manage.original_connection is not None and manage.close())
+        return messages
+
+    def test_market_websocket(self):
+        messages = self.connect(ApiVersion.VERSION_V1, lambda connection: connection.send(json.dumps(
+            {'sub': 'market.btcusdt.kline.1min', 'id': '1'})))
+        for _ in range(3):
+            message = messages.get(timeout=5)
+            self.assertEqual(message['ch'], 'market.btcusdt.kline.1min')
+            self.assertGreater(message['tick']['close'], 0)
+        self.assertGreater(self.server.stats()['market_messages'], 0)
+
+    def test_mbp_websocket(self):
+        messages = self.connect(ApiVersion.VERSION_V1, lambda connection: connection.send(json.dumps(
+            {'sub': 'market.btcusdt.mbp.20', 'id': '1'})))
+        ticks = [messages.get(timeout=5)['tick'] for _ in range(3)]
+        self.assertEqual([tick['prevSeqNum'] for tick in ticks[1:]], [tick['seqNum'] for tick in ticks[:-1]])
+
+    def test_trading_websocket(self):
+        messages = self.connect(ApiVersion.VERSION_V2, lambda connection: connection.send(json.dumps(
+            {'action': 'sub', 'ch': 'trade.clearing#btcusdt#0'})))
+        # the subscription is acknowledged before the order is placed
+        for _ in range(100):
+            if self.server.subscribers.get('trade.clearing#btcusdt#0'):
+                break
+            time.sleep(0.05)
+        order_id = self.trade_client.create_order('btcusdt', 1000001, OrderType.BUY_MARKET, 100, None, 'api')
+        message = messages.get(timeout=5)
+        self.assertEqual(message['ch'], 'trade.clearing#btcusdt#0')
+        self.assertEqual(message['data']['orderId'], order_id)
+        self.assertTrue(message['data']['aggressor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
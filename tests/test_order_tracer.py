@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from huobi.constant import OrderType
+from huobi.model.trade import BatchCreateOrder, OrderUpdate, OrderUpdateEvent, TradeClearing, TradeClearingEvent
+from trader.order_tracer import OrderTracer
+from trader.trader import Trader
+
+
+def make_order_update_event(order_id, client_order_id=''):
+    event = OrderUpdateEvent()
+    event.data = OrderUpdate()
+    event.data.orderId = order_id
+    event.data.clientOrderId = client_order_id
+    return event
+
+
+def make_trade_clearing_event(symbol, order_id):
+    event = TradeClearingEvent()
+    event.data = TradeClearing()
+    event.data.symbol = symbol
+    event.data.orderId = order_id
+    return event
+
+
+class OrderTracerTest(unittest.TestCase):
+    def test_stages(self):
+        tracer = OrderTracer(capacity=2)
+        tracer.mark_decision(100.0)
+        with patch('time.time', return_value=100.002):
+            trace = tracer.start('btcusdt', 'c1')
+        tracer.clear_decision()
+        with patch('time.time', return_value=100.012):
+            tracer.on_ack(trace, 42)
+        with patch('time.time', return_value=100.015):
+            tracer.on_order_update(make_order_update_event(42, 'c1'))
+        with patch('time.time', return_value=100.020):
+            self.assertIs(tracer.on_trade_clearing(make_trade_clearing_event('btcusdt', 42)), trace)
+            # only the first fill is timed
+            tracer.on_trade_clearing(make_trade_clearing_event('btcusdt', 42))
+        tracer.stamp(trace, 'handled', 100.021)
+        self.assertEqual(trace.num_fills, 2)
+        self.assertIsNone(tracer.on_trade_clearing(make_trade_clearing_event('btcusdt', 43)))
+
+        summary = tracer.summary(percents=(50,))
+        self.assertEqual(list(summary), ['decision->sent', 'sent->ack', 'ack->order_update', 'ack->trade_clearing',
+                                         'trade_clearing->handled'])
+        for stages, latency in [('decision->sent', 2), ('sent->ack', 10), ('ack->order_update', 3),
+                                ('ack->trade_clearing', 8), ('trade_clearing->handled', 1)]:
+            self.assertEqual(summary[stages]['count'], 1)
+            self.assertAlmostEqual(summary[stages]['p50'], latency, delta=latency / 50 + 0.002)
+
+        # the decision was cleared, and a rejected order is never acked
+        rejected = tracer.start('btcusdt', 'c2')
+        tracer.on_ack(rejected, None)
+        self.assertEqual(rejected.times['decision'], rejected.times['sent'])
+        self.assertNotIn('ack', rejected.times)
+
+        # the ring buffer evicts the oldest trace
+        tracer.start('btcusdt', 'c3')
+        self.assertIsNone(tracer.get_trace(42))
+        self.assertIsNone(tracer.get_trace(client_order_id='c1'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces.jsonl')
+            tracer.dump(path)
+            with open(path) as file:
+                traces = [json.loads(line) for line in file]
+        self.assertEqual([trace['client_order_id'] for trace in traces], ['c2', 'c3'])
+
+    def test_trader(self):
+        tracer = OrderTracer()
+        trader = Trader('key', 'secret', 1, order_tracer=tracer)
+
+        def batch_create_order(order_config_list):
+            results = []
+            for i, order in enumerate(order_config_list):
+                result = BatchCreateOrder()
+                result.client_order_id = order['client_order_id']
+                result.order_id = 100 + i if i % 2 == 0 else None
+                results.append(result)
+            return results
+
+        with patch.object(trader.trade_client, 'batch_create_order', side_effect=batch_create_order):
+            trader.submit_orders('btcusdt', [20000, 20001, 20002], [0.001, 0.001, 0.001], OrderType.BUY_LIMIT)
+        self.assertEqual(len(tracer.traces), 3)
+        self.assertEqual([trace.order_id for trace in tracer.traces], ['100', None, '102'])
+
+        # a result whose client order id doesn't map back to a trace is returned untraced
+        unmapped = BatchCreateOrder()
+        unmapped.client_order_id, unmapped.order_id = '', 300
+        with patch.object(trader.trade_client, 'batch_create_order', return_value=[unmapped]):
+            self.assertEqual(trader.submit_orders('btcusdt', [20000], [0.001], OrderType.BUY_LIMIT), [unmapped])
+        self.assertIsNone(tracer.get_trace(300))
+
+        with patch.object(trader.trade_client, 'create_order', return_value=200):
+            trader.create_order('btcusdt', 20000, OrderType.BUY_LIMIT, amount=0.001)
+        self.assertEqual(tracer.get_trace(200).symbol, 'btcusdt')
+
+        handled = []
+        with patch.object(trader.trade_client, 'sub_trade_clearing') as sub_trade_clearing:
+            trader.add_trade_clearing_subscription('btcusdt', lambda event: handled.append(event.data.orderId))
+        on_trade_clearing = sub_trade_clearing.call_args[0][1]
+        on_trade_clearing(make_trade_clearing_event('btcusdt', 200))
+        self.assertEqual(handled, [200])
+        self.assertIn('handled', tracer.get_trace(200).times)
+        self.assertEqual(tracer.summary()['trade_clearing->handled']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from huobi.constant import *
+from huobi.model.market import DepthEntry, PriceDepthEvent, TradeDetail, TradeDetailEvent
+from trader import MatchingEngine, PaperTrader
+from trader.fill_models import ConstantLatency
+
+
+def make_trade_detail_event(symbol, prices, amount=1.0):
+    event = TradeDetailEvent()
+    event.ch = f'market.{symbol}.trade.detail'
+    for price in prices:
+        trade = TradeDetail()
+        trade.price = price
+        trade.amount = amount
+        event.data.append(trade)
+    return event
+
+
+def make_price_depth_event(symbol, bids, asks):
+    event = PriceDepthEvent()
+    event.ch = f'market.{symbol}.depth.step0'
+    for rows, entries in ((bids, event.tick.bids), (asks, event.tick.asks)):
+        for price, amount in rows:
+            entry = DepthEntry()
+            entry.price, entry.amount = price, amount
+            entries.append(entry)
+    return event
+
+
+class PaperTraderTest(unittest.TestCase):
+    def setUp(self):
+        self.market_client = MagicMock()
+        self.market_client.get_market_trade.return_value = [make_trade_detail_event('ethusdt', [2000]).data[0]]
+        self.trader = PaperTrader({'usdt': 100, 'eth': 0.1}, ['ethusdt'], market_client=self.market_client,
+                                  depth_step=DepthStep.STEP0).start()
+        self.on_trade_detail = self.market_client.sub_trade_detail.call_args[0][1]
+        self.on_price_depth = self.market_client.sub_pricedepth.call_args[0][2]
+
+    def test_fills(self):
+        self.assertEqual(self.trader.get_newest_price('ethusdt'), 2000)
+        events = []
+        self.trader.add_trade_clearing_subscription('ethusdt', events.append)
+        order_id = self.trader.create_order('ethusdt', 1900, OrderType.BUY_LIMIT, 0.02)
+        self.on_trade_detail(make_trade_detail_event('ethusdt', [1950, 1960]))
+        self.assertEqual(self.trader.get_order(order_id).state, OrderState.SUBMITTED)
+        # trades are sent newest first, so the newest price is the first one
+        self.on_trade_detail(make_trade_detail_event('ethusdt', [1920, 1890]))
+        self.assertEqual(self.trader.get_newest_price('ethusdt'), 1920)
+        self.assertEqual(self.trader.get_order(order_id).state, OrderState.FILLED)
+
+        # the same push as the trade.clearing channel of Trader
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].ch, 'trade.clearing#ethusdt#0')
+        trade_clearing = events[0].data
+        self.assertEqual((trade_clearing.orderId, trade_clearing.orderSide, trade_clearing.aggressor),
+                         (order_id, OrderSide.BUY, False))
+        self.assertEqual(float(trade_clearing.tradePrice), 1900)
+        self.assertAlmostEqual(float(trade_clearing.tradeVolume), 0.0199)
+        self.assertAlmostEqual(self.trader.get_balance('eth'), 0.1 + 0.0199 * (1 - PaperTrader.FEE))
+
+        self.trader.create_order('ethusdt', None, OrderType.SELL_MARKET, 0.05)
+        self.assertTrue(events[-1].data.aggressor)
+        self.assertEqual(float(events[-1].data.tradePrice), 1920)
+
+    def test_matching_engine_aggressor(self):
+        trader = PaperTrader({'usdt': 100, 'eth': 0.1}, ['ethusdt'], market_client=self.market_client,
+                             matching_engine=MatchingEngine())
+        events = []
+        trader.add_trade_clearing_subscription('ethusdt', events.append)
+        sell_id = trader.create_order('ethusdt', 2010, OrderType.SELL_LIMIT, 0.02)
+        # a limit order crossing the book fills as the taker
+        buy_id = trader.create_order('ethusdt', 2020, OrderType.BUY_LIMIT, 0.02)
+        self.assertEqual([(event.data.orderId, event.data.aggressor) for event in events],
+                         [(sell_id, False), (buy_id, True)])
+
+    def test_latency(self):
+        trader = PaperTrader({'usdt': 100, 'eth': 0.1}, ['ethusdt'], market_client=self.market_client,
+                             latency_model=ConstantLatency(0.05)).start()
+        on_trade_detail = self.market_client.sub_trade_detail.call_args[0][1]
+        order_id = trader.create_order('ethusdt', 1990, OrderType.BUY_LIMIT, 0.02)
+        on_trade_detail(make_trade_detail_event('ethusdt', [1980]))
+        self.assertEqual(trader.get_order(order_id).state, OrderState.SUBMITTED)
+        time.sleep(0.1)
+        on_trade_detail(make_trade_detail_event('ethusdt', [1985]))
+        self.assertEqual(trader.get_order(order_id).state, OrderState.FILLED)
+
+    def test_depth(self):
+        self.on_price_depth(make_price_depth_event('ethusdt', [[1999, 1], [1998, 2]], [[2001, 3]]))
+        depth = self.trader.depths['ethusdt']
+        self.assertEqual(depth.bid_prices.tolist(), [1999, 1998])
+        self.assertEqual(depth.ask_amounts.tolist(), [3])
+
+        subscribers = [self.market_client.sub_trade_detail.return_value, self.market_client.sub_pricedepth.return_value]
+        self.trader.stop()
+        for subscriber in subscribers:
+            subscriber.unsubscribe_all.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
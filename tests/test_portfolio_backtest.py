@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from trader import BacktestTrader, PortfolioBacktest
+from strategy.grid_strategy import GridStrategy
+
+
+class PortfolioBacktestTest(unittest.TestCase):
+    def test_merge_streams(self):
+        streams = {
+            'ethusdt': [(1, 2000), (3, 2010), (3, 2020)],
+            'btcusdt': (np.array([2, 3, 5]), np.array([30000, 30100, 30200])),
+        }
+        merged = list(PortfolioBacktest.merge_streams(streams))
+        self.assertEqual([(t, s) for t, s, _, _ in merged],
+                         [(1, 'ethusdt'), (2, 'btcusdt'), (3, 'ethusdt'), (3, 'ethusdt'), (3, 'btcusdt'),
+                          (5, 'btcusdt')])
+
+    def test_shared_balance(self):
+        trader = BacktestTrader({'usdt': 2000, 'eth': 0, 'btc': 0}, {'ethusdt': 2500, 'btcusdt': 30000},
+                                init_time=0)
+        strategies = {
+            'eth_grid': GridStrategy(trader, 'ethusdt', 0, 1000, 2000, 3000, 10, enable_logger=False, interval=None),
+            'btc_grid': GridStrategy(trader, 'btcusdt', 0, 1000, 25000, 35000, 10, enable_logger=False,
+                                     interval=None),
+        }
+        backtest = PortfolioBacktest(trader, strategies)
+        streams = {
+            'ethusdt': [(10, 2410), (30, 2290), (50, 2510), (70, 2710)],
+            'btcusdt': [(20, 31100), (40, 29900), (60, 28900)],
+        }
+        report = backtest.run(streams)
+        self.assertEqual(trader.get_time(), 70)
+        eth_grid, btc_grid = strategies['eth_grid'], strategies['btc_grid']
+        self.assertAlmostEqual(eth_grid.target_asset, trader.balance['eth'])
+        self.assertAlmostEqual(btc_grid.target_asset, trader.balance['btc'])
+        self.assertAlmostEqual(eth_grid.base_asset + btc_grid.base_asset, trader.balance['usdt'])
+        self.assertAlmostEqual(report['pnl'], sum(info['pnl'] for info in report['strategies'].values()))
+        self.assertEqual(len(backtest.equity_values), 7)
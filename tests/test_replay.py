@@ -0,0 +1,96 @@
+import gzip
+import json
+import tempfile
+import time
+import unittest
+
+from huobi.connection.impl.websocket_recorder import WebsocketRecorder
+
+from trader import BacktestTrader
+from strategy.grid_strategy import GridStrategy
+from utils.replay import MarketDataReplay
+
+
+def trade_frame(symbol, price, amount, trade_id):
+    message = {'ch': f'market.{symbol}.trade.detail', 'ts': trade_id,
+               'tick': {'id': trade_id, 'ts': trade_id,
+                        'data': [{'price': price, 'amount': amount, 'tradeId': trade_id, 'ts': trade_id,
+                                  'direction': 'buy'}]}}
+    return gzip.compress(json.dumps(message).encode())
+
+
+def kline_frame(symbol, close):
+    message = {'ch': f'market.{symbol}.kline.1min', 'ts': 1,
+               'tick': {'id': 1, 'open': close, 'close': close, 'low': close, 'high': close, 'amount': 1, 'vol': 1,
+                        'count': 1}}
+    return gzip.compress(json.dumps(message).encode())
+
+
+def mbp_frame(symbol, bids, asks):
+    return json.dumps({'ch': f'market.{symbol}.mbp.150', 'ts': 1,
+                       'tick': {'seqNum': 1, 'prevSeqNum': 0, 'bids': bids, 'asks': asks}})
+
+
+class MarketDataReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        recorder = WebsocketRecorder(self.dir.name)
+        recorder.record(1, '{"ping": 1}')
+        recorder.record(1, mbp_frame('ethusdt', [[2390, 1]], [[2400, 1]]))
+        recorder.record(1, trade_frame('ethusdt', 2410, 1, 1))
+        recorder.record(2, kline_frame('btcusdt', 30000))
+        recorder.record(1, mbp_frame('ethusdt', [[2390, 0], [2280, 2]], []))
+        recorder.record(1, trade_frame('ethusdt', 2290, 1, 2))
+        recorder.record(1, trade_frame('ethusdt', 2510, 1, 3))
+        recorder.close()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_callbacks(self):
+        replay = MarketDataReplay(self.dir.name)
+        trades, klines = [], []
+        replay.sub_trade_detail('ethusdt', trades.append)
+        replay.sub_candlestick('btcusdt', '1min', klines.append)
+        self.assertEqual(replay.run(), 4)
+        self.assertEqual(replay.num_frames, 7)
+        self.assertEqual([event.data[0].price for event in trades], [2410, 2290, 2510])
+        self.assertEqual(trades[0].data[0].tradeId, 1)
+        self.assertEqual(klines[0].tick.close, 30000)
+
+    def test_error_handler(self):
+        replay = MarketDataReplay(self.dir.name)
+        errors = []
+        replay.sub_trade_detail('ethusdt', lambda event: 1 / 0, errors.append)
+        replay.run()
+        self.assertEqual(len(errors), 3)
+        replay = MarketDataReplay(self.dir.name)
+        replay.sub_trade_detail('ethusdt', lambda event: 1 / 0)
+        self.assertRaises(ZeroDivisionError, replay.run)
+
+    def test_trader(self):
+        trader = BacktestTrader({'usdt': 1000, 'eth': 0}, {'ethusdt': 2500})
+        strategy = GridStrategy(trader, 'ethusdt', 0, 1000, 2000, 3000, 10, enable_logger=False, interval=None)
+        strategy.start(2500)
+        replay = MarketDataReplay(self.dir.name)
+        replay.add_trader(trader, 'ethusdt', [strategy], mbp_levels=150)
+        replay.run()
+        self.assertEqual(trader.get_newest_price('ethusdt'), 2510)
+        self.assertGreater(trader.get_time(), time.time() - 60)
+        depth = trader.depths['ethusdt']
+        self.assertEqual(list(depth.bid_prices), [2280])
+        self.assertEqual(list(depth.ask_prices), [2400])
+        self.assertAlmostEqual(strategy.target_asset, trader.balance['eth'])
+        self.assertGreater(len(trader.fills), 0)
+
+    def test_time_range_and_speed(self):
+        replay = MarketDataReplay(self.dir.name, start=time.time() + 60)
+        self.assertEqual(replay.run(), 0)
+        replay = MarketDataReplay(self.dir.name, speed=1)
+        replay.sub_trade_detail('ethusdt', lambda event: None)
+        replay.run()
+        self.assertEqual(replay.clock.speed, 1)
+        self.assertAlmostEqual(replay.clock.now(), time.time(), delta=60)
+
+if __name__ == '__main__':
+    unittest.main()
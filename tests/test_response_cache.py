@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from huobi.client.account import AccountClient
+from huobi.client.generic import GenericClient
+from huobi.connection.impl.response_cache import ResponseCache
+from huobi.constant import *
+from huobi.model.account import Account
+from trader.trader import Trader
+
+
+def make_account(account_id, account_type):
+    account = Account()
+    account.id = account_id
+    account.type = account_type
+    return account
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_lru_and_ttl(self):
+        cache = ResponseCache(ttls={'/a': 10}, max_size=2)
+        for i in range(3):
+            cache.put(i, str(i), cache.get_ttl('/a'))
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.get(1), '1')
+        cache.put(3, '3', 10)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), '1')
+        cache.put(4, '4', 0)
+        self.assertIsNone(cache.get(4))
+        with patch('time.monotonic', return_value=float('inf')):
+            self.assertIsNone(cache.get(1))
+
+    def test_client_requests(self):
+        cache = ResponseCache()
+        accounts = [make_account(1, AccountType.MARGIN), make_account(2, AccountType.SPOT)]
+        with patch('huobi.connection.restapi_sync_client.call_sync', return_value=accounts) as call_sync:
+            client = AccountClient(api_key='key', secret_key='secret', response_cache=cache)
+            for _ in range(3):
+                self.assertEqual(client.get_account_by_type_and_symbol(AccountType.SPOT, symbol=None).id, 2)
+            self.assertEqual(call_sync.call_count, 1)
+            # another key doesn't share the accounts
+            AccountClient(api_key='other', secret_key='secret', response_cache=cache).get_accounts()
+            self.assertEqual(call_sync.call_count, 2)
+
+            cache.invalidate('/v1/account/accounts')
+            client.get_accounts()
+            self.assertEqual(call_sync.call_count, 3)
+            # balances aren't cached
+            client.get_balance(2)
+            client.get_balance(2)
+            self.assertEqual(call_sync.call_count, 5)
+
+    def test_trader_cancels(self):
+        trader = Trader('key', 'secret', 2)
+        trader.account_client = AccountClient(api_key='key', secret_key='secret', response_cache=ResponseCache())
+        accounts = [make_account(1, AccountType.MARGIN), make_account(2, AccountType.SPOT)]
+        with patch('huobi.connection.restapi_sync_client.call_sync', return_value=accounts) as call_sync, \
+                patch.object(trader.trade_client, 'get_open_orders', return_value=[]) as get_open_orders:
+            for _ in range(3):
+                trader.cancel_all_buy_orders('ethusdt')
+            self.assertEqual(call_sync.call_count, 1)
+            self.assertEqual(get_open_orders.call_args[1]['account_id'], 2)
+
+    def test_disabled(self):
+        with patch('huobi.connection.restapi_sync_client.call_sync', return_value=[]) as call_sync:
+            client = GenericClient(response_cache=None)
+            client.get_exchange_symbols()
+            client.get_exchange_symbols()
+            self.assertEqual(call_sync.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
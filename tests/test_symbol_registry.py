@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from huobi.constant import OrderType
+from huobi.model.generic import Symbol
+
+from constants import SymbolRegistry, TransactionPair, transaction_pairs
+from trader.trader import Trader
+
+
+def make_symbol(name, base, quote, price_precision, amount_precision):
+    symbol = Symbol()
+    symbol.symbol = name
+    symbol.base_currency = base
+    symbol.quote_currency = quote
+    symbol.price_precision = price_precision
+    symbol.amount_precision = amount_precision
+    symbol.min_order_value = 5
+    symbol.limit_order_min_order_amt = 0.001
+    symbol.state = 'online'
+    return symbol
+
+
+class SymbolRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.dir.name, 'symbols.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_pair(self):
+        pair = TransactionPair(2, 4, 'eth', 'usdt')
+        self.assertEqual(pair.format_price(2000.456), '2000.46')
+        self.assertEqual(pair.format_amount(0.1), '0.1000')
+        self.assertAlmostEqual(pair.amount_step, 1e-4)
+        # quantized by value, where '%.2f' would round the binary 2000.4549... down
+        self.assertEqual(pair.quantize_price(2000.455), 2000.46)
+        self.assertEqual(pair.format_price(2000.455), '2000.46')
+        self.assertEqual(pair.quantize_amount(0.12345678), 0.1235)
+
+    def test_min_order(self):
+        pair = TransactionPair(2, 4, 'eth', 'usdt', min_order_value=5, min_order_amount=0.001)
+        pair.check_order(2000, 0.01)
+        with self.assertRaises(ValueError):
+            pair.check_order(2000, 0.0009)
+        with self.assertRaises(ValueError):
+            pair.check_order(1000, 0.004)
+
+        trader = Trader('key', 'secret', 1)
+        with mock.patch.dict(transaction_pairs, {'ethusdt': pair}), \
+                mock.patch.object(trader.trade_client, 'create_order', return_value=1) as create_order, \
+                mock.patch.object(trader.trade_client, 'batch_create_order', return_value=[]) as batch_create_order:
+            with self.assertRaises(ValueError):
+                trader.create_order('ethusdt', None, OrderType.BUY_MARKET, amount=4)
+            with self.assertRaises(ValueError):
+                trader.submit_orders('ethusdt', [2000, 1000], [0.01, 0.004], OrderType.BUY_LIMIT)
+            create_order.assert_not_called()
+            batch_create_order.assert_not_called()
+            self.assertEqual(trader.create_order('ethusdt', 2000, OrderType.BUY_LIMIT, amount=0.01), 1)
+
+    def test_lazy_load(self):
+        registry = SymbolRegistry({'ethusdt': TransactionPair(2, 4, 'eth', 'usdt')}, cache_path=self.cache_path)
+        symbols = [make_symbol('ethusdt', 'eth', 'usdt', 2, 4), make_symbol('solusdt', 'sol', 'usdt', 4, 3)]
+        with mock.patch('huobi.client.generic.GenericClient.get_exchange_symbols', return_value=symbols) as get:
+            self.assertEqual(registry['ethusdt'].price_scale, 2)
+            get.assert_not_called()
+            pair = registry['solusdt']
+            self.assertEqual((pair.target, pair.base, pair.amount_scale), ('sol', 'usdt', 3))
+            self.assertEqual(pair.min_order_value, 5)
+            self.assertRaises(KeyError, registry.__getitem__, 'xyzusdt')
+            self.assertEqual(get.call_count, 1)
+
+        # a fresh cache is read instead of requesting the exchange
+        registry = SymbolRegistry(cache_path=self.cache_path)
+        with mock.patch('huobi.client.generic.GenericClient.get_exchange_symbols', side_effect=RuntimeError) as get:
+            self.assertEqual(registry['solusdt'].price_scale, 4)
+            get.assert_not_called()
+
+    def test_expired_cache(self):
+        with open(self.cache_path, 'w') as file:
+            json.dump({'loaded_at': time.time() - 7200, 'pairs': {}}, file)
+        registry = SymbolRegistry(cache_path=self.cache_path, ttl=3600)
+        with mock.patch('huobi.client.generic.GenericClient.get_exchange_symbols',
+                        side_effect=ConnectionError('offline')) as get:
+            self.assertRaises(KeyError, registry.__getitem__, 'solusdt')
+            # a failed load isn't retried on every lookup
+            self.assertRaises(KeyError, registry.__getitem__, 'solusdt')
+            self.assertEqual(get.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
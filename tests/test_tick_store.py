@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from huobi.model.market import Trade, TradeDetail, TradeDetailEvent
+
+from utils import TickStore
+from utils.tick_store import MS_PER_DAY
+
+DAY = 19000 * MS_PER_DAY
+
+
+def make_trades(cls, ids, prices, amount=1.0):
+    trades = []
+    for trade_id, price in zip(ids, prices):
+        trade = cls()
+        setattr(trade, 'trade_id' if cls is Trade else 'tradeId', trade_id)
+        trade.ts = DAY + trade_id * 1000
+        trade.price = price
+        trade.amount = amount
+        trade.direction = 'buy' if trade_id % 2 else 'sell'
+        trades.append(trade)
+    return trades
+
+
+class TickStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = TickStore(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_merge_history_and_stream(self):
+        event = TradeDetailEvent()
+        event.ch = 'market.ethusdt.trade.detail'
+        event.data = make_trades(TradeDetail, [5, 6, 7], [105, 106, 107])
+        self.store.on_trade_detail(event)
+        self.store.flush()
+        # the REST history overlaps the streamed trades
+        self.store.add_trades('ethusdt', make_trades(Trade, [1, 2, 3, 4, 5, 6], [101, 102, 103, 104, 105, 106]))
+        self.store.flush()
+        ticks = self.store.scan('ethusdt')
+        np.testing.assert_array_equal(ticks['trade_id'], [1, 2, 3, 4, 5, 6, 7])
+        np.testing.assert_array_equal(ticks['direction'], [1, -1, 1, -1, 1, -1, 1])
+        # newer ticks are appended
+        self.store.add_trades('ethusdt', make_trades(TradeDetail, [7, 8], [107, 108]))
+        self.store.flush('ethusdt')
+        self.assertEqual(len(self.store.scan('ethusdt')), 8)
+
+    def test_partitions_and_queries(self):
+        store = TickStore(self.dir.name, flush_size=3)
+        trades = make_trades(Trade, [1, 2, 3], [100, 110, 120], amount=2.0)
+        trades[-1].ts += MS_PER_DAY
+        store.add_trades('ethusdt', trades)
+        self.assertEqual(len(store.get_days('ethusdt')), 2)
+        self.assertEqual(len(store.scan('ethusdt', DAY, DAY + MS_PER_DAY)), 2)
+        self.assertIsInstance(store.scan('ethusdt', DAY, DAY + MS_PER_DAY).base, np.memmap)
+        self.assertEqual(len(store.scan('ethusdt', DAY + 2000)), 2)
+        self.assertAlmostEqual(store.vwap('ethusdt'), 110)
+        self.assertAlmostEqual(store.vwap('ethusdt', end=DAY + 2500), 105)
+        self.assertAlmostEqual(store.volume('ethusdt'), 6)
+        self.assertAlmostEqual(store.volume('ethusdt', direction='sell'), 2)
+        self.assertTrue(np.isnan(store.vwap('btcusdt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
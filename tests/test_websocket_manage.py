@@ -0,0 +1,117 @@
+import gzip
+import json
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from huobi.connection.impl.private_def import ConnectionState, RECONNECT_INITIAL_DELAY_MS, RECONNECT_MAX_DELAY_MS
+from huobi.connection.impl.websocket_manage import WebsocketManage
+from huobi.connection.impl.websocket_request import WebsocketRequest
+from huobi.constant import *
+
+
+def make_manage(api_version=ApiVersion.VERSION_V1):
+    request = WebsocketRequest()
+    request.api_version = api_version
+    request.json_parser = lambda dict_data: dict_data
+    request.update_callback = MagicMock()
+    request.error_handler = MagicMock()
+    manage = WebsocketManage('key', 'secret', 'wss://api.huobi.pro', request)
+    manage.original_connection = MagicMock()
+    return manage
+
+
+def make_frame(dict_data):
+    return gzip.compress(json.dumps(dict_data, separators=(',', ':')).encode())
+
+
+class WebsocketManageTest(unittest.TestCase):
+    def test_market_frames(self):
+        manage = make_manage()
+        kline = {'ch': 'market.ethusdt.kline.1min', 'ts': 1, 'tick': {'id': 1}}
+        manage.on_message(make_frame(kline))
+        manage.on_message(make_frame(kline))
+        self.assertEqual(manage.request.update_callback.call_count, 2)
+        manage.request.update_callback.assert_called_with(kline)
+
+        manage.on_message(make_frame({'ping': 1630000000000}))
+        manage.original_connection.send.assert_called_with('{"pong":1630000000000}')
+        manage.on_message(make_frame({'id': '1', 'status': 'ok', 'subbed': 'market.ethusdt.kline.1min'}))
+        self.assertEqual(manage.request.update_callback.call_count, 2)
+        manage.on_message(make_frame({'id': '2', 'rep': 'market.ethusdt.kline.1min', 'status': 'ok', 'data': []}))
+        self.assertEqual(manage.request.update_callback.call_count, 3)
+
+        manage.on_message(make_frame({'status': 'error', 'err-code': 'bad-request', 'err-msg': 'invalid topic'}))
+        self.assertEqual(manage.request.error_handler.call_args[0][0].error_message,
+                         'bad-request: invalid topic')
+        manage.request.update_callback.assert_called_with({'id': '2', 'rep': 'market.ethusdt.kline.1min',
+                                                           'status': 'ok', 'data': []})
+
+    def test_v2_frames(self):
+        manage = make_manage(ApiVersion.VERSION_V2)
+        manage.on_message('{"action":"sub","code":200,"ch":"orders#ethusdt"}')
+        manage.on_message('{"action":"push","ch":"orders#ethusdt","data":{}}')
+        manage.request.update_callback.assert_not_called()
+        manage.on_message('{"action":"push","ch":"orders#ethusdt","data":{"orderId":1}}')
+        manage.request.update_callback.assert_called_once()
+        manage.on_message('{"action":"ping","data":{"ts":1630000000000}}')
+        manage.original_connection.send.assert_called_with('{"action": "pong","data": {"ts": 1630000000000}}')
+
+
+    def test_reconnect(self):
+        manage = make_manage()
+        manage.request.subscription_handler = MagicMock()
+        manage.request.gap_handler = MagicMock()
+        connected = threading.Event()
+        first_connection = manage.original_connection
+        manage.on_open(first_connection)
+        manage.request.subscription_handler.assert_called_once_with(manage)
+        manage.on_message(make_frame({'ch': 'market.ethusdt.kline.1min', 'ts': 1, 'tick': {}}))
+        last_receive_time = manage.last_receive_time
+
+        # the server closes the connection, it's reopened after a short delay
+        with patch.object(manage, 'connect', side_effect=connected.set):
+            manage.on_close(first_connection)
+            self.assertEqual(manage.state, ConnectionState.WAIT_RECONNECT)
+            first_connection.close.assert_called_once()
+            # the close event of the stale connection doesn't schedule another reconnect
+            manage.on_close(first_connection)
+            self.assertTrue(connected.wait(1))
+        self.assertEqual(manage.reconnect_attempts, 1)
+        manage.on_open(MagicMock())
+        gap_event = manage.request.gap_handler.call_args[0][0]
+        self.assertEqual(gap_event.last_receive_time, last_receive_time)
+        self.assertEqual(gap_event.attempts, 1)
+        self.assertEqual(manage.request.subscription_handler.call_count, 2)
+        manage.on_message(make_frame({'ping': 1}))
+        self.assertEqual(manage.reconnect_attempts, 0)
+
+        # closed by the client
+        manage.close()
+        manage.on_close(manage.original_connection)
+        self.assertEqual(manage.state, ConnectionState.CLOSED)
+
+    def test_no_auto_connect(self):
+        manage = make_manage()
+        manage.watch_dog = MagicMock(is_auto_connect=False)
+        connection = manage.original_connection
+        manage.on_open(connection)
+        manage.close_on_error()
+        with patch.object(manage, 'close_and_wait_reconnect') as close_and_wait_reconnect:
+            manage.on_close(connection)
+            manage.state = ConnectionState.CONNECTED
+            manage.on_close(connection)
+        close_and_wait_reconnect.assert_not_called()
+        self.assertEqual(manage.state, ConnectionState.IDLE)
+
+    def test_backoff(self):
+        manage = make_manage()
+        for attempts in range(20):
+            manage.reconnect_attempts = attempts
+            delay = min(RECONNECT_INITIAL_DELAY_MS * 2 ** attempts, RECONNECT_MAX_DELAY_MS)
+            for _ in range(10):
+                self.assertTrue(delay / 2 - 1 <= manage.next_reconnect_delay() <= delay)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from huobi.connection.impl.websocket_recorder import *
+
+
+class WebsocketRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_record_and_read(self):
+        recorder = WebsocketRecorder(self.dir.name, compress=True, index_interval_ms=0)
+        text = json.dumps({'action': 'push', 'ch': 'orders#ethusdt', 'data': {'orderId': 1}})
+        binary = gzip.compress(json.dumps({'ch': 'market.ethusdt.trade.detail', 'tick': {}}).encode())
+        recorder.record(1, text)
+        recorder.record(2, binary)
+        recorder.close()
+        recorder.record(1, text)  # ignored after close
+        self.assertEqual(recorder.frames, 2)
+
+        segments = list_segments(self.dir.name)
+        self.assertEqual(len(segments), 1)
+        reader = SegmentReader(segments[0])
+        frames = list(reader.frames())
+        self.assertEqual([frame[1] for frame in frames], [1, 2])
+        self.assertEqual(decode_frame(frames[0][2], frames[0][3]), text)
+        self.assertEqual(decode_frame(frames[1][2], frames[1][3]), binary)
+        self.assertEqual(len(reader.index_times), 2)
+        self.assertEqual(len(list(reader.frames(start_ns=frames[1][0]))), 1)
+        self.assertEqual(len(list(reader.frames(end_ns=frames[1][0]))), 1)
+        del frames
+        reader.close()
+
+    def test_segments(self):
+        recorder = WebsocketRecorder(self.dir.name, segment_bytes=100)
+        for i in range(5):
+            recorder.record(1, json.dumps({'ping': i, 'padding': 'x' * 100}))
+        recorder.close()
+        segments = list_segments(self.dir.name)
+        self.assertEqual(len(segments), 5)
+        # a new recorder never appends to the segments of an old one
+        recorder = WebsocketRecorder(self.dir.name)
+        recorder.record(1, '{"ping": 5}')
+        recorder.close()
+        self.assertEqual(len(list_segments(self.dir.name)), 6)
+
+    def test_truncated_frame(self):
+        recorder = WebsocketRecorder(self.dir.name)
+        recorder.record(1, '{"ping": 1}')
+        recorder.record(1, '{"ping": 2}')
+        recorder.close()
+        path = list_segments(self.dir.name)[0]
+        with open(path, 'r+b') as file:
+            file.truncate(os.path.getsize(path) - 3)
+        reader = SegmentReader(path)
+        self.assertEqual(len(list(reader.frames())), 1)
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,6 @@
 from .trader import Trader
 from .backtest_trader import BacktestTrader
 from .base_trader import BaseTrader
+from .portfolio_backtest import PortfolioBacktest
+from .matching_engine import MatchingEngine
+from .paper_trader import PaperTrader
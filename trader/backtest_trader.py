@@ -9,8 +9,12 @@ from .base_trader import BaseTrader
 import utils
 
 
+FILL_DTYPE = np.dtype([('time', 'f8'), ('symbol', 'U16'), ('side', 'i1'), ('is_maker', '?'),
+                       ('price', 'f8'), ('amount', 'f8'), ('cash_amount', 'f8'), ('fee', 'f8')])
+
+
 class BackTestOrder(object):
-    def __init__(self, order_id, symbol, order_type, price, amount):
+    def __init__(self, order_id, symbol, order_type, price, amount, created_at=0, active_at=0, queue_ahead=0.0):
         self.id = order_id
         self.symbol = symbol
         self.type = order_type
@@ -19,16 +23,15 @@ class BackTestOrder(object):
         self.filled_amount = 0
         self.filled_fees = 0
         self.filled_cash_amount = 0
+        self.created_at = created_at
+        self.active_at = active_at
+        self.queue_ahead = queue_ahead
         self.finished_at = 0
         self.canceled_at = 0
         self.state = OrderState.SUBMITTED
-        if order_type == OrderType.BUY_MARKET:
-            self.set_finished(amount / price, amount / price * BaseTrader.FEE * 2, amount)
-        elif order_type == OrderType.SELL_MARKET:
-            self.set_finished(amount, amount * price * BaseTrader.FEE * 2, amount * price)
 
-    def set_finished(self, filled_amount, filled_fees, filled_cash_amount):
-        self.finished_at = 1
+    def set_finished(self, filled_amount, filled_fees, filled_cash_amount, finished_at):
+        self.finished_at = finished_at
         self.filled_amount = filled_amount
         self.filled_fees = filled_fees
         self.filled_cash_amount = filled_cash_amount
@@ -36,28 +39,66 @@ class BackTestOrder(object):
 
 
 class BackTestSubscription(object):
-    def __init__(self, callback, error_handler):
+    def __init__(self, symbol, callback, error_handler):
+        self.symbol = symbol
         self.callback = callback
         self.error_handler = error_handler
 
     def notify(self, trade_clearing_event):
-        self.callback(trade_clearing_event)
+        # Like trade.clearing#{symbol}, only fills of the subscribed symbol are pushed; '*' receives every symbol
+        if self.symbol in ('*', trade_clearing_event.data.symbol):
+            self.callback(trade_clearing_event)
 
 
 class BacktestTrader(BaseTrader):
-    def __init__(self, balance, init_price, init_time=10000000):
+    def __init__(self, balance, init_price, init_time=10000000, clock=None, time_step=1,
+                 latency_model=None, queue_model=None, slippage_model=None, equity_quote=None, candle_store=None,
+                 matching_engine=None):
+        """Trader simulating an exchange on fed prices.
+
+        balance -- initial balance of every currency, e.g. {'usdt': 1000, 'eth': 0}
+        init_price -- initial price of every symbol, e.g. {'ethusdt': 2000}
+        init_time -- simulated unix time in seconds when the backtest starts; ignored if clock is given
+        clock -- utils.SimulatedClock shared with other traders or a replay; created at init_time if None
+        time_step -- seconds the clock advances on every feed without a timestamp
+        latency_model -- delays the arrival of orders at the simulated exchange, see trader.fill_models
+        queue_model -- fills limit orders only after the queue ahead of them has traded
+        slippage_model -- fills market orders worse than the last price, e.g. against the fed depth
+        equity_quote -- currency to record the value of the balances in at the start and after every feed
+        candle_store -- utils.CandleStore the previous prices are read from; simulated if it lacks the window
+        matching_engine -- trader.MatchingEngine filling the limit orders by price-time priority, partially up to the
+                           fed volumes; replaces the queue model
+        """
+        if queue_model is not None and matching_engine is not None:
+            raise ValueError('queue_model and matching_engine cannot be used together')
         super().__init__()
         self.balance = balance
         self.init_price = init_price
-        self.init_time = init_time
-        self.time = init_time
+        self.clock = clock if clock is not None else utils.SimulatedClock(init_time)
+        self.init_time = self.clock.now()
+        self.time_step = time_step
         self.newest_prices = init_price
+        self.latency_model = latency_model
+        self.queue_model = queue_model
+        self.slippage_model = slippage_model
+        self.candle_store = candle_store
+        self.matching_engine = matching_engine
+        self.depths = {}
         self.orders = {}
         self.unfinished_orders = {}
+        self.pending_market_orders = {}
+        self.pending_limit_orders = {}
         self.subscriptions = []
+        self.fills = []
+        self.equity_quote = equity_quote
+        self.equity_times = []
+        self.equity_values = []
+        if equity_quote is not None:
+            self.equity_times.append(self.init_time)
+            self.equity_values.append(self.get_total_value(equity_quote))
 
     def add_trade_clearing_subscription(self, symbol, callback, error_handler=None):
-        subscription = BackTestSubscription(callback, error_handler)
+        subscription = BackTestSubscription(symbol, callback, error_handler)
         self.subscriptions.append(subscription)
         return subscription
 
@@ -77,15 +118,53 @@ class BacktestTrader(BaseTrader):
     def get_order(self, order_id):
         return self.orders[order_id]
 
-    def notify_all_subscriptions(self, order):
+    def get_price_in(self, currency, quote='usdt', prices=None):
+        """Return the price of currency in quote through the <currency><quote> or <quote><currency> price."""
+        prices = self.newest_prices if prices is None else prices
+        if currency == quote:
+            return 1.0
+        if currency + quote in prices:
+            return prices[currency + quote]
+        if quote + currency in prices:
+            return 1 / prices[quote + currency]
+        raise ValueError(f'Unable to value {currency} in {quote}: no price of {currency}{quote}')
+
+    def get_total_value(self, quote='usdt', balance=None, prices=None):
+        """Return the value of the balances in quote at the given or newest prices."""
+        balance = self.balance if balance is None else balance
+        return sum(amount * self.get_price_in(currency, quote, prices) for currency, amount in balance.items() if amount)
+
+    def record_fill(self, order, is_maker, price=None, amount=None, fees=None):
+        # Fees are charged in the received currency; the log keeps them in the base currency for comparability
+        # A partial fill of the matching engine gives its own price, amount and fees
+        price = order.price if price is None else price
+        cash_amount = order.filled_cash_amount if amount is None else amount * price
+        amount = order.filled_amount if amount is None else amount
+        fees = order.filled_fees if fees is None else fees
+        is_buy = order.type in (OrderType.BUY_LIMIT, OrderType.BUY_MARKET)
+        fee = fees * price if is_buy else fees
+        self.fills.append((self.get_time(), order.symbol, 1 if is_buy else -1, is_maker,
+                           price, amount, cash_amount, fee))
+
+    def fill_log(self):
+        """Return the fills so far as a structured array of FILL_DTYPE, fees in the base currency of the symbol."""
+        return np.array(self.fills, dtype=FILL_DTYPE)
+
+    def equity_curve(self):
+        """Return the times and values in equity_quote recorded after every feed."""
+        return np.array(self.equity_times, dtype=float), np.array(self.equity_values, dtype=float)
+
+    def notify_all_subscriptions(self, order, is_maker, price=None, amount=None, fees=None):
+        """Push the fill of an order, of price, amount and fees if partial, to the trade clearing subscriptions."""
         from huobi.model.trade import TradeClearing, TradeClearingEvent
         trade_clearing = TradeClearing()
         trade_clearing.symbol = order.symbol
         trade_clearing.orderId = order.id
-        trade_clearing.tradePrice = order.price
-        trade_clearing.tradeVolume = order.filled_amount
-        trade_clearing.transactFee = order.filled_fees
+        trade_clearing.tradePrice = order.price if price is None else price
+        trade_clearing.tradeVolume = order.filled_amount if amount is None else amount
+        trade_clearing.transactFee = order.filled_fees if fees is None else fees
         trade_clearing.orderType = order.type
+        trade_clearing.aggressor = not is_maker
         trade_clearing_event = TradeClearingEvent()
         trade_clearing_event.data = trade_clearing
         for subscription in self.subscriptions:
@@ -120,20 +199,26 @@ class BacktestTrader(BaseTrader):
             raise TypeError('price must be of float or int type')
         if amount <= 0:
             raise ValueError('amount must be greater than 0')
-        if order_type == OrderType.BUY_MARKET:
-            self.balance[pair.target] += amount / price * (1 - self.FEE * 2)
-            self.balance[pair.base] -= amount
-        elif order_type == OrderType.SELL_MARKET:
-            self.balance[pair.target] -= amount
-            self.balance[pair.base] += amount * price * (1 - self.FEE * 2)
 
         order_id = str(uuid.uuid4())
-        order = BackTestOrder(order_id, symbol, order_type, price, amount)
-        if order_type in (OrderType.BUY_LIMIT, OrderType.SELL_LIMIT):
-            self.unfinished_orders[order_id] = order
-        elif order_type in (OrderType.BUY_MARKET, OrderType.SELL_MARKET):
-            self.notify_all_subscriptions(order)
+        now = self.get_time()
+        latency = 0 if self.latency_model is None else self.latency_model.sample()
+        order = BackTestOrder(order_id, symbol, order_type, price, amount, created_at=now, active_at=now + latency)
         self.orders[order_id] = order
+        if order_type in (OrderType.BUY_LIMIT, OrderType.SELL_LIMIT) and self.matching_engine is not None:
+            if latency > 0:
+                self.pending_limit_orders[order_id] = order
+            else:
+                self.add_to_matching_engine(order)
+        elif order_type in (OrderType.BUY_LIMIT, OrderType.SELL_LIMIT):
+            if self.queue_model is not None:
+                order.queue_ahead = self.queue_model.initial_queue(
+                    [price], [order_type == OrderType.BUY_LIMIT], self.depths.get(symbol))[0]
+            self.unfinished_orders[order_id] = order
+        elif latency > 0:
+            self.pending_market_orders[order_id] = order
+        else:
+            self.fill_market_order(order)
         return order_id
 
     def submit_orders(self, symbol, prices, amounts, order_type):
@@ -150,42 +235,161 @@ class BacktestTrader(BaseTrader):
                 raise RuntimeError(f'Order does not exist: {order_id}')
             if order_id not in self.unfinished_orders:
                 pass
-            if order.symbol == symbol:
+            if order.symbol == symbol and self.matching_engine is not None:
+                if self.pending_limit_orders.pop(order_id, None) is not None \
+                        or self.matching_engine.cancel(order_id) is not None:
+                    self.unfinished_orders.pop(order_id, None)
+                    order.state = OrderState.PARTIAL_CANCELED if order.filled_amount else OrderState.CANCELED
+                    order.canceled_at = self.get_time()
+            elif order.symbol == symbol:
                 if self.unfinished_orders.get(order_id):
                     del self.unfinished_orders[order_id]
                     order = self.orders.get(order_id, None)
                     order.state = OrderState.CANCELED
+                    order.canceled_at = self.get_time()
 
     def get_time(self):
-        self.time += 1
-        return self.time
+        return self.clock.now()
+
+    def feed_depth(self, symbol, bids, asks):
+        """Feed a depth snapshot used to queue limit orders and to fill market orders with the models."""
+        from .fill_models import Depth
+        self.depths[symbol] = Depth(bids, asks)
+
+    def fill_market_order(self, order):
+        pair = transaction_pairs[order.symbol]
+        price = self.get_newest_price(order.symbol)
+        if self.slippage_model is not None:
+            price = self.slippage_model.fill_prices([order.type == OrderType.BUY_MARKET], [order.amount], price,
+                                                    self.depths.get(order.symbol))[0]
+        order.price = price
+        if order.type == OrderType.BUY_MARKET:
+            self.balance[pair.target] += order.amount / price * (1 - self.FEE * 2)
+            self.balance[pair.base] -= order.amount
+            order.set_finished(order.amount / price, order.amount / price * self.FEE * 2, order.amount,
+                               self.get_time())
+        else:
+            self.balance[pair.target] -= order.amount
+            self.balance[pair.base] += order.amount * price * (1 - self.FEE * 2)
+            order.set_finished(order.amount, order.amount * price * self.FEE * 2, order.amount * price,
+                               self.get_time())
+        self.record_fill(order, is_maker=False)
+        self.notify_all_subscriptions(order, is_maker=False)
+
+    def fill_limit_order(self, order):
+        pair = transaction_pairs[order.symbol]
+        filled_cash_amount = order.amount * order.price
+        if order.type == OrderType.BUY_LIMIT:
+            self.balance[pair.target] += order.amount * (1 - self.FEE)
+            self.balance[pair.base] -= filled_cash_amount
+            order.set_finished(order.amount, order.amount * self.FEE, filled_cash_amount, self.get_time())
+        else:
+            self.balance[pair.target] -= order.amount
+            self.balance[pair.base] += filled_cash_amount * (1 - self.FEE)
+            order.set_finished(order.amount, filled_cash_amount * self.FEE, filled_cash_amount, self.get_time())
+        self.record_fill(order, is_maker=True)
+        self.notify_all_subscriptions(order, is_maker=True)
+
+    def add_to_matching_engine(self, order):
+        self.unfinished_orders[order.id] = order
+        # an order crossing resting ones of the opposite side takes them at once
+        self.apply_engine_fills(self.matching_engine.add_order(
+            order.id, order.symbol, order.type == OrderType.BUY_LIMIT, order.price, order.amount, self.get_time()))
+
+    def apply_engine_fills(self, fills):
+        for order_id, price, amount, fee, is_maker in fills:
+            self.fill_limit_order_partially(self.orders[order_id], price, amount, fee, is_maker)
+
+    def fill_limit_order_partially(self, order, price, amount, fee, is_maker=True):
+        """Apply a fill of the matching engine, of amount of the order at price, with fee in the received currency."""
+        pair = transaction_pairs[order.symbol]
+        filled_cash_amount = amount * price
+        if order.type == OrderType.BUY_LIMIT:
+            self.balance[pair.target] += amount - fee
+            self.balance[pair.base] -= filled_cash_amount
+        else:
+            self.balance[pair.target] -= amount
+            self.balance[pair.base] += filled_cash_amount - fee
+        order.filled_amount += amount
+        order.filled_fees += fee
+        order.filled_cash_amount += filled_cash_amount
+        if self.matching_engine.get_order(order.id) is None:
+            del self.unfinished_orders[order.id]
+            order.finished_at = self.get_time()
+            order.state = OrderState.FILLED
+        else:
+            order.state = OrderState.PARTIAL_FILLED
+        self.record_fill(order, is_maker, price, amount, fee)
+        self.notify_all_subscriptions(order, is_maker, price, amount, fee)
+
+    def get_filled_limit_orders(self, orders, price, volume):
+        """Return the mask of the limit orders of one symbol filled by a trade at price of the given volume."""
+        now = self.get_time()
+        order_prices = np.fromiter((order.price for order in orders), dtype=float, count=len(orders))
+        is_buy = np.fromiter((order.type == OrderType.BUY_LIMIT for order in orders), dtype=bool, count=len(orders))
+        if self.latency_model is None:
+            active = np.ones(len(orders), dtype=bool)
+        else:
+            active = np.fromiter((order.active_at <= now for order in orders), dtype=bool, count=len(orders))
+        if self.queue_model is None:
+            return active & np.where(is_buy, price <= order_prices, price >= order_prices)
+        queue_ahead = np.fromiter((order.queue_ahead for order in orders), dtype=float, count=len(orders))
+        filled, remaining = self.queue_model.update(order_prices, is_buy, queue_ahead, price,
+                                                    0.0 if volume is None else volume)
+        for order, queue, is_active in zip(orders, remaining, active):
+            if is_active:
+                order.queue_ahead = queue
+        return active & filled
 
     def get_previous_prices(self, symbol, window_type, window_size):
+        if self.candle_store is not None:
+            candles = self.candle_store.get_last(symbol, window_type, window_size, end=self.init_time)
+            if len(candles['id']) == window_size:
+                return zip(candles['id'].tolist(), ((candles['open'] + candles['close']) / 2).tolist())
         seconds = utils.get_seconds_of_candlestick_interval(window_type)
         prices = utils.brownian_motion(self.init_price[symbol], window_size, delta_t=0.1 * seconds)
         return zip(range(self.init_time - window_size * seconds, self.init_time, seconds), reversed(prices))
 
-    def feed(self, prices):
+    def match_limit_orders(self, symbol, price, volume):
+        now = self.get_time()
+        arrived_orders = [order for order in self.pending_limit_orders.values()
+                          if order.symbol == symbol and order.active_at <= now]
+        for order in arrived_orders:
+            del self.pending_limit_orders[order.id]
+            self.add_to_matching_engine(order)
+        self.apply_engine_fills(self.matching_engine.match_trade(symbol, price, volume))
+
+    def feed(self, prices, timestamp=None, volumes=None):
+        """Feed the newest prices and fill the orders they reach.
+
+        prices -- dict of the newest price of every fed symbol
+        timestamp -- exchange time of the prices in seconds; the clock advances by time_step if None
+        volumes -- dict of the volume traded at the newest price of every symbol, consumed by the queue model or
+                   shared by the limit orders of the matching engine
+        """
+        if timestamp is None:
+            self.clock.advance(self.time_step)
+        else:
+            self.clock.advance_to(timestamp)
+        now = self.get_time()
         for symbol, price in prices.items():
             self.newest_prices[symbol] = price
-            finished_order_ids = []
-            pair = transaction_pairs[symbol]
-            for order_id, order in self.unfinished_orders.items():
-                if symbol == order.symbol:
-                    assert order.type in (OrderType.BUY_LIMIT, OrderType.SELL_LIMIT)
-                    if order.type == OrderType.BUY_LIMIT and price <= order.price:
-                        filled_cash_amount = order.amount * order.price
-                        self.balance[pair.target] += order.amount * (1 - self.FEE)
-                        self.balance[pair.base] -= filled_cash_amount
-                        finished_order_ids.append(order_id)
-                        self.orders[order_id].set_finished(order.amount, order.amount * self.FEE, filled_cash_amount)
-                        self.notify_all_subscriptions(self.orders[order_id])
-                    elif order.type == OrderType.SELL_LIMIT and price >= order.price:
-                        filled_cash_amount = order.amount * order.price
-                        self.balance[pair.target] -= order.amount
-                        self.balance[pair.base] += filled_cash_amount * (1 - self.FEE)
-                        finished_order_ids.append(order_id)
-                        self.orders[order_id].set_finished(order.amount, filled_cash_amount * self.FEE, filled_cash_amount)
-                        self.notify_all_subscriptions(self.orders[order_id])
-            for order_id in finished_order_ids:
-                del self.unfinished_orders[order_id]
+            arrived_orders = [order for order in self.pending_market_orders.values()
+                              if order.symbol == symbol and order.active_at <= now]
+            for order in arrived_orders:
+                del self.pending_market_orders[order.id]
+                self.fill_market_order(order)
+            if self.matching_engine is not None:
+                self.match_limit_orders(symbol, price, None if volumes is None else volumes.get(symbol))
+                continue
+            orders = [order for order in self.unfinished_orders.values() if order.symbol == symbol]
+            if not orders:
+                continue
+            filled = self.get_filled_limit_orders(orders, price, None if volumes is None else volumes.get(symbol))
+            for order, is_filled in zip(orders, filled):
+                if is_filled:
+                    del self.unfinished_orders[order.id]
+                    self.fill_limit_order(order)
+        if self.equity_quote is not None:
+            self.equity_times.append(now)
+            self.equity_values.append(self.get_total_value(self.equity_quote))
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+class ConstantLatency(object):
+    def __init__(self, latency):
+        """Order submission latency of a fixed number of seconds."""
+        if latency < 0:
+            raise ValueError('latency must not be negative')
+        self.latency = latency
+
+    def sample(self, size=None):
+        if size is None:
+            return self.latency
+        return np.full(size, self.latency, dtype=float)
+
+
+class LognormalLatency(object):
+    def __init__(self, median, sigma=0.5, min_latency=0.0, seed=None):
+        """Order submission latency in seconds drawn from a log-normal distribution.
+
+        Network round trips are skewed to the right: most orders arrive around the median but some take
+        several times longer, which sigma controls.
+        """
+        if median <= 0:
+            raise ValueError('median must be greater than 0')
+        self.median = median
+        self.sigma = sigma
+        self.min_latency = min_latency
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, size=None):
+        return np.maximum(self.min_latency, self.median * np.exp(self.sigma * self.rng.standard_normal(size)))
+
+
+class Depth(object):
+    def __init__(self, bids, asks):
+        """Snapshot of the order book of a symbol, given as [[price, amount], ...] like the depth channel."""
+        bids = np.asarray(bids, dtype=float).reshape(-1, 2)
+        asks = np.asarray(asks, dtype=float).reshape(-1, 2)
+        bids = bids[np.argsort(-bids[:, 0], kind='stable')]
+        asks = asks[np.argsort(asks[:, 0], kind='stable')]
+        self.bid_prices, self.bid_amounts = bids[:, 0], bids[:, 1]
+        self.ask_prices, self.ask_amounts = asks[:, 0], asks[:, 1]
+
+    def amounts_at(self, prices, is_buy):
+        """Return the displayed amount at every price on the side a limit order at that price would rest on."""
+        prices = np.atleast_1d(np.asarray(prices, dtype=float))
+        is_buy = np.broadcast_to(np.asarray(is_buy, dtype=bool), prices.shape)
+        amounts = np.zeros(prices.shape)
+        for mask, level_prices, level_amounts in ((is_buy, self.bid_prices[::-1], self.bid_amounts[::-1]),
+                                                  (~is_buy, self.ask_prices, self.ask_amounts)):
+            if len(level_prices) == 0 or not mask.any():
+                continue
+            idx = np.minimum(np.searchsorted(level_prices, prices[mask]), len(level_prices) - 1)
+            amounts[mask] = np.where(np.isclose(level_prices[idx], prices[mask]), level_amounts[idx], 0.0)
+        return amounts
+
+
+class QueuePositionModel(object):
+    def __init__(self, default_queue=0.0, queue_fraction=1.0):
+        """Fill limit orders only after the volume traded at their price exceeds the queue ahead of them.
+
+        default_queue -- amount assumed ahead of a new order when no depth snapshot of the symbol is known
+        queue_fraction -- share of the displayed amount at the order price that is ahead of a new order;
+                          1 puts the order at the back of the queue
+        An order is also filled once the price trades through it, since the whole level has been consumed.
+        """
+        self.default_queue = default_queue
+        self.queue_fraction = queue_fraction
+
+    def initial_queue(self, prices, is_buy, depth=None):
+        prices = np.asarray(prices, dtype=float)
+        if depth is None:
+            return np.full(prices.shape, self.default_queue, dtype=float)
+        return depth.amounts_at(prices, is_buy) * self.queue_fraction
+
+    @staticmethod
+    def update(order_prices, is_buy, queue_ahead, trade_price, trade_volume):
+        """Consume the traded volume from the queues and return the filled mask and the remaining queues."""
+        through = np.where(is_buy, trade_price < order_prices, trade_price > order_prices)
+        at_price = np.isclose(trade_price, order_prices)
+        queue_ahead = np.where(at_price, queue_ahead - trade_volume, queue_ahead)
+        return through | (at_price & (queue_ahead < 0)), queue_ahead
+
+
+class FixedSlippageModel(object):
+    def __init__(self, slippage):
+        """Fill market orders at a fixed fraction worse than the last price."""
+        self.slippage = slippage
+
+    def fill_prices(self, is_buy, amounts, last_price, depth=None):
+        return np.where(is_buy, last_price * (1 + self.slippage), last_price * (1 - self.slippage))
+
+
+class DepthSlippageModel(object):
+    def __init__(self, fallback_slippage=0.0):
+        """Fill market orders by walking the levels of the latest depth snapshot.
+
+        Buy market amounts are in the base currency (quote of the price) and sell market amounts are in the target
+        currency, like the orders of the exchange. An order larger than the snapshot fills its remainder at the
+        last level. fallback_slippage is applied to the last price when no snapshot of the symbol is known.
+        """
+        self.fallback = FixedSlippageModel(fallback_slippage)
+
+    @staticmethod
+    def walk(level_prices, level_amounts, amounts, in_quote):
+        """Return the average fill price of every amount against levels sorted from best to worst."""
+        amounts = np.asarray(amounts, dtype=float)
+        if in_quote:
+            measure, other = level_prices * level_amounts, level_amounts
+        else:
+            measure, other = level_amounts, level_prices * level_amounts
+        cum_measure = np.concatenate(([0.0], np.cumsum(measure)))
+        cum_other = np.concatenate(([0.0], np.cumsum(other)))
+        level = np.clip(np.searchsorted(cum_measure, amounts, side='left') - 1, 0, len(level_prices) - 1)
+        remaining = amounts - cum_measure[level]
+        if in_quote:
+            filled = cum_other[level] + remaining / level_prices[level]
+            return amounts / filled
+        filled = cum_other[level] + remaining * level_prices[level]
+        return filled / amounts
+
+    def fill_prices(self, is_buy, amounts, last_price, depth=None):
+        is_buy, amounts = np.broadcast_arrays(np.atleast_1d(np.asarray(is_buy, dtype=bool)),
+                                              np.atleast_1d(np.asarray(amounts, dtype=float)))
+        if depth is None:
+            return self.fallback.fill_prices(is_buy, amounts, last_price)
+        prices = np.empty(amounts.shape)
+        for mask, level_prices, level_amounts in ((is_buy, depth.ask_prices, depth.ask_amounts),
+                                                  (~is_buy, depth.bid_prices, depth.bid_amounts)):
+            if not mask.any():
+                continue
+            if len(level_prices) == 0:
+                prices[mask] = self.fallback.fill_prices(is_buy[mask], amounts[mask], last_price)
+            else:
+                prices[mask] = self.walk(level_prices, level_amounts, amounts[mask], in_quote=bool(is_buy[mask][0]))
+        return prices
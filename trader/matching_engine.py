@@ -0,0 +1,210 @@
+import collections
+
+import numpy as np
+
+
+class EngineOrder(object):
+    def __init__(self, order_id, symbol, is_buy, price, amount, time):
+        self.id = order_id
+        self.symbol = symbol
+        self.is_buy = is_buy
+        self.price = price
+        self.amount = amount
+        self.remaining = amount
+        self.time = time
+
+
+class PriceLevels(object):
+    def __init__(self, is_buy, capacity=64):
+        """Price levels of one side of a book, in arrays sorted so that the best level is the last one.
+
+        Bids are kept by ascending price and asks by descending price, so taking or emptying the best level only
+        touches the end of the arrays. The orders of a level wait in a FIFO queue, by time priority.
+
+        is_buy -- True for the bids
+        capacity -- initial number of levels of the arrays, doubled when full
+        """
+        self.is_buy = is_buy
+        # the key of a level is its price for bids and its negated price for asks, ascending in both
+        self.sign = 1.0 if is_buy else -1.0
+        self.keys = np.empty(capacity)
+        self.amounts = np.empty(capacity)
+        self.size = 0
+        self.queues = {}
+
+    def __len__(self):
+        return self.size
+
+    def best_price(self):
+        return float(self.keys[self.size - 1]) * self.sign if self.size else None
+
+    def index(self, price):
+        return int(np.searchsorted(self.keys[:self.size], price * self.sign))
+
+    def add(self, order):
+        queue = self.queues.get(order.price)
+        if queue is None:
+            queue = self.queues[order.price] = collections.deque()
+            i = self.index(order.price)
+            if self.size == len(self.keys):
+                self.keys = np.concatenate([self.keys, np.empty(len(self.keys))])
+                self.amounts = np.concatenate([self.amounts, np.empty(len(self.amounts))])
+            if i < self.size:
+                self.keys[i + 1:self.size + 1] = self.keys[i:self.size]
+                self.amounts[i + 1:self.size + 1] = self.amounts[i:self.size]
+            self.keys[i] = order.price * self.sign
+            self.amounts[i] = order.remaining
+            self.size += 1
+        else:
+            self.amounts[self.index(order.price)] += order.remaining
+        queue.append(order)
+
+    def remove_level(self, price, i):
+        del self.queues[price]
+        self.size -= 1
+        if i < self.size:
+            self.keys[i:self.size] = self.keys[i + 1:self.size + 1]
+            self.amounts[i:self.size] = self.amounts[i + 1:self.size + 1]
+
+    def remove(self, order):
+        queue = self.queues[order.price]
+        queue.remove(order)
+        i = self.index(order.price)
+        if queue:
+            self.amounts[i] -= order.remaining
+        else:
+            self.remove_level(order.price, i)
+
+    def reached(self, price):
+        """Return the index of the worst level reached by a trade at price; levels from it to the best are."""
+        return int(np.searchsorted(self.keys[:self.size], price * self.sign, side='left'))
+
+    def depth(self, levels=None):
+        """Return the (price, amount) rows of the levels, best first."""
+        start = 0 if levels is None else max(self.size - levels, 0)
+        return np.column_stack([self.keys[start:self.size][::-1] * self.sign, self.amounts[start:self.size][::-1]])
+
+
+class MatchingEngine(object):
+    # amounts left below it by float arithmetic, e.g. 1.0 - 0.7 - 0.3, count as filled
+    EPSILON = 1e-12
+
+    def __init__(self, maker_fee=0.002, taker_fee=0.002):
+        """Limit order books matching by price-time priority, shared by the simulated traders and exchanges.
+
+        Orders resting in a book fill as makers, against orders crossing them or against trades of the market fed
+        with match_trade, partially when the amount available is smaller than theirs. Fills are returned as
+        (order_id, price, amount, fee, is_maker) tuples, the fee being in the currency received: the target
+        currency on buys and the base currency on sells.
+
+        maker_fee -- fee rate of the fills of resting orders
+        taker_fee -- fee rate of the fills of orders crossing the book
+        """
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.books = {}
+        self.orders = {}
+
+    def get_book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = (PriceLevels(True), PriceLevels(False))
+        return book
+
+    def get_fee(self, is_buy, price, amount, is_maker):
+        return (self.maker_fee if is_maker else self.taker_fee) * (amount if is_buy else amount * price)
+
+    def get_order(self, order_id):
+        """Return the resting order of the id, or None once it is filled or canceled."""
+        return self.orders.get(order_id)
+
+    def get_open_orders(self, symbol):
+        bids, asks = self.get_book(symbol)
+        return [order for levels in (bids, asks) for queue in levels.queues.values() for order in queue]
+
+    def depth(self, symbol, levels=None):
+        """Return the bids and asks of the resting orders as arrays of (price, amount) rows, best first."""
+        bids, asks = self.get_book(symbol)
+        return bids.depth(levels), asks.depth(levels)
+
+    def add_order(self, order_id, symbol, is_buy, price, amount, time=0):
+        """Add a limit order, matching it first against the resting orders it crosses, and return the fills.
+
+        The part of the order left unfilled rests in the book at price.
+        """
+        if order_id in self.orders:
+            raise ValueError(f'Order already in the book: {order_id}')
+        if price <= 0 or amount <= 0:
+            raise ValueError('price and amount must be greater than 0')
+        fills = []
+        remaining = self.take(symbol, is_buy, amount, price, order_id, fills)
+        if remaining > self.EPSILON:
+            order = EngineOrder(order_id, symbol, is_buy, price, amount, time)
+            order.remaining = remaining
+            self.get_book(symbol)[0 if is_buy else 1].add(order)
+            self.orders[order_id] = order
+        return fills
+
+    def execute(self, symbol, is_buy, amount, limit_price=None, order_id=None):
+        """Take up to amount from the resting orders, at prices up to limit_price for a buy or down to it for a
+        sell, and return the fills and the amount left unfilled.
+
+        order_id -- id of the taking order, also given fills as the taker if not None
+        """
+        fills = []
+        remaining = self.take(symbol, is_buy, amount, limit_price, order_id, fills)
+        return fills, remaining
+
+    def take(self, symbol, is_buy, amount, limit_price, taker_id, fills):
+        levels = self.get_book(symbol)[1 if is_buy else 0]
+        # a buy takes the asks at prices up to limit_price, a sell the bids at prices down to it
+        end = 0 if limit_price is None else levels.reached(limit_price)
+        return self.consume(levels, end, amount, taker_id, not is_buy, fills)
+
+    def match_trade(self, symbol, price, volume=None):
+        """Fill the resting orders reached by a trade of the market at price and return the fills.
+
+        Bids at or above price and asks at or below it fill at their own price, best price first and by time
+        within a price, up to volume in total, entirely if volume is None.
+        """
+        fills = []
+        for levels in self.get_book(symbol):
+            if levels.size:
+                volume = self.consume(levels, levels.reached(price), volume, None, levels.is_buy, fills)
+                if volume is not None and volume <= self.EPSILON:
+                    break
+        return fills
+
+    def consume(self, levels, end, amount, taker_id, maker_is_buy, fills):
+        # fills the orders of the levels from the best one down to end, up to amount, and returns what is left
+        while levels.size > end and (amount is None or amount > self.EPSILON):
+            i = levels.size - 1
+            price = float(levels.keys[i]) * levels.sign
+            queue = levels.queues[price]
+            while queue and (amount is None or amount > self.EPSILON):
+                order = queue[0]
+                filled = order.remaining if amount is None else min(order.remaining, amount)
+                order.remaining -= filled
+                levels.amounts[i] -= filled
+                if amount is not None:
+                    amount -= filled
+                fills.append((order.id, price, filled, self.get_fee(maker_is_buy, price, filled, True), True))
+                if taker_id is not None:
+                    fills.append((taker_id, price, filled, self.get_fee(not maker_is_buy, price, filled, False),
+                                  False))
+                if order.remaining <= self.EPSILON:
+                    levels.amounts[i] -= order.remaining
+                    order.remaining = 0.0
+                    queue.popleft()
+                    del self.orders[order.id]
+            if queue:
+                break
+            levels.remove_level(price, i)
+        return amount
+
+    def cancel(self, order_id):
+        """Remove a resting order from its book and return it, or None if it is filled, canceled or unknown."""
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self.get_book(order.symbol)[0 if order.is_buy else 1].remove(order)
+        return order
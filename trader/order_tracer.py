@@ -0,0 +1,135 @@
+import collections
+import json
+import threading
+import time
+
+from huobi.utils.latency_histogram import LatencyHistogram
+
+STAGES = ('decision', 'sent', 'ack', 'order_update', 'trade_clearing', 'handled')
+# the stage each stage is timed from
+PREVIOUS_STAGES = {'sent': 'decision', 'ack': 'sent', 'order_update': 'ack', 'trade_clearing': 'ack',
+                   'handled': 'trade_clearing'}
+
+
+class OrderTrace(object):
+    def __init__(self, symbol, client_order_id):
+        """Times of the stages of an order, from the decision of the strategy to the handling of its first fill."""
+        self.symbol = symbol
+        self.client_order_id = client_order_id
+        self.order_id = None
+        self.times = {}
+        self.num_fills = 0
+
+    def to_dict(self):
+        return {'symbol': self.symbol, 'client_order_id': self.client_order_id, 'order_id': self.order_id,
+                'times': self.times, 'num_fills': self.num_fills}
+
+
+class OrderTracer(object):
+    def __init__(self, capacity=10000):
+        """Trace orders through their stages and summarize the latency between consecutive stages.
+
+        Stages are the decision of the strategy, the REST request sent, its ack, the first order-update push, the
+        first trade-clearing push and the end of the strategy callback handling it. Times are unix times in seconds.
+        The latest capacity traces are kept in a ring buffer; the latency summary covers every traced order.
+
+        capacity -- number of traces kept
+        """
+        self.capacity = capacity
+        self.traces = collections.deque()
+        self.by_client_order_id = {}
+        self.by_order_id = {}
+        self.latencies = {stage: LatencyHistogram() for stage in PREVIOUS_STAGES}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def mark_decision(self, decision_time=None):
+        """Stamp the decision time of the next orders started by this thread, e.g. when the price was read."""
+        self.local.decision_time = time.time() if decision_time is None else decision_time
+
+    def clear_decision(self):
+        """Forget the decision time of this thread; orders started afterwards are stamped as decided when sent."""
+        self.local.decision_time = None
+
+    def start(self, symbol, client_order_id):
+        """Start the trace of an order about to be sent and stamp its decision and sent times."""
+        trace = OrderTrace(symbol, client_order_id)
+        now = time.time()
+        trace.times['decision'] = getattr(self.local, 'decision_time', None) or now
+        with self.lock:
+            if len(self.traces) >= self.capacity:
+                evicted = self.traces.popleft()
+                self.by_client_order_id.pop(evicted.client_order_id, None)
+                self.by_order_id.pop(evicted.order_id, None)
+            self.traces.append(trace)
+            self.by_client_order_id[client_order_id] = trace
+        self.stamp(trace, 'sent', now)
+        return trace
+
+    def stamp(self, trace, stage, stamp_time=None):
+        """Stamp the first time an order reached a stage and record its latency from the previous stage."""
+        if trace is None or stage in trace.times:
+            return
+        trace.times[stage] = time.time() if stamp_time is None else stamp_time
+        previous = trace.times.get(PREVIOUS_STAGES.get(stage))
+        if previous is not None:
+            self.latencies[stage].record((trace.times[stage] - previous) * 1e6)
+
+    def on_ack(self, trace, order_id):
+        """Stamp the REST ack of an order; a falsy order id means it was rejected.
+
+        trace -- None for a result whose client order id doesn't map back to a trace, which is ignored
+        """
+        if trace is None or not order_id:
+            return
+        self.stamp(trace, 'ack')
+        with self.lock:
+            trace.order_id = str(order_id)
+            self.by_order_id[trace.order_id] = trace
+
+    def get_trace(self, order_id=None, client_order_id=None):
+        with self.lock:
+            if order_id is not None:
+                return self.by_order_id.get(str(order_id))
+            return self.by_client_order_id.get(client_order_id)
+
+    def on_order_update(self, order_update_event):
+        """Callback of TradeClient.sub_order_update stamping the first push of an order."""
+        order_update = order_update_event.data
+        trace = self.get_trace(client_order_id=order_update.clientOrderId) or self.get_trace(order_update.orderId)
+        self.stamp(trace, 'order_update')
+
+    def on_trade_clearing(self, trade_clearing_event):
+        """Stamp a trade-clearing push and return the trace of its order, None if it isn't traced."""
+        trace = self.get_trace(trade_clearing_event.data.orderId)
+        if trace is not None:
+            trace.num_fills += 1
+            self.stamp(trace, 'trade_clearing')
+        return trace
+
+    def summary(self, percents=(50, 90, 99)):
+        """Return the count and percentiles in milliseconds of the latency of each stage from its previous stage."""
+        summary = {}
+        for stage in STAGES[1:]:
+            histogram = self.latencies[stage]
+            summary[f'{PREVIOUS_STAGES[stage]}->{stage}'] = {
+                'count': histogram.total,
+                **{f'p{percent:g}': None if value is None else value / 1000
+                   for percent, value in zip(percents, histogram.percentiles(percents))}}
+        return summary
+
+    def print_summary(self):
+        print('============ Order latency (ms) =============')
+        for stages, row in self.summary().items():
+            values = ', '.join(f'{key} {value:.3f}' for key, value in row.items()
+                               if key != 'count' and value is not None)
+            print(f'{stages:<30}count {row["count"]:<8}{values}')
+        print('=============================================')
+
+    def dump(self, path):
+        """Write the traces in the ring buffer to a JSON lines file."""
+        with self.lock:
+            traces = [trace.to_dict() for trace in self.traces]
+        with open(path, 'w') as file:
+            for trace in traces:
+                file.write(json.dumps(trace) + '\n')
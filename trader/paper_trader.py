@@ -0,0 +1,124 @@
+import itertools
+import threading
+import time
+
+from huobi.constant import *
+
+from constants import *
+from .backtest_trader import BacktestTrader
+import utils
+
+
+class PaperTrader(BacktestTrader):
+    def __init__(self, balance, symbols, market_client=None, depth_step=None, error_handler=None,
+                 latency_model=None, queue_model=None, slippage_model=None, matching_engine=None, equity_quote=None):
+        """Trader simulating the fills of its orders on the live market data, without placing any order.
+
+        The trades and, with depth_step, the depth of the symbols are read from the websocket channels once started
+        and fed to the fill logic of BacktestTrader: limit orders fill when a live trade reaches their price and
+        market orders at the last traded price. Fills are pushed to the trade clearing subscriptions as the events
+        of the trade.clearing channel Trader subscribes to, so strategies run unchanged, at live speed.
+
+        balance -- simulated initial balance of every currency, e.g. {'usdt': 1000, 'eth': 0}
+        symbols -- symbols whose market data is read, e.g. ['ethusdt']
+        market_client -- huobi.client.market.MarketClient reading the market data; a default one if None
+        depth_step -- depth channel fed to the queue and slippage models, e.g. DepthStep.STEP0; no depth if None
+        error_handler -- called with the errors of the market data subscriptions
+        latency_model, queue_model, slippage_model, matching_engine, equity_quote -- see BacktestTrader
+        """
+        if market_client is None:
+            from huobi.client.market import MarketClient
+            market_client = MarketClient()
+        self.market_client = market_client
+        self.symbols = list(symbols)
+        self.depth_step = depth_step
+        self.error_handler = error_handler
+        # orders are created by the strategies while the websocket threads feed the market data
+        self.lock = threading.RLock()
+        self.trade_ids = itertools.count(1)
+        self.subscribers = []
+        init_price = {symbol: self.market_client.get_market_trade(symbol=symbol)[0].price for symbol in self.symbols}
+        # orders wait for their latency on a sub-second clock, not the whole seconds of WallClock
+        super().__init__(balance, init_price, clock=utils.PreciseWallClock(), latency_model=latency_model,
+                         queue_model=queue_model, slippage_model=slippage_model, equity_quote=equity_quote,
+                         matching_engine=matching_engine)
+
+    def start(self):
+        """Subscribe to the market data of the symbols."""
+        symbols = ','.join(self.symbols)
+        self.subscribers.append(self.market_client.sub_trade_detail(symbols, self.on_trade_detail,
+                                                                    self.error_handler))
+        if self.depth_step is not None:
+            self.subscribers.append(self.market_client.sub_pricedepth(symbols, self.depth_step, self.on_price_depth,
+                                                                      self.error_handler))
+        return self
+
+    def stop(self):
+        for subscriber in self.subscribers:
+            if subscriber is not None:
+                subscriber.unsubscribe_all()
+        self.subscribers = []
+
+    @staticmethod
+    def get_symbol_of_channel(ch):
+        # market.<symbol>.trade.detail, market.<symbol>.depth.<step>
+        return ch.split('.')[1]
+
+    def on_trade_detail(self, trade_detail_event):
+        symbol = self.get_symbol_of_channel(trade_detail_event.ch)
+        # the trades of an event are sent newest first
+        for trade in reversed(trade_detail_event.data):
+            self.feed({symbol: trade.price}, volumes={symbol: trade.amount})
+
+    def on_price_depth(self, price_depth_event):
+        symbol = self.get_symbol_of_channel(price_depth_event.ch)
+        self.feed_depth(symbol, [[entry.price, entry.amount] for entry in price_depth_event.tick.bids],
+                        [[entry.price, entry.amount] for entry in price_depth_event.tick.asks])
+
+    def feed(self, prices, timestamp=None, volumes=None):
+        with self.lock:
+            super().feed(prices, timestamp, volumes)
+
+    def feed_depth(self, symbol, bids, asks):
+        with self.lock:
+            super().feed_depth(symbol, bids, asks)
+
+    def create_order(self, symbol, price, order_type, amount=None, amount_fraction=None):
+        with self.lock:
+            return super().create_order(symbol, price, order_type, amount, amount_fraction)
+
+    def cancel_orders(self, symbol, order_ids):
+        with self.lock:
+            super().cancel_orders(symbol, order_ids)
+
+    def notify_all_subscriptions(self, order, is_maker, price=None, amount=None, fees=None):
+        from huobi.model.trade import TradeClearingEvent
+        pair = transaction_pairs[order.symbol]
+        is_buy = order.type in (OrderType.BUY_LIMIT, OrderType.BUY_MARKET)
+        # the push of trade.clearing#<symbol>#0 the exchange would send for the fill
+        trade_clearing_event = TradeClearingEvent.json_parse({
+            'action': 'push',
+            'ch': f'trade.clearing#{order.symbol}#0',
+            'data': {
+                'eventType': 'trade',
+                'symbol': order.symbol,
+                'orderId': order.id,
+                'tradePrice': repr(float(order.price if price is None else price)),
+                'tradeVolume': repr(float(order.filled_amount if amount is None else amount)),
+                'orderSide': OrderSide.BUY if is_buy else OrderSide.SELL,
+                'orderType': order.type,
+                'aggressor': not is_maker,
+                'tradeId': next(self.trade_ids),
+                'tradeTime': int(time.time() * 1000),
+                'transactFee': repr(float(order.filled_fees if fees is None else fees)),
+                'feeCurrency': pair.target if is_buy else pair.base,
+                'feeDeduct': '0',
+                'feeDeductType': '',
+            },
+        })
+        for subscription in self.subscriptions:
+            subscription.notify(trade_clearing_event)
+
+    def get_previous_prices(self, symbol, window_type, window_size):
+        candlesticks = self.market_client.get_candlestick(symbol, window_type, window_size)
+        return [(cs.id, (cs.open + cs.close)/2) for cs in sorted(candlesticks, key=lambda cs: cs.id)]
@@ -0,0 +1,111 @@
+import heapq
+from operator import itemgetter
+
+import numpy as np
+
+from constants import *
+
+
+class PortfolioBacktest(object):
+    def __init__(self, trader, strategies, quote='usdt'):
+        """Run several strategies against the single balance sheet of one BacktestTrader.
+
+        trader -- BacktestTrader holding the shared balances; its newest prices must cover every symbol
+        strategies -- dict of name to unstarted strategy, or a list named after the strategy class and symbol
+        quote -- currency PnL is reported in, see BacktestTrader.get_price_in
+        """
+        if not isinstance(strategies, dict):
+            strategies = {f'{strategy.__class__.__name__}_{strategy.symbol}_{i}': strategy
+                          for i, strategy in enumerate(strategies)}
+        self.trader = trader
+        self.strategies = strategies
+        self.quote = quote
+        self.strategies_by_symbol = {}
+        for strategy in strategies.values():
+            self.strategies_by_symbol.setdefault(strategy.symbol, []).append(strategy)
+        self.initial_prices = dict(trader.newest_prices)
+        self.initial_balance = dict(trader.balance)
+        self.initial_values = {}
+        self.equity_times = []
+        self.equity_values = []
+
+    @staticmethod
+    def merge_streams(streams):
+        """Merge per-symbol streams into one stream of (timestamp, symbol, price, volume) in timestamp order.
+
+        streams -- dict of symbol to an iterable of (timestamp, price) or (timestamp, price, volume) sorted by time,
+                   or to a (timestamps, prices) pair of aligned arrays
+        Events with equal timestamps keep the order of the symbols in streams.
+        """
+        def events(symbol, stream):
+            if isinstance(stream, tuple) and len(stream) == 2 and np.ndim(stream[0]) == 1:
+                stream = zip(*stream)
+            for event in stream:
+                yield event[0], symbol, event[1], event[2] if len(event) > 2 else None
+
+        return heapq.merge(*[events(symbol, stream) for symbol, stream in streams.items()], key=itemgetter(0))
+
+    def get_total_value(self, balance=None, prices=None):
+        """Return the value of the balance sheet in the quote currency at the given or newest prices."""
+        return self.trader.get_total_value(self.quote, balance, prices)
+
+    def get_strategy_value(self, strategy, prices=None):
+        prices = self.trader.newest_prices if prices is None else prices
+        pair = transaction_pairs[strategy.symbol]
+        return strategy.target_asset * self.trader.get_price_in(pair.target, self.quote, prices) + \
+            strategy.base_asset * self.trader.get_price_in(pair.base, self.quote, prices)
+
+    def start(self):
+        for name, strategy in self.strategies.items():
+            self.initial_values[name] = self.get_strategy_value(strategy, self.initial_prices)
+            strategy.start(self.trader.get_newest_price(strategy.symbol))
+
+    def run(self, streams, record_equity=True):
+        """Feed the merged streams to the trader and to the strategies of every symbol and return the report."""
+        if not self.initial_values:
+            self.start()
+        for timestamp, symbol, price, volume in self.merge_streams(streams):
+            self.trader.feed({symbol: price}, timestamp=timestamp,
+                             volumes=None if volume is None else {symbol: volume})
+            for strategy in self.strategies_by_symbol.get(symbol, ()):
+                strategy.feed(price)
+            if record_equity:
+                self.equity_times.append(timestamp)
+                self.equity_values.append(self.get_total_value())
+        return self.report()
+
+    def report(self):
+        strategies = {}
+        for name, strategy in self.strategies.items():
+            value = self.get_strategy_value(strategy)
+            strategies[name] = {
+                'symbol': strategy.symbol,
+                'initial_value': self.initial_values[name],
+                'value': value,
+                'pnl': value - self.initial_values[name],
+                'return': value / self.initial_values[name] - 1,
+            }
+        initial_total = self.get_total_value(self.initial_balance, self.initial_prices)
+        total = self.get_total_value()
+        return {
+            'quote': self.quote,
+            'strategies': strategies,
+            'initial_value': initial_total,
+            'value': total,
+            'pnl': total - initial_total,
+            'return': total / initial_total - 1,
+        }
+
+    def print_report(self):
+        report = self.report()
+        lines = [f'  {name} ({info["symbol"]}): {info["pnl"]:.2f} {self.quote}, {info["return"]*100:.2f}%'
+                 for name, info in report['strategies'].items()]
+        strategies = '\n'.join(lines)
+        print(f'============ Portfolio backtest =============\n'
+              f'Strategies:\n'
+              f'{strategies}\n'
+              f'Total:\n'
+              f'  Start: {report["initial_value"]:.2f} {self.quote}\n'
+              f'  End: {report["value"]:.2f} {self.quote}\n'
+              f'  Profit: {report["pnl"]:.2f} {self.quote}, {report["return"]*100:.2f}%\n'
+              f'=============================================')
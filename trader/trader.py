@@ -7,15 +7,24 @@ from huobi.client.algo import AlgoClient
 from huobi.client.trade import TradeClient
 from huobi.client.account import AccountClient
 from huobi.client.market import MarketClient
+from huobi.utils.metrics import metrics_registry
 
 import numpy as np
 import scipy.stats as stats
 
 import time
+import utils
+
+orders_placed = metrics_registry.counter('trader_orders_placed_total', 'Orders accepted by the exchange',
+                                         ['symbol', 'order_type'])
+orders_cancelled = metrics_registry.counter('trader_orders_cancelled_total', 'Orders cancelled by the exchange',
+                                            ['symbol'])
+orders_filled = metrics_registry.counter('trader_orders_filled_total', 'Trade clearing pushes of the orders',
+                                         ['symbol'])
 
 
 class Trader(BaseTrader):
-    def __init__(self, api_key, secret_key, account_id, verbose=False):
+    def __init__(self, api_key, secret_key, account_id, verbose=False, candle_store=None, order_tracer=None):
         super().__init__()
         self.account_id = account_id
         self.trade_client = TradeClient(api_key=api_key, secret_key=secret_key)
@@ -30,11 +39,33 @@ class Trader(BaseTrader):
         self.client_id_counter = 0
         self.verbose = verbose
         self.subscription = None
+        self.candle_store = candle_store
+        self.order_tracer = order_tracer
 
     def add_trade_clearing_subscription(self, symbol, callback, error_handler=None):
-        self.subscription = self.trade_client.sub_trade_clearing(symbol, callback, error_handler)
+        def on_trade_clearing(trade_clearing_event):
+            trace = None
+            if trade_clearing_event is not None and trade_clearing_event.data is not None:
+                orders_filled.labels(trade_clearing_event.data.symbol).inc()
+                if self.order_tracer is not None:
+                    trace = self.order_tracer.on_trade_clearing(trade_clearing_event)
+            callback(trade_clearing_event)
+            if trace is not None:
+                self.order_tracer.stamp(trace, 'handled')
+
+        self.subscription = self.trade_client.sub_trade_clearing(symbol, on_trade_clearing, error_handler)
         return self.subscription
 
+    def add_order_update_subscription(self, symbol, callback=None, error_handler=None):
+        """Subscribe to the order updates of a symbol, which stamp the traces of the orders if traced."""
+        def on_order_update(order_update_event):
+            if self.order_tracer is not None and order_update_event is not None:
+                self.order_tracer.on_order_update(order_update_event)
+            if callback is not None:
+                callback(order_update_event)
+
+        return self.trade_client.sub_order_update(symbol, on_order_update, error_handler)
+
     def remove_trade_clearing_subscription(self, subscription):
         self.subscription.unsubscribe_all()
 
@@ -67,26 +98,39 @@ class Trader(BaseTrader):
         prices -- list of prices of limit orders
         amounts -- list of amounts of limit orders
         order_type -- OrderType.BUY_LIMIT or OrderType.SELL_LIMIT
+
+        Raises ValueError, before placing any order, if an order is below the min order amount or value of the pair.
         """
         client_order_id_header = str(int(time.time()))
         order_ids = [f'{client_order_id_header}{symbol}{i:02d}' for i in range(len(prices))]
         pair = transaction_pairs[symbol]
-        price_scale, amount_scale = pair.price_scale, pair.amount_scale
+        amounts = [self.correct_amount(amount, symbol) for amount in amounts]
+        # checked before any batch is sent, so that the series is placed entirely or not at all
+        for amount, price in zip(amounts, prices):
+            pair.check_order(price, amount)
         orders = [
             {
                 'account_id': self.account_id,
                 'symbol': symbol,
                 'order_type': order_type,
                 'source': OrderSource.API,
-                'amount': f'{self.correct_amount(amount, symbol):.{amount_scale}f}',
-                'price': f'{price:.{price_scale}f}',
+                'amount': pair.format_amount(amount),
+                'price': pair.format_price(price),
                 'client_order_id': order_id
             }
             for amount, price, order_id in zip(amounts, prices, order_ids)
         ]
         results = []
         for i in range(0, len(orders), MAX_ORDER_NUM):
-            create_results = self.trade_client.batch_create_order(order_config_list=orders[i:i+MAX_ORDER_NUM])
+            batch = orders[i:i+MAX_ORDER_NUM]
+            if self.order_tracer is not None:
+                traces = {order['client_order_id']: self.order_tracer.start(symbol, order['client_order_id'])
+                          for order in batch}
+            create_results = self.trade_client.batch_create_order(order_config_list=batch)
+            orders_placed.labels(symbol, order_type).inc(sum(1 for result in create_results if result.order_id))
+            if self.order_tracer is not None:
+                for result in create_results:
+                    self.order_tracer.on_ack(traces.get(result.client_order_id), result.order_id)
             results += create_results
         LogInfo.output_list(results)
         return results
@@ -140,7 +184,7 @@ class Trader(BaseTrader):
         orders = self.generate_buy_queue_orders(symbol, lower_price, upper_price, num_orders, total_amount,
                                                 total_amount_fraction, distr)
         client_order_id_header = str(int(time.time()))
-        price_scale = transaction_pairs[symbol].price_scale
+        pair = transaction_pairs[symbol]
         algo_order_ids = []
         for i, order in enumerate(orders):
             client_order_id = f'{client_order_id_header}{symbol}{i:02d}'
@@ -148,8 +192,8 @@ class Trader(BaseTrader):
             stop_price = order_price * 0.999
             self.algo_client.create_order(
                 account_id=self.account_id, symbol=symbol, order_side=OrderSide.SELL, order_type=AlgoOrderType.LIMIT,
-                order_size=order['amount'], order_price=f'{order_price:.{price_scale}f}',
-                stop_price=f'{stop_price:.{price_scale}f}',
+                order_size=order['amount'], order_price=pair.format_price(order_price),
+                stop_price=pair.format_price(stop_price),
                 client_order_id=client_order_id)
             algo_order_ids.append(client_order_id)
         return results, orders, algo_order_ids
@@ -176,14 +220,23 @@ class Trader(BaseTrader):
                 amount = self.get_balance(pair.target) * amount_fraction
             else:
                 amount = self.get_balance(pair.base) * amount_fraction
-        amount = f'{float(amount):.{pair.amount_scale}f}'
         if price is not None:
-            price = f'{float(price):.{pair.price_scale}f}'
+            pair.check_order(float(price), float(amount))
+        elif order_type == OrderType.BUY_MARKET:
+            # the amount of a market buy is the value spent
+            pair.check_order_value(float(amount))
+        amount = pair.format_amount(float(amount))
+        if price is not None:
+            price = pair.format_price(float(price))
         self.update_timestamp()
         client_order_id = f'{self.latest_timestamp}{symbol}{self.client_id_counter:02d}'
+        trace = self.order_tracer.start(symbol, client_order_id) if self.order_tracer is not None else None
         order_id = self.trade_client.create_order(
             symbol=symbol, account_id=self.account_id, order_type=order_type, price=price,
             amount=amount, source=OrderSource.API, client_order_id=client_order_id)
+        orders_placed.labels(symbol, order_type).inc()
+        if trace is not None:
+            self.order_tracer.on_ack(trace, order_id)
         return order_id
 
     @staticmethod
@@ -191,9 +244,28 @@ class Trader(BaseTrader):
         return int(time.time())
 
     def get_previous_prices(self, symbol, window_type, window_size):
-        candlesticks = self.market_client.get_candlestick(symbol, window_type, window_size)
+        if self.candle_store is not None:
+            candlesticks = self.update_candle_store(symbol, window_type, window_size)
+            candles = self.candle_store.get_last(symbol, window_type, window_size)
+            if len(candles['id']) == window_size:
+                return list(zip(candles['id'].tolist(), ((candles['open'] + candles['close']) / 2).tolist()))
+            if len(candlesticks) < window_size:
+                candlesticks = self.market_client.get_candlestick(symbol, window_type, window_size)
+        else:
+            candlesticks = self.market_client.get_candlestick(symbol, window_type, window_size)
         return [(cs.id, (cs.open + cs.close)/2) for cs in sorted(candlesticks, key=lambda cs: cs.id)]
 
+    def update_candle_store(self, symbol, interval, window_size):
+        """Download the candles since the newest stored one, or the last window_size if none is stored."""
+        last_id = self.candle_store.last_id(symbol, interval)
+        if last_id is None:
+            num_candles = window_size
+        else:
+            num_candles = int(time.time() - last_id) // utils.get_seconds_of_candlestick_interval(interval) + 1
+        candlesticks = self.market_client.get_candlestick(symbol, interval, min(max(num_candles, 1), 2000))
+        self.candle_store.append(symbol, interval, candlesticks)
+        return candlesticks
+
     def create_buy_queue(self, symbol, lower_price, upper_price, num_orders,
                          total_amount=None, total_amount_fraction=None, distr=None):
         newest_price = self.get_newest_price(symbol)
@@ -227,11 +299,16 @@ class Trader(BaseTrader):
         cancel_results = []
         for i in range(0, len(order_ids), MAX_CANCEL_ORDER_NUM):
             cancel_result = self.trade_client.cancel_orders(symbol, order_ids[i:i+MAX_CANCEL_ORDER_NUM])
+            orders_cancelled.labels(symbol).inc(len(cancel_result.success))
             cancel_results.append(cancel_result)
         return cancel_results
 
+    def get_spot_account(self):
+        # served by the response cache of the account client, so cancels don't spend a request on it
+        return self.account_client.get_account_by_type_and_symbol(AccountType.SPOT, symbol=None)
+
     def cancel_all_orders_with_type(self, symbol, order_type):
-        account_spot = self.account_client.get_account_by_type_and_symbol(AccountType.SPOT, symbol=None)
+        account_spot = self.get_spot_account()
         orders = self.trade_client.get_open_orders(symbol=symbol, account_id=account_spot.id, direct=QueryDirection.NEXT)
         sell_order_ids = [str(order.id) for order in orders if order.type == order_type]
         if len(sell_order_ids) == 0:
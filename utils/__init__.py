@@ -1,3 +1,12 @@
-from .market_simulator import brownian_motion
+from .market_simulator import brownian_motion, gbm_paths, jump_diffusion_paths, regime_switching_paths, bootstrap_paths, \
+    log_returns
 from .stream_aggr import StreamAggr
-from .utils import *
\ No newline at end of file
+from .clock import WallClock, PreciseWallClock, SimulatedClock
+from .analytics import BacktestReport, performance_metrics, fill_metrics, grid_level_stats, aggregate_runs, \
+    format_table
+from .stress_tester import StressTester, StressTestResult
+from .replay import MarketDataReplay
+from .candle_store import CandleStore
+from .kline_downloader import KlineDownloader
+from .tick_store import TickStore
+from .utils import *
@@ -0,0 +1,182 @@
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+METRICS = ('total_return', 'annualized_return', 'volatility', 'sharpe', 'sortino', 'max_drawdown',
+           'max_drawdown_duration', 'num_fills', 'turnover', 'fee_drag')
+
+
+def max_drawdown(equity):
+    """Return the max drawdown of every equity curve, as a fraction of the running peak.
+
+    equity -- 1-d curve or 2-d array of shape (num_runs, num_steps); NaN values are skipped
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    running_max = np.fmax.accumulate(equity, axis=1)
+    return np.nanmax(1 - equity / running_max, axis=1, initial=0.0)
+
+
+def max_drawdown_duration(equity, times=None):
+    """Return the longest time every equity curve spent below its previous peak.
+
+    The duration is counted in steps, or in the units of times when the timestamps of the steps are given.
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    steps = np.arange(equity.shape[1])
+    at_peak = equity >= np.fmax.accumulate(equity, axis=1)
+    last_peak = np.maximum.accumulate(np.where(at_peak, steps, 0), axis=1)
+    if times is None:
+        return (steps - last_peak).max(axis=1)
+    times = np.asarray(times, dtype=float)
+    return (times - times[last_peak]).max(axis=1)
+
+
+def infer_periods_per_year(times):
+    """Return the number of steps per year from the median spacing of timestamps in seconds."""
+    spacing = np.median(np.diff(np.asarray(times, dtype=float)))
+    if spacing <= 0:
+        raise ValueError('times must be increasing')
+    return SECONDS_PER_YEAR / spacing
+
+
+def performance_metrics(equity, times=None, periods_per_year=None, risk_free_rate=0.0):
+    """Compute return and risk metrics of one or many equity curves in one vectorized pass.
+
+    equity -- 1-d curve or 2-d array of shape (num_runs, num_steps) sampled at the same times
+    times -- timestamps of the steps in seconds, used to annualize and to measure drawdown durations
+    periods_per_year -- steps per year; inferred from times if None, metrics are per step if both are None
+    risk_free_rate -- annual risk-free rate subtracted in the Sharpe and Sortino ratios
+    Returns a dict of metric name to an array with one value per run.
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    if periods_per_year is None:
+        periods_per_year = 1.0 if times is None else infer_periods_per_year(times)
+    returns = equity[:, 1:] / equity[:, :-1] - 1
+    excess = returns - risk_free_rate / periods_per_year
+    mean = excess.mean(axis=1)
+    std = returns.std(axis=1)
+    downside = np.sqrt((np.minimum(excess, 0) ** 2).mean(axis=1))
+    total_return = equity[:, -1] / equity[:, 0] - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'total_return': total_return,
+            'annualized_return': (1 + total_return) ** (periods_per_year / returns.shape[1]) - 1,
+            'volatility': std * np.sqrt(periods_per_year),
+            'sharpe': np.where(std > 0, mean / std, np.nan) * np.sqrt(periods_per_year),
+            'sortino': np.where(downside > 0, mean / downside, np.nan) * np.sqrt(periods_per_year),
+            'max_drawdown': max_drawdown(equity),
+            'max_drawdown_duration': max_drawdown_duration(equity, times),
+        }
+
+
+def fill_metrics(fills, equity):
+    """Compute trading activity metrics of one run from its fill log (see BacktestTrader.fill_log).
+
+    Turnover is the traded value over the average equity and fee drag the fees paid over the initial equity. The
+    fill log keeps traded values and fees in the base currency of their symbol, so the equity must be valued in
+    that currency for the ratios to hold; BacktestReport.from_trader checks it.
+    """
+    equity = np.asarray(equity, dtype=float)
+    return {
+        'num_fills': len(fills),
+        'turnover': fills['cash_amount'].sum() / equity.mean(),
+        'fee_drag': fills['fee'].sum() / equity[0],
+    }
+
+
+def grid_level_stats(fills, grids):
+    """Return the fill count, traded amount and traded value of every grid level, split by side.
+
+    Fills are assigned to their nearest grid level. The result is a structured array with one row per level.
+    """
+    grids = np.asarray(grids, dtype=float)
+    stats = np.zeros(len(grids), dtype=[('price', 'f8'), ('buys', 'i8'), ('sells', 'i8'), ('buy_amount', 'f8'),
+                                        ('sell_amount', 'f8'), ('buy_cash_amount', 'f8'), ('sell_cash_amount', 'f8')])
+    stats['price'] = grids
+    if len(fills) == 0:
+        return stats
+    idx = np.clip(np.searchsorted(grids, fills['price']), 1, len(grids) - 1)
+    idx -= fills['price'] - grids[idx - 1] < grids[idx] - fills['price']
+    for side, name in ((1, 'buy'), (-1, 'sell')):
+        mask = fills['side'] == side
+        stats[f'{name}s'] = np.bincount(idx[mask], minlength=len(grids))
+        stats[f'{name}_amount'] = np.bincount(idx[mask], fills['amount'][mask], minlength=len(grids))
+        stats[f'{name}_cash_amount'] = np.bincount(idx[mask], fills['cash_amount'][mask], minlength=len(grids))
+    return stats
+
+
+def aggregate_runs(equities, times=None, fills=None, names=None, periods_per_year=None):
+    """Compute the metrics of many runs at once and return them as a table with one row per run.
+
+    equities -- 2-d array of shape (num_runs, num_steps) of equity curves sampled at the same times
+    fills -- optional list of the fill logs of the runs
+    names -- optional run names, e.g. the swept parameters; runs are numbered if None
+    """
+    equities = np.atleast_2d(np.asarray(equities, dtype=float))
+    num_runs = len(equities)
+    metrics = performance_metrics(equities, times, periods_per_year)
+    if fills is not None:
+        activity = [fill_metrics(run_fills, equity) for run_fills, equity in zip(fills, equities)]
+        for name in ('num_fills', 'turnover', 'fee_drag'):
+            metrics[name] = np.array([run[name] for run in activity])
+    names = [str(i) for i in range(num_runs)] if names is None else [str(name) for name in names]
+    columns = [name for name in METRICS if name in metrics]
+    table = np.zeros(num_runs, dtype=[('run', f'U{max(len(name) for name in names)}')] +
+                     [(name, 'f8') for name in columns])
+    table['run'] = names
+    for name in columns:
+        table[name] = metrics[name]
+    return table
+
+
+def format_table(table, precision=4):
+    """Format a structured array, e.g. from aggregate_runs, as a compact fixed-width text table."""
+    columns = table.dtype.names
+    rows = [[f'{value:.{precision}g}' if isinstance(value, float) else str(value) for value in row.tolist()]
+            for row in table]
+    widths = [max([len(name)] + [len(row[i]) for row in rows]) for i, name in enumerate(columns)]
+    lines = ['  '.join(name.rjust(width) for name, width in zip(columns, widths))]
+    lines += ['  '.join(value.rjust(width) for value, width in zip(row, widths)) for row in rows]
+    return '\n'.join(lines)
+
+
+class BacktestReport(object):
+    def __init__(self, equity, times=None, fills=None, grids=None, periods_per_year=None):
+        """Performance report of a single backtest run.
+
+        equity -- 1-d equity curve, e.g. from BacktestTrader.equity_curve
+        times -- timestamps of the equity curve in seconds
+        fills -- fill log, e.g. from BacktestTrader.fill_log
+        grids -- grid prices to break the fills down by grid level
+        """
+        self.equity = np.asarray(equity, dtype=float)
+        self.times = times
+        self.fills = fills
+        self.metrics = {name: value[0] for name, value in
+                        performance_metrics(self.equity, times, periods_per_year).items()}
+        if fills is not None:
+            self.metrics.update(fill_metrics(fills, self.equity))
+        self.grid_stats = None if fills is None or grids is None else grid_level_stats(fills, grids)
+
+    @classmethod
+    def from_trader(cls, trader, grids=None, periods_per_year=None):
+        """Build the report of a BacktestTrader created with equity_quote."""
+        if trader.equity_quote is None:
+            raise ValueError('The trader does not record its equity; create it with equity_quote')
+        from constants import transaction_pairs
+        fills = trader.fill_log()
+        bases = {transaction_pairs[symbol].base for symbol in np.unique(fills['symbol'])}
+        if bases - {trader.equity_quote}:
+            raise ValueError(f'Fills valued in {", ".join(sorted(bases))} cannot be compared to the equity in '
+                             f'{trader.equity_quote}; create the trader with equity_quote set to their currency')
+        times, equity = trader.equity_curve()
+        return cls(equity, times, fills, grids, periods_per_year)
+
+    def to_table(self, precision=4):
+        table = np.zeros(1, dtype=[(name, 'f8') for name in METRICS if name in self.metrics])
+        for name in table.dtype.names:
+            table[name] = self.metrics[name]
+        text = format_table(table, precision)
+        if self.grid_stats is not None:
+            text += '\n\n' + format_table(self.grid_stats, precision)
+        return text
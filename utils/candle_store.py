@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+CANDLE_COLUMNS = (('id', 'i8'), ('open', 'f8'), ('close', 'f8'), ('low', 'f8'), ('high', 'f8'), ('amount', 'f8'),
+                  ('vol', 'f8'), ('count', 'i8'))
+CANDLE_DTYPE = np.dtype(list(CANDLE_COLUMNS))
+
+
+def to_candle_array(candles):
+    """Convert Candlestick objects, a structured array or a dict of columns to a structured array sorted by id."""
+    if isinstance(candles, np.ndarray):
+        array = np.zeros(len(candles), dtype=CANDLE_DTYPE)
+        for name in CANDLE_DTYPE.names:
+            array[name] = candles[name]
+    elif isinstance(candles, dict):
+        array = np.zeros(len(candles['id']), dtype=CANDLE_DTYPE)
+        for name in CANDLE_DTYPE.names:
+            array[name] = candles[name]
+    else:
+        array = np.array([tuple(getattr(candle, name) for name in CANDLE_DTYPE.names) for candle in candles],
+                         dtype=CANDLE_DTYPE)
+    return array[np.argsort(array['id'], kind='stable')]
+
+
+class CandleStore(object):
+    def __init__(self, root_dir):
+        """On-disk store of candles, one directory per symbol and interval with one file per column.
+
+        Every column is a flat array of native byte order that is memory-mapped on read. The id column holds the open
+        times in ascending order and doubles as the time index. meta.json records the number of committed rows,
+        so rows of an append interrupted by a crash are ignored and overwritten by the next append.
+
+        root_dir -- directory of the store, created if missing
+        """
+        self.root_dir = root_dir
+        self.lock = threading.Lock()
+        self.columns = {}
+        os.makedirs(root_dir, exist_ok=True)
+
+    def get_dir(self, symbol, interval):
+        return os.path.join(self.root_dir, symbol, interval)
+
+    def get_column_path(self, symbol, interval, name):
+        return os.path.join(self.get_dir(symbol, interval), name + '.bin')
+
+    def read_meta(self, symbol, interval):
+        path = os.path.join(self.get_dir(symbol, interval), 'meta.json')
+        if not os.path.exists(path):
+            return {'count': 0, 'first_id': None, 'last_id': None}
+        with open(path) as file:
+            return json.load(file)
+
+    def write_meta(self, symbol, interval, meta):
+        path = os.path.join(self.get_dir(symbol, interval), 'meta.json')
+        with open(path + '.tmp', 'w') as file:
+            json.dump(meta, file)
+        os.replace(path + '.tmp', path)
+
+    def __len__(self):
+        return sum(len(intervals) for intervals in self.keys().values())
+
+    def keys(self):
+        """Return a dict of every stored symbol to its stored intervals."""
+        keys = {}
+        for symbol in sorted(os.listdir(self.root_dir)):
+            symbol_dir = os.path.join(self.root_dir, symbol)
+            if os.path.isdir(symbol_dir):
+                keys[symbol] = sorted(interval for interval in os.listdir(symbol_dir)
+                                      if os.path.exists(os.path.join(symbol_dir, interval, 'meta.json')))
+        return keys
+
+    def count(self, symbol, interval):
+        return self.read_meta(symbol, interval)['count']
+
+    def last_id(self, symbol, interval):
+        """Return the open time of the newest stored candle, or None if nothing is stored."""
+        return self.read_meta(symbol, interval)['last_id']
+
+    def append(self, symbol, interval, candles):
+        """Append the candles newer than the stored ones and return the number of appended candles.
+
+        Candles older than the newest stored one are skipped. A candle with the open time of the newest stored one
+        replaces it in place, since the newest candle of the exchange keeps changing until its interval closes.
+        """
+        array = to_candle_array(candles)
+        if len(array):
+            # keep the last of duplicated ids, i.e. the most recent version of a candle
+            _, last = np.unique(array['id'][::-1], return_index=True)
+            array = array[np.sort(len(array) - 1 - last)]
+        with self.lock:
+            meta = self.read_meta(symbol, interval)
+            os.makedirs(self.get_dir(symbol, interval), exist_ok=True)
+            count = meta['count']
+            if count and len(array):
+                array = array[array['id'] >= meta['last_id']]
+                if len(array) and array['id'][0] == meta['last_id']:
+                    for name in CANDLE_DTYPE.names:
+                        column = np.memmap(self.get_column_path(symbol, interval, name), dtype=CANDLE_DTYPE[name],
+                                           mode='r+', shape=(count,))
+                        column[-1] = array[name][0]
+                        column.flush()
+                        del column
+                    array = array[1:]
+            if len(array) == 0:
+                self.columns.pop((symbol, interval), None)
+                return 0
+            for name in CANDLE_DTYPE.names:
+                path = self.get_column_path(symbol, interval, name)
+                with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+                    file.seek(count * CANDLE_DTYPE[name].itemsize)
+                    file.truncate()
+                    file.write(np.ascontiguousarray(array[name]).tobytes())
+            meta = {'count': count + len(array),
+                    'first_id': int(array['id'][0]) if meta['first_id'] is None else meta['first_id'],
+                    'last_id': int(array['id'][-1])}
+            self.write_meta(symbol, interval, meta)
+            self.columns.pop((symbol, interval), None)
+            return len(array)
+
+    def load(self, symbol, interval):
+        """Return a dict of every column to a read-only memory-mapped array of all stored candles."""
+        key = (symbol, interval)
+        columns = self.columns.get(key)
+        if columns is None:
+            count = self.count(symbol, interval)
+            columns = {name: np.memmap(self.get_column_path(symbol, interval, name), dtype=CANDLE_DTYPE[name],
+                                       mode='r', shape=(count,)) if count else np.zeros(0, dtype=CANDLE_DTYPE[name])
+                       for name in CANDLE_DTYPE.names}
+            self.columns[key] = columns
+        return columns
+
+    def get(self, symbol, interval, start=None, end=None):
+        """Return the candles with start <= open time < end as a dict of zero-copy views of the columns.
+
+        The range is found by binary search on the id column, so slicing doesn't read the rest of the file.
+        """
+        columns = self.load(symbol, interval)
+        ids = columns['id']
+        i = 0 if start is None else int(np.searchsorted(ids, start, side='left'))
+        j = len(ids) if end is None else int(np.searchsorted(ids, end, side='left'))
+        return {name: column[i:j] for name, column in columns.items()}
+
+    def get_last(self, symbol, interval, num_candles, end=None):
+        """Return the newest num_candles candles opened before end as a dict of zero-copy views of the columns."""
+        columns = self.load(symbol, interval)
+        j = len(columns['id']) if end is None else int(np.searchsorted(columns['id'], end, side='left'))
+        i = max(0, j - num_candles)
+        return {name: column[i:j] for name, column in columns.items()}
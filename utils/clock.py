@@ -0,0 +1,76 @@
+import time
+
+
+class WallClock(object):
+    """Clock of the live market: the current unix time in seconds."""
+
+    @staticmethod
+    def now():
+        return int(time.time())
+
+    @staticmethod
+    def advance_to(timestamp):
+        # live time moves by itself; data fed with their timestamps, e.g. to a PaperTrader, don't move it
+        pass
+
+    @staticmethod
+    def advance(delta):
+        pass
+
+
+class PreciseWallClock(WallClock):
+    """Clock of the live market with sub-second precision, for sub-second latencies of simulated orders."""
+
+    @staticmethod
+    def now():
+        return time.time()
+
+
+class SimulatedClock(object):
+    def __init__(self, start_time=0, speed=None):
+        """Clock driven by the timestamps of the data fed into a backtest.
+
+        The time only moves when the fed data moves it, so every reader (traders, strategies, aggregators)
+        sharing one clock sees the same time no matter how often it asks.
+
+        start_time -- initial simulated unix time in seconds
+        speed -- replay speed relative to wall time, e.g. 1 for real time and 60 for a minute per second;
+                 None replays as fast as possible without sleeping
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError('speed must be greater than 0')
+        self.time = start_time
+        self.speed = speed
+        self._wall_anchor = None
+        self._sim_anchor = None
+
+    def now(self):
+        return self.time
+
+    def advance_to(self, timestamp):
+        if timestamp < self.time:
+            raise ValueError(f'Simulated time cannot go backwards: {timestamp} < {self.time}')
+        if self.speed is not None:
+            # Pace against a fixed anchor rather than the previous event so that sleep overshoots don't add up
+            if self._wall_anchor is None:
+                self._wall_anchor = time.monotonic()
+                self._sim_anchor = self.time
+            delay = self._wall_anchor + (timestamp - self._sim_anchor) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.time = timestamp
+
+    def advance(self, delta):
+        self.advance_to(self.time + delta)
+
+    def set_speed(self, speed):
+        if speed is not None and speed <= 0:
+            raise ValueError('speed must be greater than 0')
+        self.speed = speed
+        self._wall_anchor = None
+
+    def replay(self, events):
+        """Advance the clock along a stream of (timestamp, event) pairs and yield them at the replay speed."""
+        for timestamp, event in events:
+            self.advance_to(timestamp)
+            yield timestamp, event
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .candle_store import to_candle_array
+from .utils import get_seconds_of_candlestick_interval
+
+PAGE_SIZE = 300
+
+
+class RateLimiter(object):
+    def __init__(self, rate, burst=1):
+        """Token bucket shared by threads: at most burst calls at once and rate calls per second on average."""
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def req_candlestick_sync(market_client, symbol, interval, from_ts, end_ts, timeout=30):
+    """Request the candles of [from_ts, end_ts] with MarketClient.req_candlestick and wait for the response."""
+    done = threading.Event()
+    result = {}
+
+    def callback(candlestick_req):
+        result['data'] = candlestick_req.data
+        done.set()
+
+    def error_handler(exception):
+        result['error'] = exception
+        done.set()
+
+    market_client.req_candlestick(symbol, interval, callback, from_ts, end_ts, error_handler)
+    if not done.wait(timeout):
+        raise TimeoutError(f'No response to the kline request of {symbol} from {from_ts} to {end_ts}')
+    if 'error' in result:
+        raise result['error']
+    return result['data'] or []
+
+
+def find_gaps(ids, seconds, prev_id=None):
+    """Return the (first, last) open times of every run of missing candles between sorted ids."""
+    ids = np.asarray(ids, dtype=np.int64)
+    if prev_id is not None:
+        ids = np.concatenate(([prev_id], ids))
+    gaps = np.nonzero(np.diff(ids) > seconds)[0]
+    return [(int(ids[i]) + seconds, int(ids[i + 1]) - seconds) for i in gaps]
+
+
+class KlineDownloader(object):
+    def __init__(self, candle_store, market_client=None, num_workers=4, requests_per_second=10, page_size=PAGE_SIZE,
+                 max_retries=3, fetch_page=None):
+        """Backfill a CandleStore with the history of many symbols.
+
+        The requested range is split into pages of page_size candles that are fetched concurrently for every
+        symbol, within a rate limit shared by the workers. Pages are appended in time order as they arrive, so an
+        interrupted download resumes from the newest stored candle. Missing candles inside a page or between pages
+        are requested once more before the page is appended; what's still missing is reported as a gap.
+
+        candle_store -- utils.CandleStore the candles are written to
+        market_client -- MarketClient whose req_candlestick fetches the pages; created if None
+        num_workers -- number of pages fetched at once
+        requests_per_second -- rate limit of the page requests
+        max_retries -- attempts of a failed page request before the download of its symbol fails
+        fetch_page -- function(symbol, interval, from_ts, end_ts) returning Candlestick objects; requests the
+                      pages from market_client if None
+        """
+        self.candle_store = candle_store
+        self.market_client = market_client
+        self.num_workers = num_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.fetch_page = fetch_page
+        self.logger = logging.getLogger('kline-downloader')
+
+    def request_page(self, symbol, interval, from_ts, end_ts):
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
+            try:
+                if self.fetch_page is not None:
+                    return self.fetch_page(symbol, interval, from_ts, end_ts)
+                if self.market_client is None:
+                    from huobi.client.market import MarketClient
+                    self.market_client = MarketClient()
+                return req_candlestick_sync(self.market_client, symbol, interval, from_ts, end_ts)
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                self.logger.warning(f'Failed to fetch {symbol} {interval} from {from_ts} to {end_ts}: {e}')
+
+    def plan_pages(self, start, end, seconds):
+        """Return the (from_ts, end_ts) of the pages covering the candles opened in [start, end]."""
+        start = start // seconds * seconds
+        end = end // seconds * seconds
+        step = self.page_size * seconds
+        return [(page_start, min(page_start + step - seconds, end)) for page_start in range(start, end + 1, step)]
+
+    def download(self, symbols, interval, start, end=None):
+        """Download the candles opened in [start, end] of every symbol and return per-symbol reports.
+
+        symbols -- comma separated symbols like "btcusdt,ethusdt", or a list of symbols
+        start, end -- unix times in seconds; end is now if None
+        Returns a dict of symbol to {'appended': number of stored candles, 'gaps': [(first, last), ...]}; a symbol
+        whose download failed also has its exception under 'error' and keeps the pages stored before the failure.
+        """
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        seconds = get_seconds_of_candlestick_interval(interval)
+        end = int(time.time()) if end is None else int(end)
+        reports = {}
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            pages = {}
+            for symbol in symbols:
+                last_id = self.candle_store.last_id(symbol, interval)
+                # refetch the newest stored candle, it may have been stored before its interval closed
+                symbol_start = int(start) if last_id is None else max(int(start), last_id)
+                pages[symbol] = [(page, executor.submit(self.request_page, symbol, interval, *page))
+                                 for page in self.plan_pages(symbol_start, end, seconds)]
+            for symbol in symbols:
+                reports[symbol] = {'appended': 0, 'gaps': []}
+                try:
+                    self.store_pages(symbol, interval, seconds, pages[symbol], reports[symbol])
+                except Exception as e:
+                    self.logger.error(f'Failed to download {symbol} {interval}: {e}')
+                    for _, future in pages[symbol]:
+                        future.cancel()
+                    reports[symbol]['error'] = e
+        return reports
+
+    @staticmethod
+    def missing_ranges(ids, prev_id, end_ts, seconds):
+        gaps = find_gaps(ids, seconds, prev_id)
+        last_id = int(ids[-1]) if len(ids) else prev_id
+        if last_id + seconds <= end_ts:
+            gaps.append((last_id + seconds, end_ts))
+        return gaps
+
+    def store_pages(self, symbol, interval, seconds, pages, report):
+        for (from_ts, end_ts), future in pages:
+            last_id = self.candle_store.last_id(symbol, interval)
+            prev_id = from_ts - seconds if last_id is None else max(last_id, from_ts - seconds)
+            candles = to_candle_array(future.result())
+            candles = candles[(candles['id'] >= from_ts) & (candles['id'] <= end_ts)]
+            gaps = self.missing_ranges(candles['id'][candles['id'] > prev_id], prev_id, end_ts, seconds)
+            if gaps:
+                refetched = [to_candle_array(self.request_page(symbol, interval, *gap)) for gap in gaps]
+                candles = to_candle_array(np.concatenate([candles] + refetched))
+                candles = candles[(candles['id'] >= from_ts) & (candles['id'] <= end_ts)]
+                gaps = self.missing_ranges(np.unique(candles['id'][candles['id'] > prev_id]), prev_id, end_ts, seconds)
+                for gap in gaps:
+                    self.logger.warning(f'Missing {symbol} {interval} candles from {gap[0]} to {gap[1]}')
+            report['gaps'] += gaps
+            report['appended'] += self.candle_store.append(symbol, interval, candles)
@@ -7,3 +7,100 @@ def brownian_motion(init_price, num_steps, delta_t, sigma=1, seed=None):
     dW = np.sqrt(delta_t) * np.random.randn(num_steps) * sigma
     W = init_price + np.cumsum(dW)
     return W
+
+
+def log_returns(prices):
+    """Return the log returns of a 1-d price series, e.g. a recorded close price history."""
+    prices = np.asarray(prices, dtype=float)
+    return np.diff(np.log(prices))
+
+
+def paths_from_log_returns(init_price, returns):
+    """Turn a (num_paths, num_steps) array of log returns into price paths starting at init_price.
+
+    The first column of the result is init_price so that every path can be fed to a strategy as is.
+    """
+    num_paths = returns.shape[0]
+    log_prices = np.empty((num_paths, returns.shape[1] + 1))
+    log_prices[:, 0] = np.log(init_price)
+    np.cumsum(returns, axis=1, out=log_prices[:, 1:])
+    log_prices[:, 1:] += log_prices[:, :1]
+    paths = np.exp(log_prices)
+    paths[:, 0] = init_price
+    return paths
+
+
+def gbm_paths(init_price, num_paths, num_steps, delta_t, mu=0.0, sigma=0.01, seed=None):
+    """Generate geometric Brownian motion paths of shape (num_paths, num_steps + 1).
+
+    mu and sigma are the drift and volatility per unit of time; delta_t is the length of a step.
+    seed is anything accepted by np.random.default_rng, including a Generator.
+    """
+    rng = np.random.default_rng(seed)
+    drift = (mu - 0.5 * sigma ** 2) * delta_t
+    returns = drift + sigma * np.sqrt(delta_t) * rng.standard_normal((num_paths, num_steps))
+    return paths_from_log_returns(init_price, returns)
+
+
+def jump_diffusion_paths(init_price, num_paths, num_steps, delta_t, mu=0.0, sigma=0.01,
+                         jump_intensity=0.01, jump_mean=0.0, jump_std=0.05, seed=None):
+    """Generate Merton jump diffusion paths of shape (num_paths, num_steps + 1).
+
+    Jumps arrive with jump_intensity per unit of time and their log sizes are normally distributed with
+    jump_mean and jump_std. The drift is compensated so that mu stays the expected rate of return.
+    """
+    rng = np.random.default_rng(seed)
+    compensator = jump_intensity * (np.exp(jump_mean + 0.5 * jump_std ** 2) - 1)
+    drift = (mu - 0.5 * sigma ** 2 - compensator) * delta_t
+    returns = drift + sigma * np.sqrt(delta_t) * rng.standard_normal((num_paths, num_steps))
+    num_jumps = rng.poisson(jump_intensity * delta_t, (num_paths, num_steps))
+    # The sum of n normally distributed jumps is normal with n times the mean and sqrt(n) times the std
+    returns += num_jumps * jump_mean + np.sqrt(num_jumps) * jump_std * rng.standard_normal((num_paths, num_steps))
+    return paths_from_log_returns(init_price, returns)
+
+
+def regime_switching_paths(init_price, num_paths, num_steps, delta_t, mus, sigmas, transition_matrix,
+                           init_regime=0, seed=None, return_regimes=False):
+    """Generate Markov regime switching GBM paths of shape (num_paths, num_steps + 1).
+
+    mus and sigmas hold the drift and volatility of every regime, and transition_matrix[i, j] is the
+    probability of switching from regime i to regime j within one step.
+    """
+    rng = np.random.default_rng(seed)
+    mus = np.asarray(mus, dtype=float)
+    sigmas = np.asarray(sigmas, dtype=float)
+    transition_matrix = np.asarray(transition_matrix, dtype=float)
+    num_regimes = len(mus)
+    if len(sigmas) != num_regimes or transition_matrix.shape != (num_regimes, num_regimes):
+        raise ValueError('mus, sigmas and transition_matrix must describe the same number of regimes')
+    if not np.allclose(transition_matrix.sum(axis=1), 1):
+        raise ValueError('Every row of transition_matrix must sum up to 1')
+    cum_transition = np.cumsum(transition_matrix, axis=1)
+    uniforms = rng.random((num_paths, num_steps))
+    regimes = np.empty((num_paths, num_steps), dtype=int)
+    regime = np.full(num_paths, init_regime, dtype=int)
+    for step in range(num_steps):
+        regime = np.minimum((uniforms[:, step, None] > cum_transition[regime]).sum(axis=1), num_regimes - 1)
+        regimes[:, step] = regime
+    drifts = (mus - 0.5 * sigmas ** 2)[regimes] * delta_t
+    returns = drifts + sigmas[regimes] * np.sqrt(delta_t) * rng.standard_normal((num_paths, num_steps))
+    paths = paths_from_log_returns(init_price, returns)
+    if return_regimes:
+        return paths, regimes
+    return paths
+
+
+def bootstrap_paths(init_price, returns, num_paths, num_steps, block_size=1, seed=None):
+    """Generate paths of shape (num_paths, num_steps + 1) by resampling recorded log returns.
+
+    Blocks of block_size consecutive returns are drawn with replacement, which keeps short-term
+    autocorrelation and volatility clustering of the recorded series when block_size > 1.
+    """
+    rng = np.random.default_rng(seed)
+    returns = np.asarray(returns, dtype=float)
+    if block_size < 1 or block_size > len(returns):
+        raise ValueError('block_size must be between 1 and the number of recorded returns')
+    num_blocks = -(-num_steps // block_size)
+    starts = rng.integers(0, len(returns) - block_size + 1, (num_paths, num_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)).reshape(num_paths, -1)[:, :num_steps]
+    return paths_from_log_returns(init_price, returns[indices])
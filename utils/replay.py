@@ -0,0 +1,186 @@
+import heapq
+from operator import itemgetter
+
+from huobi.connection.impl.frame_decoder import GzipFrameDecoder
+from huobi.connection.impl.websocket_recorder import SegmentReader, decode_frame, list_segments, FRAME_BINARY
+from huobi.exception.huobi_api_exception import HuobiApiException
+from huobi.model.market import CandlestickEvent, TradeDetailEvent, PriceDepthEvent, MbpIncreaseEvent
+from huobi.service.market.market_event_parser import parse_candlestick_event, parse_trade_detail_event, \
+    parse_mbp_increase_event, parse_price_depth_event
+from huobi.utils.json_backend import json_loads
+
+from .clock import SimulatedClock
+
+
+def read_recording(root_dir, prefix='ws', start_ns=None, end_ns=None):
+    """Yield the frames of one recording as (recv_ts_ns, flags, payload bytes) in recording order."""
+    for path in list_segments(root_dir, prefix):
+        reader = SegmentReader(path)
+        frames = reader.frames(start_ns, end_ns)
+        try:
+            for recv_ns, _, flags, payload in frames:
+                data = bytes(payload)
+                payload.release()
+                yield recv_ns, flags, data
+        finally:
+            frames.close()
+            reader.close()
+
+
+def merge_recordings(recordings, start_ns=None, end_ns=None):
+    """Merge the frames of several recordings, each a directory or a (directory, prefix) pair, by receive time."""
+    streams = []
+    for recording in recordings:
+        root_dir, prefix = (recording, 'ws') if isinstance(recording, str) else recording
+        streams.append(read_recording(root_dir, prefix, start_ns, end_ns))
+    return heapq.merge(*streams, key=itemgetter(0))
+
+
+frame_decoder = GzipFrameDecoder()
+
+
+def decode_message(flags, payload):
+    """Decode a recorded frame into the dict the live path parses."""
+    message = decode_frame(flags, payload)
+    if flags & FRAME_BINARY:
+        return frame_decoder.decode(message)
+    return json_loads(message)
+
+
+class OrderBook(object):
+    def __init__(self):
+        """Order book of a symbol rebuilt from incremental mbp updates."""
+        self.bids = {}
+        self.asks = {}
+
+    def update(self, mbp):
+        for side, entries in ((self.bids, mbp.bids), (self.asks, mbp.asks)):
+            for entry in entries:
+                if entry.amount:
+                    side[entry.price] = entry.amount
+                else:
+                    side.pop(entry.price, None)
+
+    def levels(self):
+        return sorted(self.bids.items(), reverse=True), sorted(self.asks.items())
+
+
+class MarketDataReplay(object):
+    PRICE_SOURCES = ('trade', 'kline')
+
+    def __init__(self, recordings, start=None, end=None, speed=None, clock=None):
+        """Replay recorded websocket frames through the parsers and callbacks of the live subscriptions.
+
+        The sub_* methods mirror those of MarketClient, so code written against the live client can be fed from
+        a recording. Frames are dispatched at their receive time, which drives the clock.
+
+        recordings -- directory of a WebsocketRecorder, a (directory, prefix) pair, or a list of them
+        start, end -- unix time range in seconds of the frames to replay
+        speed -- replay speed relative to the recording, e.g. 1 for real time; None replays as fast as possible
+        clock -- SimulatedClock paced along the frames; created at the first frame from speed if None
+        """
+        if isinstance(recordings, (str, tuple)):
+            recordings = [recordings]
+        self.recordings = recordings
+        self.start_ns = None if start is None else int(start * 1e9)
+        self.end_ns = None if end is None else int(end * 1e9)
+        self.speed = speed
+        self.clock = clock
+        self.routes = {}
+        self.books = {}
+        self.num_frames = 0
+        self.num_events = 0
+
+    def add_route(self, ch, parse, callback, error_handler=None):
+        self.routes.setdefault(ch, []).append((parse, callback, error_handler))
+
+    def sub_candlestick(self, symbols, interval, callback, error_handler=None):
+        for symbol in symbols.split(','):
+            self.add_route(f'market.{symbol}.kline.{interval}', parse_candlestick_event, callback, error_handler)
+
+    def sub_trade_detail(self, symbols, callback, error_handler=None):
+        for symbol in symbols.split(','):
+            self.add_route(f'market.{symbol}.trade.detail', parse_trade_detail_event, callback, error_handler)
+
+    def sub_pricedepth(self, symbols, depth_step, callback, error_handler=None):
+        for symbol in symbols.split(','):
+            self.add_route(f'market.{symbol}.depth.{depth_step}', parse_price_depth_event, callback, error_handler)
+
+    def sub_mbp_increase(self, symbols, levels, callback, error_handler=None):
+        for symbol in symbols.split(','):
+            self.add_route(f'market.{symbol}.mbp.{levels}', parse_mbp_increase_event, callback, error_handler)
+
+    def add_trader(self, trader, symbols, strategies=(), price_source='trade', interval=None, depth_step=None,
+                   mbp_levels=None):
+        """Feed the replayed prices to a BacktestTrader and then to the strategies of the fed symbol.
+
+        symbols -- comma separated symbols to feed, like "btcusdt,ethusdt"
+        price_source -- 'trade' feeds every trade with its amount, 'kline' feeds the close of the klines of interval
+        depth_step, mbp_levels -- also feed the depth snapshots or the order book rebuilt from mbp updates
+        """
+        if price_source not in MarketDataReplay.PRICE_SOURCES:
+            raise ValueError(f'price_source must be one of {MarketDataReplay.PRICE_SOURCES}')
+        strategies_by_symbol = {}
+        for strategy in strategies:
+            strategies_by_symbol.setdefault(strategy.symbol, []).append(strategy)
+        callback = lambda event: self.feed_trader(trader, strategies_by_symbol, event)
+        if price_source == 'trade':
+            self.sub_trade_detail(symbols, callback)
+        else:
+            if interval is None:
+                raise ValueError('interval must be given to feed klines')
+            self.sub_candlestick(symbols, interval, callback)
+        if depth_step is not None:
+            self.sub_pricedepth(symbols, depth_step, callback)
+        if mbp_levels is not None:
+            self.sub_mbp_increase(symbols, mbp_levels, callback)
+
+    def feed_trader(self, trader, strategies_by_symbol, event):
+        symbol = event.ch.split('.')[1]
+        timestamp = max(self.clock.now(), trader.get_time())
+        if isinstance(event, TradeDetailEvent):
+            for trade in event.data:
+                self.feed_price(trader, strategies_by_symbol, symbol, trade.price, timestamp, trade.amount)
+        elif isinstance(event, CandlestickEvent):
+            self.feed_price(trader, strategies_by_symbol, symbol, event.tick.close, timestamp, None)
+        elif isinstance(event, PriceDepthEvent):
+            trader.feed_depth(symbol, [[entry.price, entry.amount] for entry in event.tick.bids],
+                              [[entry.price, entry.amount] for entry in event.tick.asks])
+        elif isinstance(event, MbpIncreaseEvent):
+            book = self.books.setdefault(symbol, OrderBook())
+            book.update(event.data)
+            trader.feed_depth(symbol, *book.levels())
+
+    @staticmethod
+    def feed_price(trader, strategies_by_symbol, symbol, price, timestamp, volume):
+        trader.feed({symbol: price}, timestamp=timestamp, volumes=None if volume is None else {symbol: volume})
+        for strategy in strategies_by_symbol.get(symbol, ()):
+            strategy.feed(price)
+
+    def frames(self):
+        return merge_recordings(self.recordings, self.start_ns, self.end_ns)
+
+    def dispatch(self, dict_data):
+        routes = self.routes.get(dict_data.get('ch'))
+        if not routes:
+            return
+        for parse, callback, error_handler in routes:
+            try:
+                callback(parse(dict_data))
+            except Exception as e:
+                if error_handler is None:
+                    raise
+                error_handler(HuobiApiException(HuobiApiException.SUBSCRIPTION_ERROR, 'Process error: ' + str(e)))
+            self.num_events += 1
+
+    def run(self):
+        """Replay every frame of the recordings and return the number of dispatched events."""
+        for recv_ns, flags, payload in self.frames():
+            timestamp = recv_ns / 1e9
+            if self.clock is None:
+                self.clock = SimulatedClock(timestamp, self.speed)
+            elif timestamp > self.clock.now():
+                self.clock.advance_to(timestamp)
+            self.num_frames += 1
+            self.dispatch(decode_message(flags, payload))
+        return self.num_events
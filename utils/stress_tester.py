@@ -0,0 +1,127 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from .analytics import max_drawdown
+
+
+def run_strategy_on_path(strategy_factory, symbol, balance, prices):
+    """Feed one price path through a fresh BacktestTrader and strategy and return the equity curve.
+
+    strategy_factory is called as strategy_factory(trader, symbol) and must return an unstarted strategy.
+    The equity curve is the total asset of the strategy in the base currency after every price. A path on
+    which the strategy fails yields a curve of NaN so that one bad path doesn't abort a whole batch.
+    """
+    from trader import BacktestTrader
+    equity = np.full(len(prices), np.nan)
+    try:
+        trader = BacktestTrader(dict(balance), {symbol: prices[0]})
+        strategy = strategy_factory(trader, symbol)
+        strategy.start(prices[0])
+        equity[0] = strategy.get_total_asset(in_base=True)
+        for i in range(1, len(prices)):
+            trader.feed({symbol: prices[i]})
+            strategy.feed(prices[i])
+            equity[i] = strategy.get_total_asset(in_base=True)
+    except Exception:
+        equity[:] = np.nan
+    return equity
+
+
+def _run_strategy_on_paths(strategy_factory, symbol, balance, paths):
+    return np.array([run_strategy_on_path(strategy_factory, symbol, balance, prices) for prices in paths])
+
+
+class StressTestResult(object):
+    def __init__(self, paths, equity):
+        self.paths = paths
+        self.equity = equity
+        self.failed = np.isnan(equity).any(axis=1)
+        self.pnl = equity[:, -1] - equity[:, 0]
+        self.returns = self.pnl / equity[:, 0]
+        self.max_drawdowns = max_drawdown(equity)
+        self.hold_returns = paths[:, -1] / paths[:, 0] - 1
+
+    @property
+    def num_paths(self):
+        return len(self.equity)
+
+    @property
+    def num_failed(self):
+        return int(self.failed.sum())
+
+    def value_at_risk(self, alpha=0.05):
+        """Return the loss, as a fraction of the initial asset, exceeded on an alpha share of the paths."""
+        return -np.quantile(self.returns[~self.failed], alpha)
+
+    def expected_shortfall(self, alpha=0.05):
+        """Return the average loss, as a fraction of the initial asset, over the worst alpha share of the paths."""
+        returns = self.returns[~self.failed]
+        return -returns[returns <= np.quantile(returns, alpha)].mean()
+
+    def summary(self, alpha=0.05):
+        returns = self.returns[~self.failed]
+        return {
+            'num_paths': self.num_paths,
+            'num_failed': self.num_failed,
+            'mean_return': returns.mean(),
+            'std_return': returns.std(),
+            'return_percentiles': dict(zip((1, 5, 25, 50, 75, 95, 99),
+                                           np.percentile(returns, (1, 5, 25, 50, 75, 95, 99)))),
+            'win_rate': (returns > 0).mean(),
+            'mean_excess_return_over_hold': (returns - self.hold_returns[~self.failed]).mean(),
+            'value_at_risk': self.value_at_risk(alpha),
+            'expected_shortfall': self.expected_shortfall(alpha),
+            'mean_max_drawdown': self.max_drawdowns[~self.failed].mean(),
+            'worst_max_drawdown': self.max_drawdowns[~self.failed].max(),
+        }
+
+    def print_summary(self, alpha=0.05):
+        summary = self.summary(alpha)
+        percentiles = ', '.join(f'p{p}: {r*100:.2f}%' for p, r in summary['return_percentiles'].items())
+        print(f'============ Stress test =============\n'
+              f'Paths: {summary["num_paths"]} ({summary["num_failed"]} failed)\n'
+              f'Return:\n'
+              f'  Mean: {summary["mean_return"]*100:.2f}%\n'
+              f'  Std: {summary["std_return"]*100:.2f}%\n'
+              f'  {percentiles}\n'
+              f'  Win rate: {summary["win_rate"]*100:.2f}%\n'
+              f'  Mean excess over holding: {summary["mean_excess_return_over_hold"]*100:.2f}%\n'
+              f'Tail loss ({alpha*100:g}%):\n'
+              f'  VaR: {summary["value_at_risk"]*100:.2f}%\n'
+              f'  Expected shortfall: {summary["expected_shortfall"]*100:.2f}%\n'
+              f'Max drawdown:\n'
+              f'  Mean: {summary["mean_max_drawdown"]*100:.2f}%\n'
+              f'  Worst: {summary["worst_max_drawdown"]*100:.2f}%\n'
+              f'======================================')
+
+
+class StressTester(object):
+    def __init__(self, strategy_factory, symbol, balance, num_workers=None, chunk_size=16):
+        """Run a strategy through many simulated price paths.
+
+        strategy_factory -- called as strategy_factory(trader, symbol); must be picklable when num_workers > 1
+        symbol -- symbol of trading pair the paths are fed to
+        balance -- initial balance of the BacktestTrader of every path, e.g. {'usdt': 1000, 'eth': 0}
+        num_workers -- number of worker processes; None or 1 runs the paths in the current process
+        chunk_size -- number of paths sent to a worker at once
+        """
+        self.strategy_factory = strategy_factory
+        self.symbol = symbol
+        self.balance = balance
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+
+    def run(self, paths):
+        paths = np.asarray(paths, dtype=float)
+        if paths.ndim != 2:
+            raise ValueError('paths must be a 2-d array of shape (num_paths, num_steps)')
+        run_chunk = partial(_run_strategy_on_paths, self.strategy_factory, self.symbol, self.balance)
+        if self.num_workers is None or self.num_workers <= 1:
+            equity = run_chunk(paths)
+        else:
+            chunks = [paths[i:i+self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+            with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+                equity = np.concatenate(list(executor.map(run_chunk, chunks)))
+        return StressTestResult(paths, equity)
@@ -0,0 +1,149 @@
+import datetime
+import os
+import threading
+
+import numpy as np
+
+TICK_DTYPE = np.dtype([('ts', 'i8'), ('trade_id', 'i8'), ('price', 'f8'), ('amount', 'f8'), ('direction', 'i1')])
+MS_PER_DAY = 24 * 3600 * 1000
+
+
+def to_tick_array(trades):
+    """Convert Trade objects of get_history_trade or TradeDetail objects of sub_trade_detail to a tick array.
+
+    The REST trades carry their id as trade_id and the streamed trades as tradeId; both are the same trade id.
+    Directions are stored as 1 for buy and -1 for sell.
+    """
+    if isinstance(trades, np.ndarray):
+        return trades.astype(TICK_DTYPE, copy=False)
+    ticks = np.zeros(len(trades), dtype=TICK_DTYPE)
+    for i, trade in enumerate(trades):
+        ticks[i] = (trade.ts, trade.trade_id if hasattr(trade, 'trade_id') else trade.tradeId, trade.price,
+                    trade.amount, 1 if trade.direction == 'buy' else -1)
+    return ticks
+
+
+def get_day(ts):
+    """Return the UTC date of a timestamp in milliseconds, which names its partition."""
+    return datetime.datetime.fromtimestamp(ts // 1000, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+class TickStore(object):
+    def __init__(self, root_dir, flush_size=10000):
+        """On-disk store of trades, one file per symbol and UTC day holding a flat array of TICK_DTYPE.
+
+        Trades from the REST history and from the live stream are buffered, deduplicated by trade id and written
+        in (ts, trade_id) order. Ticks newer than a partition are appended to it; older ones make the partition
+        be merged and rewritten. Times are exchange timestamps in milliseconds.
+
+        root_dir -- directory of the store, created if missing
+        flush_size -- number of buffered ticks of a symbol that triggers a flush
+        """
+        self.root_dir = root_dir
+        self.flush_size = flush_size
+        self.buffers = {}
+        self.lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    def get_path(self, symbol, day):
+        return os.path.join(self.root_dir, symbol, day + '.ticks')
+
+    def get_days(self, symbol):
+        directory = os.path.join(self.root_dir, symbol)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len('.ticks')] for name in os.listdir(directory) if name.endswith('.ticks'))
+
+    def load_partition(self, symbol, day):
+        """Return the ticks of a day as a read-only memory-mapped array; a torn trailing record is ignored."""
+        path = self.get_path(symbol, day)
+        count = os.path.getsize(path) // TICK_DTYPE.itemsize if os.path.exists(path) else 0
+        if count == 0:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+    def add_trades(self, symbol, trades):
+        ticks = to_tick_array(trades)
+        with self.lock:
+            buffer = self.buffers.setdefault(symbol, [])
+            buffer.append(ticks)
+            size = sum(len(chunk) for chunk in buffer)
+        if size >= self.flush_size:
+            self.flush(symbol)
+
+    def on_trade_detail(self, trade_detail_event):
+        """Callback of MarketClient.sub_trade_detail buffering the streamed trades."""
+        self.add_trades(trade_detail_event.ch.split('.')[1], trade_detail_event.data)
+
+    def add_history(self, symbol, market_client, size=2000):
+        """Fetch the most recent trades with MarketClient.get_history_trade and buffer them."""
+        self.add_trades(symbol, market_client.get_history_trade(symbol, size))
+
+    def flush(self, symbol=None):
+        """Write the buffered ticks of a symbol, or of every symbol if None, to their daily partitions."""
+        with self.lock:
+            symbols = list(self.buffers) if symbol is None else [symbol]
+            buffers = {symbol: self.buffers.pop(symbol, []) for symbol in symbols}
+            for symbol, buffer in buffers.items():
+                if not buffer:
+                    continue
+                ticks = np.concatenate(buffer)
+                _, unique = np.unique(ticks['trade_id'], return_index=True)
+                ticks = ticks[unique]
+                ticks = ticks[np.lexsort((ticks['trade_id'], ticks['ts']))]
+                days = ticks['ts'] // MS_PER_DAY
+                for day in np.unique(days):
+                    self.write_partition(symbol, get_day(int(day) * MS_PER_DAY), ticks[days == day])
+
+    def write_partition(self, symbol, day, ticks):
+        path = self.get_path(symbol, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stored = self.load_partition(symbol, day)
+        if len(stored) == 0 or (ticks['ts'][0], ticks['trade_id'][0]) > (stored['ts'][-1], stored['trade_id'][-1]):
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+                file.seek(len(stored) * TICK_DTYPE.itemsize)
+                file.truncate()
+                file.write(ticks.tobytes())
+            return
+        ticks = np.concatenate((stored, ticks))
+        del stored
+        _, unique = np.unique(ticks['trade_id'], return_index=True)
+        ticks = ticks[unique]
+        ticks = ticks[np.lexsort((ticks['trade_id'], ticks['ts']))]
+        with open(path + '.tmp', 'wb') as file:
+            file.write(ticks.tobytes())
+        os.replace(path + '.tmp', path)
+
+    def scan(self, symbol, start=None, end=None):
+        """Return the stored ticks with start <= ts < end in time order.
+
+        A range inside one day is a zero-copy view of the memory-mapped partition; longer ranges are copied.
+        """
+        days = self.get_days(symbol)
+        if start is not None:
+            days = [day for day in days if day >= get_day(start)]
+        if end is not None:
+            days = [day for day in days if day <= get_day(end - 1)]
+        parts = []
+        for day in days:
+            ticks = self.load_partition(symbol, day)
+            i = 0 if start is None else int(np.searchsorted(ticks['ts'], start, side='left'))
+            j = len(ticks) if end is None else int(np.searchsorted(ticks['ts'], end, side='left'))
+            if j > i:
+                parts.append(ticks[i:j])
+        if not parts:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def volume(self, symbol, start=None, end=None, direction=None):
+        """Return the traded amount in [start, end), of the taker buys or sells only if direction is 'buy' or 'sell'."""
+        ticks = self.scan(symbol, start, end)
+        if direction is not None:
+            ticks = ticks[ticks['direction'] == (1 if direction == 'buy' else -1)]
+        return float(ticks['amount'].sum())
+
+    def vwap(self, symbol, start=None, end=None):
+        """Return the volume weighted average price in [start, end), or NaN if nothing traded."""
+        ticks = self.scan(symbol, start, end)
+        amount = ticks['amount'].sum()
+        return float((ticks['price'] * ticks['amount']).sum() / amount) if amount > 0 else float('nan')